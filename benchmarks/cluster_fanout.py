@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Fan-out benchmark for `nvsmi cluster`, against local stand-in agents.
+
+Starts N agents in this process, each serving /snapshot on its own
+loopback port from a simulated node. Some agents answer late (beyond the
+timeout) and some ports have no agent. It then runs a number of
+fleet-wide query rounds over persistent connections and reports the
+time per round and how many hosts answered, timed out or failed.
+
+    python benchmarks/cluster_fanout.py [-n 400] [--gpus 8] [--slow 4] [--dead 4] [--rounds 5]
+"""
+
+import argparse
+import asyncio
+import socket
+import statistics
+import time
+
+import nvsmi.nvml as nvml
+from nvsmi.cluster import Fleet
+from nvsmi.collect import Collector
+from nvsmi.exporter import MetricsProtocol, Sampler
+from nvsmi.simulated import SimulatedNVML
+
+
+class SlowProtocol(MetricsProtocol):
+    """An agent that answers every request `delay` seconds late"""
+
+    delay = 0.0
+
+    def data_received(self, data):
+        asyncio.get_running_loop().call_later(self.delay, super().data_received, data)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def main_async(args):
+    nvml.use_backend(SimulatedNVML(gpus=args.gpus))
+    with Collector() as collector:
+        sampler = Sampler(collector, 1.0)
+        sampler.sample()            # every agent serves this pre-rendered snapshot
+    SlowProtocol.delay = args.timeout * 2
+
+    loop = asyncio.get_running_loop()
+    servers, hosts = [], []
+    for i in range(args.agents):
+        protocol = SlowProtocol if i < args.slow else MetricsProtocol
+        servers.append(await loop.create_server(lambda p=protocol: p(sampler), "127.0.0.1", 0))
+        hosts.append(f"127.0.0.1:{servers[-1].sockets[0].getsockname()[1]}")
+    hosts += [f"127.0.0.1:{free_port()}" for _ in range(args.dead)]
+
+    times = []
+    async with Fleet(hosts, args.timeout, args.concurrency) as fleet:
+        for round_ in range(args.rounds):
+            start = time.perf_counter()
+            results = await fleet.query()
+            times.append(time.perf_counter() - start)
+            ok = sum(r.snapshot is not None for r in results)
+            timed_out = sum(r.error is not None and "timed out" in r.error for r in results)
+            gpus = sum(len(r.snapshot.gpus) for r in results if r.snapshot is not None)
+            print(f"round {round_ + 1}: {times[-1] * 1000:8.1f} ms  {ok} ok, {timed_out} timed out, "
+                  f"{len(results) - ok - timed_out} failed, {gpus} GPUs")
+    for server in servers:
+        server.close()
+    print(f"{len(hosts)} hosts, concurrency {args.concurrency}: "
+          f"median {statistics.median(times) * 1000:.1f} ms per round")
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("-n", "--agents", type=int, default=400)
+    p.add_argument("--gpus", type=int, default=8, help="GPUs per simulated node")
+    p.add_argument("--slow", type=int, default=4, help="agents that answer after the timeout")
+    p.add_argument("--dead", type=int, default=4, help="hosts with no agent")
+    p.add_argument("--rounds", type=int, default=5)
+    p.add_argument("--timeout", type=float, default=0.5)
+    p.add_argument("--concurrency", type=int, default=64)
+    asyncio.run(main_async(p.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
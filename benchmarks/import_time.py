@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark for the nvsmi CLI, with a regression budget.
+
+Times `python -m nvsmi.cli.main <args> --help` in fresh interpreters and
+checks that help output does not import the NVML/psutil backends. Exits
+non-zero when the median start-up time exceeds the budget or a backend
+module is imported. Runs without a GPU.
+
+    python benchmarks/import_time.py [--budget-ms 80] [-n 20]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# Modules that must not be loaded just to print help
+BACKEND_MODULES = ("pynvml", "psutil", "ctypes", "datetime", "concurrent.futures")
+
+CHECK = """
+import sys
+from nvsmi.cli.main import main
+try:
+    main(sys.argv[1:])
+except SystemExit:
+    pass
+print(",".join(m for m in {modules!r} if m in sys.modules), file=sys.stderr)
+"""
+
+
+def time_run(cmd):
+    start = time.perf_counter()
+    subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("--budget-ms", type=float, default=80.0)
+    p.add_argument("-n", "--runs", type=int, default=20)
+    args = p.parse_args()
+
+    failed = False
+    baseline = statistics.median(time_run([sys.executable, "-c", "pass"]) for _ in range(args.runs))
+    print(f"{'bare interpreter':<28}{baseline * 1000:>8.1f} ms")
+    for argv in (["--help"], ["summary", "--help"], ["nvlink", "--help"]):
+        cmd = [sys.executable, "-m", "nvsmi.cli.main"] + argv
+        median = statistics.median(time_run(cmd) for _ in range(args.runs))
+        over = median * 1000 > args.budget_ms
+        failed |= over
+        print(f"{' '.join(argv):<28}{median * 1000:>8.1f} ms{'  OVER BUDGET' if over else ''}")
+
+        check = subprocess.run([sys.executable, "-c", CHECK.format(modules=BACKEND_MODULES)] + argv,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        loaded = check.stderr.strip().splitlines()[-1] if check.stderr.strip() else ""
+        if loaded:
+            failed = True
+            print(f"{'':<28}imports backend modules: {loaded}")
+
+    print(f"budget {args.budget_ms:g} ms: {'FAIL' if failed else 'ok'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
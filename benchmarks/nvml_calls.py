@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Count the foreign NVML calls made per `nvsmi summary` snapshot.
+
+Every pynvml wrapper fetches its C entry point through
+pynvml._nvmlGetFunctionPointer, so wrapping the returned function counts
+each ctypes call exactly once (including the size-probe calls some
+wrappers make). Session setup is excluded from the counts.
+
+    python benchmarks/nvml_calls.py [-n SNAPSHOTS] [--no-batch]
+"""
+
+import argparse
+import collections
+import time
+
+import pynvml
+from nvsmi.collect import Collector
+
+
+def install_counter():
+    counts = collections.Counter()
+    get_pointer = pynvml._nvmlGetFunctionPointer
+
+    def counting_get_pointer(name):
+        fn = get_pointer(name)
+
+        def call(*args):
+            counts[name] += 1
+            return fn(*args)
+        return call
+
+    pynvml._nvmlGetFunctionPointer = counting_get_pointer
+    return counts
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("-n", "--snapshots", type=int, default=100)
+    p.add_argument("--no-batch", action="store_true",
+                   help="use one NVML call per metric instead of nvmlDeviceGetFieldValues")
+    args = p.parse_args()
+
+    counts = install_counter()
+    with Collector(batch_fields=not args.no_batch) as collector:
+        collector.snapshot()    # first read probes field support
+        counts.clear()
+        start = time.perf_counter()
+        for _ in range(args.snapshots):
+            collector.snapshot()
+        elapsed = time.perf_counter() - start
+        counts = collections.Counter(counts)    # leave nvmlShutdown out
+        gpus = len(collector.handles)
+
+    n = args.snapshots
+    total = sum(counts.values())
+    print(f"{gpus} GPU(s), {n} snapshots, batching {'off' if args.no_batch else 'on'}")
+    for name, c in counts.most_common():
+        print(f"  {name:<45}{c / n:>8.1f} /snapshot")
+    print(f"  {'total':<45}{total / n:>8.1f} /snapshot ({total / n / max(gpus, 1):.1f} /GPU)")
+    print(f"  wall time {elapsed / n * 1000:.3f} ms /snapshot")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Hardware-free benchmark suite on the simulated NVML backend.
+
+Every case runs against nvsmi.simulated.SimulatedNVML with a frozen
+clock, so the work done per operation is the same on every machine.
+For each case the suite reports:
+
+    calls       NVML calls per operation (exact)
+    time_ms     best wall time per operation (least disturbed by noise)
+    peak_kib    peak traced memory during one operation (tracemalloc)
+    net_blocks  allocated blocks left behind by one operation (leaks and
+                unbounded caches; CPython keeps no cumulative count)
+
+With --check the results are compared with a stored baseline and the
+exit status is 1 if any case regressed: more NVML calls at all, or time,
+memory or blocks beyond their tolerances. Wall time is machine
+dependent, so regenerate the baseline with --update on the machine that
+runs the check.
+
+    python benchmarks/suite.py [-k PATTERN] [--check | --update] [--baseline FILE]
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import nvsmi.nvml as nvml
+from nvsmi.simulated import SimulatedNVML
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Simulated node: processes per GPU (64 GPUs -> 2048 processes) and the
+# number of live processes whose names are really read from /proc
+CONFIG = {"processes": 32, "live_processes": 32, "clock": 1000.0}
+
+# Allowed growth over the baseline before a metric counts as a regression
+TOLERANCE = {"time_ms": 0.5, "peak_kib": 0.25, "net_blocks": 0.1}
+SLACK = {"time_ms": 0.05, "peak_kib": 4, "net_blocks": 32}    # absolute, for tiny values
+
+
+def backend(gpus):
+    sim = SimulatedNVML(gpus=gpus, clock=lambda: CONFIG["clock"],
+                        processes=CONFIG["processes"], count_calls=True)
+    nvml.use_backend(sim)
+    return sim
+
+
+def cli(*argv):
+    from nvsmi.cli.main import main
+    return lambda: main(list(argv))
+
+
+# --- cases: each returns (operation, teardown) for a freshly selected backend ---
+
+def case_run_summary(gpus):
+    """One `nvsmi summary` invocation: NVML session, snapshot and table"""
+    return cli("summary", "--no-cache", "--no-shm"), None
+
+
+def case_snapshot(gpus):
+    """One loop-mode sample over a long-lived Collector"""
+    from nvsmi.collect import Collector
+    collector = Collector()
+    return collector.snapshot, collector.close
+
+
+def case_format_summary(gpus):
+    """Rendering the summary table of a collected snapshot"""
+    from nvsmi.collect import Collector
+    from nvsmi.formatter.text.summary import format_summary
+    with Collector() as collector:
+        snap = collector.snapshot()
+    return (lambda: format_summary(driver_version=snap.driver_version, cuda_version=snap.cuda_version,
+                                   gpus=snap.gpus, processes=snap.processes)), None
+
+
+def _process_pids(gpus):
+    """Simulated PIDs of every GPU process, plus live ones to really read /proc for"""
+    from nvsmi.collect import Collector
+    with Collector() as collector:
+        pids = [p.pid for p in collector.snapshot().processes]
+    live = [subprocess.Popen(["sleep", "3600"]) for _ in range(CONFIG["live_processes"])]
+
+    def teardown():
+        for child in live:
+            child.kill()
+            child.wait()
+    return pids + [child.pid for child in live], teardown
+
+
+def case_process_names_cold(gpus):
+    """Naming every process of a snapshot with an empty cache (one-shot CLI)"""
+    from nvsmi.proc import ProcessCache
+    pids, teardown = _process_pids(gpus)
+    return (lambda: ProcessCache().names(pids)), teardown
+
+
+def case_process_names_warm(gpus):
+    """Naming every process of a snapshot with a warm cache (loop mode)"""
+    from nvsmi.proc import ProcessCache
+    pids, teardown = _process_pids(gpus)
+    cache = ProcessCache()
+    cache.names(pids)
+    return (lambda: cache.names(pids)), teardown
+
+
+def case_nvlink_status(gpus):
+    """One `nvsmi nvlink -s` invocation with a warm static cache"""
+    cache_dir = tempfile.TemporaryDirectory()
+    os.environ["NVSMI_CACHE_DIR"] = cache_dir.name
+    return cli("nvlink", "-s"), cache_dir.cleanup
+
+
+# name -> (case, GPU counts)
+CASES = {
+    "run_summary":        (case_run_summary, (1, 8, 64)),
+    "snapshot":           (case_snapshot, (1, 8, 64)),
+    "format_summary":     (case_format_summary, (8, 64)),
+    "process_names_cold": (case_process_names_cold, (64,)),
+    "process_names_warm": (case_process_names_warm, (64,)),
+    "nvlink_status":      (case_nvlink_status, (8, 64)),
+}
+
+
+def measure(case, gpus, min_time=0.2, max_runs=200):
+    sim = backend(gpus)
+    op, teardown = case(gpus)
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            op()                                    # warm up caches and lazy imports
+            sim.calls.clear()
+            op()
+            calls = sum(sim.calls.values())
+
+            times = []
+            start = time.perf_counter()
+            while len(times) < 5 or (time.perf_counter() - start < min_time and len(times) < max_runs):
+                t = time.perf_counter()
+                op()
+                times.append(time.perf_counter() - t)
+
+            gc.collect()
+            blocks = sys.getallocatedblocks()
+            op()
+            gc.collect()
+            net_blocks = sys.getallocatedblocks() - blocks
+
+            tracemalloc.start()
+            base = tracemalloc.get_traced_memory()[0]
+            op()
+            peak = tracemalloc.get_traced_memory()[1] - base
+            tracemalloc.stop()
+    finally:
+        if teardown is not None:
+            teardown()
+    return {"calls": calls, "time_ms": round(min(times) * 1000, 4),
+            "peak_kib": round(peak / 1024, 1), "net_blocks": net_blocks}
+
+
+def regressions(name, result, baseline):
+    """Descriptions of the metrics of one case that are worse than baseline"""
+    found = []
+    if result["calls"] > baseline["calls"]:
+        found.append(f"calls {baseline['calls']} -> {result['calls']}")
+    for metric, tolerance in TOLERANCE.items():
+        limit = baseline[metric] * (1 + tolerance) + SLACK[metric]
+        if result[metric] > limit:
+            found.append(f"{metric} {baseline[metric]} -> {result[metric]} (limit {limit:g})")
+    return [f"{name}: {f}" for f in found]
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    p.add_argument("-k", metavar="PATTERN", help="only run cases whose name contains PATTERN")
+    mode = p.add_mutually_exclusive_group()
+    mode.add_argument("--check", action="store_true", help="fail on regressions against the baseline")
+    mode.add_argument("--update", action="store_true", help="write the results as the new baseline")
+    p.add_argument("--baseline", default=BASELINE, metavar="FILE",
+                   help="baseline file (default: benchmarks/baseline.json)")
+    args = p.parse_args()
+
+    stored = None
+    if args.check:
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        if stored["config"] != CONFIG:
+            sys.exit(f"{args.baseline} was made with {stored['config']}; rerun with --update")
+
+    results = {}
+    print(f"{'case':<28}{'calls':>8}{'time ms':>12}{'peak KiB':>12}{'blocks':>9}")
+    for case_name, (case, gpu_counts) in CASES.items():
+        for gpus in gpu_counts:
+            name = f"{case_name}[{gpus}]"
+            if args.k and args.k not in name:
+                continue
+            r = results[name] = measure(case, gpus)
+            print(f"{name:<28}{r['calls']:>8}{r['time_ms']:>12.3f}{r['peak_kib']:>12.1f}{r['net_blocks']:>9}",
+                  flush=True)
+
+    if args.update:
+        with open(args.baseline, "w") as f:
+            json.dump({"config": CONFIG, "cases": results}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"wrote {args.baseline}")
+    elif args.check:
+        failed = []
+        for name, result in results.items():
+            if name not in stored["cases"]:
+                print(f"{name}: not in baseline", file=sys.stderr)
+                continue
+            failed += regressions(name, result, stored["cases"][name])
+        for line in failed:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if failed:
+            sys.exit(1)
+        print("no regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+nvsmi: nvidia-smi compatible GPU monitoring, as a CLI and a library.
+
+    import nvsmi
+
+    with nvsmi.Collector() as collector:
+        snapshot = collector.snapshot()     # nvsmi.Snapshot of GPUInfo / ProcessInfo
+
+    async with nvsmi.AsyncCollector() as collector:
+        async for snapshot in collector.stream(1.0):
+            ...
+
+    import nvsmi.profile
+    profile = nvsmi.profile.enable()    # time every NVML call from here on
+    ...
+    print(profile.report())
+
+Names are imported on first use, so `import nvsmi` stays cheap.
+"""
+
+# public name -> defining module
+_EXPORTS = {
+    "Collector":      "nvsmi.collect",
+    "AsyncCollector": "nvsmi.aio",
+    "EventListener":  "nvsmi.events",
+    "History":        "nvsmi.history",
+    "Recording":      "nvsmi.record",
+    "RecordWriter":   "nvsmi.record",
+    "Snapshot":       "nvsmi.models.models",
+    "GPUInfo":        "nvsmi.models.models",
+    "MigInfo":        "nvsmi.models.models",
+    "ProcessInfo":    "nvsmi.models.models",
+    "ProcessOwner":   "nvsmi.models.models",
+    "Usage":          "nvsmi.models.models",
+    "StaticInfo":     "nvsmi.models.models",
+    "NvLinkInfo":     "nvsmi.models.models",
+    "Event":          "nvsmi.models.models",
+    "WindowStats":    "nvsmi.models.models",
+    "Profile":        "nvsmi.profile",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
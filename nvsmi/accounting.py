@@ -0,0 +1,53 @@
+"""
+GPU memory accounting per user, container, Kubernetes pod or process.
+
+Owners come from ProcessCache.owners() (uid and cgroup, read once per
+process); usage is summed across all GPUs. Top-N views use a heap, so
+picking the N heaviest of M entries costs O(M log N) instead of a sort.
+"""
+
+import heapq
+from typing import Dict, Iterable, List
+from nvsmi.models.models import ProcessInfo, ProcessOwner, Usage
+
+GROUPS = ("user", "container", "pod", "process")
+
+
+def group_key(p: ProcessInfo, owner: ProcessOwner, by: str):
+    """The name of the group p is accounted to, None if it is not in one"""
+    if by == "process":
+        return f"{p.pid} {p.name}"
+    return getattr(owner, by)
+
+
+def aggregate(processes: Iterable[ProcessInfo], owners: Dict[int, ProcessOwner], by: str) -> List[Usage]:
+    """
+    Usage per group, one entry per distinct group_key(). Memory is summed
+    over every (GPU, process) entry; a process using several GPUs counts
+    once in `processes`.
+    """
+    if by not in GROUPS:
+        raise ValueError(f"unknown grouping {by!r} (choose from {', '.join(GROUPS)})")
+    groups = {}
+    pids = {}
+    for p in processes:
+        key = group_key(p, owners.get(p.pid) or ProcessOwner(), by)
+        usage = groups.get(key)
+        if usage is None:
+            usage = groups[key] = Usage(key=key, used_memory=0, processes=0)
+            pids[key] = set()
+        usage.used_memory += p.used_memory or 0
+        pids[key].add(p.pid)
+        if p.gpu not in usage.gpus:
+            usage.gpus.append(p.gpu)
+    for key, usage in groups.items():
+        usage.processes = len(pids[key])
+        usage.gpus.sort()
+    return list(groups.values())
+
+
+def top(items, n, key=lambda item: item.used_memory or 0):
+    """The n items with the largest key, largest first; all of them sorted if n is None"""
+    if n is None:
+        return sorted(items, key=key, reverse=True)
+    return heapq.nlargest(n, items, key=key)
@@ -0,0 +1,153 @@
+"""
+asyncio front end to Collector.
+
+Every NVML call runs on one dedicated thread owned by the AsyncCollector,
+so the event loop never blocks on the driver and the NVML session and
+handles are only ever used from that thread. Concurrent snapshot() calls
+share one collection. stream(interval) subscriptions share one sampler
+per interval, and each subscriber only holds the latest snapshot: a
+consumer that falls behind gets the newest sample when it is ready, not a
+backlog.
+"""
+
+import asyncio
+from typing import AsyncIterator, Dict, Optional
+from nvsmi.models.models import Snapshot
+
+
+class _Latest:
+    """Single-slot mailbox: put() replaces an unconsumed value"""
+
+    def __init__(self):
+        self.value = None
+        self.ready = asyncio.Event()
+        self.dropped = 0
+
+    def put(self, value):
+        if self.ready.is_set():
+            self.dropped += 1
+        self.value = value
+        self.ready.set()
+
+    async def get(self):
+        await self.ready.wait()
+        self.ready.clear()
+        value, self.value = self.value, None
+        return value
+
+
+class _Sampler:
+    """Takes a snapshot every `interval` seconds and offers it to every subscriber"""
+
+    def __init__(self, collector, interval):
+        self.collector = collector
+        self.interval = interval
+        self.subscribers = set()
+        self.task = asyncio.get_running_loop().create_task(self.run())
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        while True:
+            try:
+                item = await self.collector.snapshot()
+            except Exception as e:
+                item = e
+            for subscriber in self.subscribers:
+                subscriber.put(item)
+            # Stay on the interval grid; ticks we overran are skipped
+            deadline += self.interval
+            now = loop.time()
+            if now > deadline:
+                deadline += self.interval * ((now - deadline) // self.interval + 1)
+            await asyncio.sleep(deadline - now)
+
+
+class AsyncCollector:
+    """
+    Asynchronous Collector. Use as an async context manager, or await
+    open() and close(); arguments are passed on to Collector.
+    """
+
+    def __init__(self, batch_fields=True, workers=1, cache_path=None):
+        from concurrent.futures import ThreadPoolExecutor
+        self._options = dict(batch_fields=batch_fields, workers=workers, cache_path=cache_path)
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="nvsmi-async")
+        self._collector = None
+        self._opening: Optional[asyncio.Future] = None
+        self._pending: Optional[asyncio.Future] = None
+        self._samplers: Dict[float, _Sampler] = {}
+
+    async def _call(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def open(self):
+        """Start the NVML session (on the collector thread); concurrent callers share one"""
+        if self._collector is None:
+            if self._opening is None:
+                from nvsmi.collect import Collector
+                self._opening = asyncio.ensure_future(self._call(lambda: Collector(**self._options)))
+                self._opening.add_done_callback(self._opened)
+            await asyncio.shield(self._opening)
+        return self
+
+    def _opened(self, future):
+        self._opening = None
+        if not future.cancelled() and future.exception() is None:
+            self._collector = future.result()
+
+    async def close(self):
+        for sampler in self._samplers.values():
+            sampler.task.cancel()
+        self._samplers.clear()
+        if self._collector is not None:
+            await self._call(self._collector.close)
+            self._collector = None
+        self._executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    @property
+    def collector(self):
+        """The underlying Collector (only call it through this object's methods)"""
+        return self._collector
+
+    async def snapshot(self) -> Snapshot:
+        """Collect a Snapshot; concurrent callers share one collection"""
+        if self._collector is None:
+            await self.open()
+        if self._pending is None:
+            self._pending = asyncio.ensure_future(self._call(self._collector.snapshot))
+            self._pending.add_done_callback(lambda _: setattr(self, "_pending", None))
+        return await asyncio.shield(self._pending)
+
+    async def stream(self, interval: float) -> AsyncIterator[Snapshot]:
+        """
+        Yield a Snapshot every `interval` seconds. Samples taken while the
+        consumer is busy replace each other, so it always receives the
+        latest one and never a queue of stale ones.
+        """
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        if self._collector is None:
+            await self.open()
+        sampler = self._samplers.get(interval)
+        if sampler is None:
+            sampler = self._samplers[interval] = _Sampler(self, interval)
+        mailbox = _Latest()
+        sampler.subscribers.add(mailbox)
+        try:
+            while True:
+                item = await mailbox.get()
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            sampler.subscribers.discard(mailbox)
+            if not sampler.subscribers and self._samplers.get(interval) is sampler:
+                sampler.task.cancel()
+                del self._samplers[interval]
@@ -0,0 +1,103 @@
+import sys
+import nvsmi.loop as loop
+
+
+def attach_parser(subparsers):
+    """Attach cluster subcommand to argument parser"""
+    parser = subparsers.add_parser("cluster", help="Query `nvsmi serve` agents on many hosts at once")
+    hosts = parser.add_mutually_exclusive_group(required=True)
+    hosts.add_argument("-H", "--hosts", metavar="HOSTS",
+                       help="comma-separated host[:port] list (default port 9400)")
+    hosts.add_argument("-f", "--hostfile", metavar="FILE",
+                       help="file with one host[:port] per line ('-' for stdin)")
+    parser.add_argument("--timeout", type=float, default=2.0, metavar="SECONDS",
+                        help="give up on a host after SECONDS (default: 2)")
+    parser.add_argument("--concurrency", type=int, default=64, metavar="N",
+                        help="query at most N hosts at a time (default: 64)")
+    parser.add_argument("--format", choices=("table", "ndjson"), default="table",
+                        help="one fleet-wide table, or one JSON line per GPU as hosts answer "
+                             "(default: table)")
+    loop.add_loop_arguments(parser)
+    parser.set_defaults(func=cluster_main)
+
+
+def read_hosts(args):
+    from nvsmi.cluster import parse_hosts
+    if args.hosts:
+        return parse_hosts(args.hosts)
+    if args.hostfile == "-":
+        return parse_hosts(sys.stdin.read())
+    with open(args.hostfile) as f:
+        return parse_hosts(f.read())
+
+
+async def print_table(fleet, out):
+    import time
+    from nvsmi.formatter.text.cluster import format_fleet
+    start = time.monotonic()
+    results = await fleet.query()
+    out.write(format_fleet(results, time.monotonic() - start) + "\n\n")
+    out.flush()
+
+
+async def print_ndjson(fleet, writers, out):
+    import json
+    import time
+    from nvsmi.formatter.stream import write_snapshot
+    for result in fleet.results():
+        r = await result
+        if r.snapshot is None:
+            out.write(json.dumps({"timestamp": time.time(), "host": r.host, "error": r.error},
+                                 separators=(",", ":")) + "\n")
+        else:
+            write_snapshot(writers[r.host], r.snapshot)
+    out.flush()
+
+
+async def run(args, hosts, interval):
+    import asyncio
+    import time
+    from nvsmi.cluster import Fleet
+    from nvsmi.formatter.json.summary import NdjsonWriter
+    out = sys.stdout
+    # One writer per host, so that its GPU indices do not clash with other hosts'
+    writers = {h: NdjsonWriter(out, labels={"host": h}) for h in hosts}
+    async with Fleet(hosts, args.timeout, args.concurrency) as fleet:
+        deadline = time.monotonic()
+        while True:
+            if args.format == "ndjson":
+                await print_ndjson(fleet, writers, out)
+            else:
+                await print_table(fleet, out)
+            if interval is None:
+                return
+            # Stay on the interval grid, skipping rounds we overran
+            deadline += interval
+            now = time.monotonic()
+            if now > deadline:
+                deadline += interval * ((now - deadline) // interval + 1)
+            await asyncio.sleep(deadline - now)
+
+
+def cluster_main(args):
+    """Main function for cluster command"""
+    import asyncio
+    from nvsmi.cluster import split_host
+    try:
+        hosts = read_hosts(args)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if not hosts:
+        print("Error: no hosts given", file=sys.stderr)
+        return 1
+    for host in hosts:
+        try:
+            split_host(host)
+        except ValueError:
+            print(f"Error: bad host {host!r} (expected host[:port])", file=sys.stderr)
+            return 1
+    try:
+        asyncio.run(run(args, hosts, loop.interval_from_args(args)))
+    except KeyboardInterrupt:
+        pass
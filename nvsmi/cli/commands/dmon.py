@@ -0,0 +1,152 @@
+import sys
+import time
+import nvsmi.nvml as nvml
+import nvsmi.loop as loop
+
+MIB = 1024 * 1024
+
+# Metrics dmon can read, as FieldReader (field ID, per-metric fallback) pairs
+METRICS = {
+    "power":  ("NVML_FI_DEV_POWER_INSTANT", lambda h: nvml.get_device_power_usage(h)),
+    "gtemp":  (None, lambda h: nvml.get_device_temperature(h, nvml.NVML_TEMPERATURE_GPU)),
+    "mtemp":  ("NVML_FI_DEV_MEMORY_TEMP", None),
+    "util":   (None, lambda h: nvml.get_device_utilization_rates(h)),
+    "enc":    (None, lambda h: nvml.get_device_encoder_utilization(h)),
+    "dec":    (None, lambda h: nvml.get_device_decoder_utilization(h)),
+    "mclk":   (None, lambda h: nvml.get_device_clock_info(h, nvml.NVML_CLOCK_MEM)),
+    "pclk":   (None, lambda h: nvml.get_device_clock_info(h, nvml.NVML_CLOCK_SM)),
+    "pviol":  ("NVML_FI_DEV_PERF_POLICY_POWER",
+               lambda h: nvml.get_device_violation_status(h, nvml.NVML_PERF_POLICY_POWER).violationTime),
+    "tviol":  ("NVML_FI_DEV_PERF_POLICY_THERMAL",
+               lambda h: nvml.get_device_violation_status(h, nvml.NVML_PERF_POLICY_THERMAL).violationTime),
+    "memory": (None, lambda h: nvml.get_device_memory_info(h)),
+    "bar1":   (None, lambda h: nvml.get_device_bar1_memory_info(h)),
+    "sbecc":  ("NVML_FI_DEV_ECC_SBE_VOL_TOTAL",
+               lambda h: nvml.get_device_total_ecc_errors(h, nvml.NVML_MEMORY_ERROR_TYPE_CORRECTED, nvml.NVML_VOLATILE_ECC)),
+    "dbecc":  ("NVML_FI_DEV_ECC_DBE_VOL_TOTAL",
+               lambda h: nvml.get_device_total_ecc_errors(h, nvml.NVML_MEMORY_ERROR_TYPE_UNCORRECTED, nvml.NVML_VOLATILE_ECC)),
+    "pci":    ("NVML_FI_DEV_PCIE_REPLAY_COUNTER", lambda h: nvml.get_device_pcie_replay_counter(h)),
+    "rxpci":  (None, lambda h: nvml.get_device_pcie_throughput(h, nvml.NVML_PCIE_UTIL_RX_BYTES)),
+    "txpci":  (None, lambda h: nvml.get_device_pcie_throughput(h, nvml.NVML_PCIE_UTIL_TX_BYTES)),
+}
+
+# Cumulative counters (ns of throttling) shown per interval
+COUNTERS = {"pviol", "tviol"}
+
+# -o flags: column name and strftime format
+STAMPS = {"D": ("Date", "%Y%m%d"), "T": ("Time", "%H:%M:%S")}
+
+# Metric groups selectable with -s, as (column, unit, metric, value) columns.
+# Counter columns get the fraction of the interval spent throttled.
+GROUPS = {
+    "p": [("pwr", "W", "power", lambda v: v // 1000),
+          ("gtemp", "C", "gtemp", lambda v: v),
+          ("mtemp", "C", "mtemp", lambda v: v)],
+    "u": [("sm", "%", "util", lambda v: v.gpu),
+          ("mem", "%", "util", lambda v: v.memory),
+          ("enc", "%", "enc", lambda v: v[0]),
+          ("dec", "%", "dec", lambda v: v[0])],
+    "c": [("mclk", "MHz", "mclk", lambda v: v),
+          ("pclk", "MHz", "pclk", lambda v: v)],
+    "v": [("pviol", "%", "pviol", lambda f: round(100 * f)),
+          ("tviol", "bool", "tviol", lambda f: int(f > 0))],
+    "m": [("fb", "MB", "memory", lambda v: v.used // MIB),
+          ("bar1", "MB", "bar1", lambda v: v.bar1Used // MIB)],
+    "e": [("sbecc", "errs", "sbecc", lambda v: v),
+          ("dbecc", "errs", "dbecc", lambda v: v),
+          ("pci", "errs", "pci", lambda v: v)],
+    "t": [("rxpci", "MB/s", "rxpci", lambda v: v // 1000),
+          ("txpci", "MB/s", "txpci", lambda v: v // 1000)],
+}
+
+
+def attach_parser(subparsers):
+    """Attach dmon subcommand to argument parser"""
+    parser = subparsers.add_parser("dmon", help="Monitor devices, one line per GPU per interval")
+    parser.add_argument("-s", "--select", default="puc", metavar="GROUPS",
+                        help="metric groups, any of " + "".join(GROUPS) + " (default: puc)")
+    parser.add_argument("-d", "--delay", type=float, default=1.0, metavar="SECONDS",
+                        help="sampling interval (default: 1)")
+    parser.add_argument("-c", "--count", type=int, metavar="N",
+                        help="stop after N samples")
+    parser.add_argument("-i", "--id", metavar="IDS",
+                        help="comma-separated GPU indices to monitor (default: all)")
+    parser.add_argument("-o", "--options", default="", metavar="DT",
+                        help="prefix rows with D: date (YYYYMMDD) and/or T: time (HH:MM:SS)")
+    parser.add_argument("--header-every", type=int, default=20, metavar="ROWS",
+                        help="repeat the header after ROWS rows, 0 for never (default: 20)")
+    parser.set_defaults(func=dmon_main)
+
+
+def dmon_main(args):
+    """Main function for dmon command"""
+    from nvsmi.formatter.text.dmon import DmonFormatter
+    unknown = set(args.select) - set(GROUPS)
+    if unknown:
+        print(f"Error: unknown metric group(s) {''.join(sorted(unknown))}", file=sys.stderr)
+        return 1
+    if args.header_every < 0:
+        print("Error: --header-every must be 0 or more", file=sys.stderr)
+        return 1
+    if args.delay <= 0:
+        print("Error: -d must be positive", file=sys.stderr)
+        return 1
+    columns = [c for g in GROUPS if g in args.select for c in GROUPS[g]]
+    keys = list(dict.fromkeys(metric for _, _, metric, _ in columns))
+    counters = COUNTERS.intersection(keys)
+    stamps = [STAMPS[flag] for flag in "DT" if flag in args.options.upper()]
+    formatter = DmonFormatter([(name, unit) for name, unit, _, _ in columns],
+                              [name for name, _ in stamps])
+
+    nvml.initialize()
+    try:
+        count = nvml.get_device_count()
+        indices = [int(i) for i in args.id.split(",")] if args.id else list(range(count))
+        handles = [nvml.get_device_handle_by_index(i) for i in indices]
+        # Only the metrics of the selected groups, batched where possible
+        readers = [nvml.FieldReader(h, [(k,) + METRICS[k] for k in keys]) for h in handles]
+
+        # Row buffers and counter state, allocated once
+        first = len(stamps) + 1
+        rows = [[None] * (first + len(columns)) for _ in handles]
+        previous = [dict.fromkeys(counters) for _ in handles]
+        printed = None      # rows since the last header, None before the first
+        last_time = None
+
+        def sample():
+            nonlocal printed, last_time
+            now = time.time()
+            local = time.localtime(now)
+            stamp = [time.strftime(fmt, local) for _, fmt in stamps]
+            interval_ns = None if last_time is None else (now - last_time) * 1e9
+            last_time = now
+
+            lines = []
+            # The header is only repeated between intervals, never inside one
+            if printed is None or (args.header_every and printed >= args.header_every):
+                lines.append(formatter.header)
+                printed = 0
+            printed += len(handles)
+            for idx, reader, row, prev in zip(indices, readers, rows, previous):
+                try:
+                    m = reader.read()
+                except nvml.pynvml.NVMLError:
+                    m = dict.fromkeys(keys)
+                for key in counters:
+                    value, last = m[key], prev[key]
+                    prev[key] = value
+                    m[key] = (None if value is None or last is None or not interval_ns
+                              else (value - last) / interval_ns)
+                row[:first - 1] = stamp
+                row[first - 1] = idx
+                for i, (_, _, key, value) in enumerate(columns, first):
+                    v = m[key]
+                    row[i] = None if v is None else value(v)
+                lines.append(formatter.format_row(row))
+            # One write per interval
+            sys.stdout.write("\n".join(lines) + "\n")
+            sys.stdout.flush()
+
+        loop.run_every(args.delay, sample, args.count)
+    finally:
+        nvml.shutdown()
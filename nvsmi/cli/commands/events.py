@@ -0,0 +1,47 @@
+import sys
+
+
+def attach_parser(subparsers):
+    """Attach events subcommand to argument parser"""
+    parser = subparsers.add_parser("events", help="Wait for and print GPU events (Xid, clocks, processes)")
+    parser.add_argument("-e", "--events", default="xid,clock,power,process", metavar="TYPES",
+                        help="comma-separated event types: xid, clock, power, pstate, sbe, dbe, "
+                             "process (default: xid,clock,power,process)")
+    parser.add_argument("-i", "--id", metavar="IDS",
+                        help="comma-separated GPU indices (default: all)")
+    parser.add_argument("-c", "--count", type=int, metavar="N",
+                        help="exit after N events")
+    parser.add_argument("--process-interval", type=float, default=1.0, metavar="SECONDS",
+                        help="how often to check for process start/exit (default: 1)")
+    parser.add_argument("--format", choices=("text", "ndjson"), default="text",
+                        help="output format (default: text)")
+    parser.set_defaults(func=events_main)
+
+
+def events_main(args):
+    """Main function for events command"""
+    from nvsmi.events import EventListener
+    if args.format == "ndjson":
+        from nvsmi.formatter.json.events import format_event
+    else:
+        from nvsmi.formatter.text.events import format_event
+    kinds = [k.strip() for k in args.events.split(",") if k.strip()]
+    indices = [int(i) for i in args.id.split(",")] if args.id else None
+    try:
+        listener = EventListener(kinds, indices, args.process_interval)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return
+    with listener:
+        for index, missing in sorted(listener.unsupported.items()):
+            print(f"nvsmi: GPU {index} does not report: {', '.join(missing)}", file=sys.stderr)
+        seen = 0
+        try:
+            for event in listener:
+                sys.stdout.write(format_event(event) + "\n")
+                sys.stdout.flush()
+                seen += 1
+                if args.count is not None and seen >= args.count:
+                    break
+        except KeyboardInterrupt:
+            pass
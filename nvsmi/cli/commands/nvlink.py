@@ -1,4 +1,13 @@
+import sys
+import time
 import nvsmi.nvml as nvml
+import nvsmi.loop as loop
+
+# -gt kinds: (Tx, Rx) throughput fields, counted in KiB
+THROUGHPUT_FIELDS = {
+    "d": ("NVML_FI_DEV_NVLINK_THROUGHPUT_DATA_TX", "NVML_FI_DEV_NVLINK_THROUGHPUT_DATA_RX"),
+    "r": ("NVML_FI_DEV_NVLINK_THROUGHPUT_RAW_TX", "NVML_FI_DEV_NVLINK_THROUGHPUT_RAW_RX"),
+}
 
 
 def attach_parser(subparsers):
@@ -6,33 +15,115 @@ def attach_parser(subparsers):
     parser = subparsers.add_parser("nvlink", help="Display nvlink status")
     parser.add_argument("-s", "--status", action="store_true", 
                        help="Display nvlink status")
+    parser.add_argument("-p", "--pciBusId", dest="remote", action="store_true",
+                        help="Display the remote PCI bus ID of each link")
+    parser.add_argument("-V", "--link-version", action="store_true",
+                        help="Display the NVLink version of each link")
+    parser.add_argument("-gt", "--getthroughput", dest="throughput", choices=THROUGHPUT_FIELDS,
+                        help="Display throughput counters: d (data) or r (raw, with protocol "
+                             "overhead); in loop mode, as GB/s over each interval")
+    parser.add_argument("-i", "--id", metavar="IDS",
+                        help="comma-separated GPU indices (default: all)")
+    loop.add_loop_arguments(parser)
     parser.set_defaults(func=nvlink_main)
 
 
 def nvlink_main(args):
     """Main function for nvlink command"""
+    from nvsmi.formatter.text import nvlink as fmt
+    if not (args.status or args.remote or args.link_version or args.throughput):
+        print("Use -s to show nvlink status")
+        return
     nvml.initialize()
     try:
-        if args.status:
-            show_nvlink_status()
-        else:
-            print("Use -s to show nvlink status")
+        # The link map (versions, speeds, remote ends) is discovered once
+        # per driver load and kept in the static attribute cache.
+        static = nvml.StaticCache(nvml.default_cache_path())
+        static.load(nvml.get_driver_version())
+        count = nvml.get_device_count()
+        indices = [int(i) for i in args.id.split(",")] if args.id else list(range(count))
+        handles = [nvml.get_device_handle_by_index(i) for i in indices]
+        infos = [static.device(i, h) for i, h in zip(indices, handles)]
+        static.save()
+
+        if args.status or args.remote or args.link_version:
+            lines = []
+            for idx, handle, info in zip(indices, handles, infos):
+                lines.append(fmt.format_gpu(idx, info))
+                if args.status:
+                    lines += fmt.format_status(info.nvlinks, link_states(handle, info.nvlinks))
+                if args.remote:
+                    lines += fmt.format_remote(info.nvlinks)
+                if args.link_version:
+                    lines += fmt.format_version(info.nvlinks)
+            print("\n".join(lines), flush=True)
+
+        if args.throughput:
+            show_throughput(args, indices, handles, infos)
     finally:
         nvml.shutdown()
 
 
-def show_nvlink_status():
-    """Display nvlink status for all GPUs"""
-    device_count = nvml.get_device_count()
-    
-    for i in range(device_count):
-        handle = nvml.get_device_handle_by_index(i)
-        name = nvml.get_device_name(handle)
-        uuid = nvml.get_device_uuid(handle)
-        
-        print(f"GPU {i}: {name} (UUID: {uuid})")
-        
-        # For now, hardcode:
-        for link in range(4):
-            bandwidth = 14.062
-            print(f"\t Link {link}: {bandwidth} GB/s")
+def link_states(handle, links):
+    """{link: active} for the given links, in one batched field read"""
+    metrics = nvml.nvlink_fields("NVML_FI_DEV_NVLINK_GET_STATE", [l.link for l in links],
+                                 nvml.get_device_nvlink_state)
+    # NVML_NVLINK_STATE_ACTIVE and NVML_FEATURE_ENABLED are both 1
+    return {link: state == 1 for link, state in nvml.FieldReader(handle, metrics).read().items()}
+
+
+class ThroughputReader:
+    """Tx/Rx counters of every link of one device, one batched read per sample"""
+
+    def __init__(self, handle, links, kind):
+        numbers = [l.link for l in links]
+        tx, rx = THROUGHPUT_FIELDS[kind]
+        metrics = [(("tx", k), f, None) for k, f, _ in nvml.nvlink_fields(tx, numbers)]
+        metrics += [(("rx", k), f, None) for k, f, _ in nvml.nvlink_fields(rx, numbers)]
+        self.links = numbers
+        self.reader = nvml.FieldReader(handle, metrics)
+
+    def read(self):
+        """({link: (tx KiB, rx KiB)}, monotonic time of the read)"""
+        values = self.reader.read()
+        now = time.monotonic()
+        return {l: (values[("tx", l)], values[("rx", l)]) for l in self.links}, now
+
+
+def _rate(old, new, seconds):
+    """GB/s between two KiB counter readings"""
+    if old is None or new is None:
+        return None
+    return (new - old) * 1024 / seconds / 1e9
+
+
+def show_throughput(args, indices, handles, infos):
+    from nvsmi.formatter.text import nvlink as fmt
+    import nvsmi.utils as utils
+    readers = [ThroughputReader(h, info.nvlinks, args.throughput) for h, info in zip(handles, infos)]
+    interval = loop.interval_from_args(args)
+    if interval is None:
+        lines = []
+        for idx, info, reader in zip(indices, infos, readers):
+            lines.append(fmt.format_gpu(idx, info))
+            lines += fmt.format_counters(reader.read()[0], args.throughput)
+        print("\n".join(lines), flush=True)
+        return
+
+    previous = [reader.read() for reader in readers]
+
+    def sample():
+        lines = [utils.get_timestamp()]
+        for n, (idx, info, reader) in enumerate(zip(indices, infos, readers)):
+            counters, now = reader.read()
+            old, then = previous[n]
+            previous[n] = counters, now
+            rates = {l: (_rate(old[l][0], tx, now - then), _rate(old[l][1], rx, now - then))
+                     for l, (tx, rx) in counters.items()}
+            lines.append(fmt.format_gpu(idx, info))
+            lines += fmt.format_rates(rates, args.throughput)
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
+
+    time.sleep(interval)
+    loop.run_every(interval, sample)
@@ -0,0 +1,124 @@
+import sys
+import time
+import nvsmi.nvml as nvml
+import nvsmi.loop as loop
+from nvsmi.cli.commands.dmon import STAMPS
+
+MIB = 1024 * 1024
+
+# Metric groups selectable with -s, as (column, unit, value) columns;
+# value() gets the aggregated utilization sample and the process memory.
+GROUPS = {
+    "u": [("sm", "%", lambda u, mem: u and u[0]),
+          ("mem", "%", lambda u, mem: u and u[1]),
+          ("enc", "%", lambda u, mem: u and u[2]),
+          ("dec", "%", lambda u, mem: u and u[3])],
+    "m": [("fb", "MB", lambda u, mem: None if mem is None else mem // MIB)],
+}
+
+
+def attach_parser(subparsers):
+    """Attach pmon subcommand to argument parser"""
+    parser = subparsers.add_parser("pmon", help="Monitor per-process GPU utilization")
+    parser.add_argument("-s", "--select", default="u", metavar="GROUPS",
+                        help="metric groups, any of " + "".join(GROUPS) + " (default: u)")
+    parser.add_argument("-d", "--delay", type=float, default=1.0, metavar="SECONDS",
+                        help="sampling interval (default: 1)")
+    parser.add_argument("-c", "--count", type=int, metavar="N",
+                        help="stop after N samples")
+    parser.add_argument("-i", "--id", metavar="IDS",
+                        help="comma-separated GPU indices to monitor (default: all)")
+    parser.add_argument("-o", "--options", default="", metavar="DT",
+                        help="prefix rows with D: date (YYYYMMDD) and/or T: time (HH:MM:SS)")
+    parser.set_defaults(func=pmon_main)
+
+
+class DeviceSampler:
+    """
+    Incremental per-process utilization for one device.
+
+    Only samples newer than the last timestamp seen are requested from
+    NVML, and they are averaged per pid over the interval. Devices that
+    do not support process utilization report no samples, and are not
+    asked again.
+    """
+
+    def __init__(self, handle):
+        self.handle = handle
+        self.last_seen = 0
+        self.supported = True
+
+    def utilization(self):
+        """{pid: (sm, mem, enc, dec)} averaged over samples since the last call"""
+        if not self.supported:
+            return {}
+        try:
+            samples = nvml.get_device_process_utilization(self.handle, self.last_seen)
+        except nvml.pynvml.NVMLError_NotSupported:
+            self.supported = False
+            return {}
+        sums = {}
+        for s in samples:
+            self.last_seen = max(self.last_seen, s.timeStamp)
+            acc = sums.setdefault(s.pid, [0, 0, 0, 0, 0])
+            acc[0] += s.smUtil
+            acc[1] += s.memUtil
+            acc[2] += s.encUtil
+            acc[3] += s.decUtil
+            acc[4] += 1
+        return {pid: tuple(v // acc[4] for v in acc[:4]) for pid, acc in sums.items()}
+
+    def processes(self):
+        """[(pid, type, used bytes)] for compute and graphics processes"""
+        procs = [(p.pid, "C", p.usedGpuMemory) for p in nvml.get_device_compute_running_processes(self.handle)]
+        procs += [(p.pid, "G", p.usedGpuMemory) for p in nvml.get_device_graphics_running_processes(self.handle)]
+        return procs
+
+
+def pmon_main(args):
+    """Main function for pmon command"""
+    from nvsmi.formatter.text.pmon import PmonFormatter
+    from nvsmi.proc import ProcessCache
+    unknown = set(args.select) - set(GROUPS)
+    if unknown:
+        print(f"Error: unknown metric group(s) {''.join(sorted(unknown))}", file=sys.stderr)
+        return 1
+    if args.delay <= 0:
+        print("Error: -d must be positive", file=sys.stderr)
+        return 1
+    columns = [c for g in GROUPS if g in args.select for c in GROUPS[g]]
+    stamps = [STAMPS[flag] for flag in "DT" if flag in args.options.upper()]
+    formatter = PmonFormatter([(name, unit) for name, unit, _ in columns],
+                              [name for name, _ in stamps])
+    # Names are read once per (pid, start time), i.e. once per process lifetime
+    names = ProcessCache()
+
+    nvml.initialize()
+    try:
+        count = nvml.get_device_count()
+        indices = [int(i) for i in args.id.split(",")] if args.id else list(range(count))
+        samplers = [DeviceSampler(nvml.get_device_handle_by_index(i)) for i in indices]
+
+        def sample():
+            local = time.localtime()
+            stamp = [time.strftime(fmt, local) for _, fmt in stamps]
+            lines = [formatter.header]
+            for idx, sampler in zip(indices, samplers):
+                util = sampler.utilization()
+                procs = sampler.processes()
+                listed = {pid for pid, _, _ in procs}
+                # Processes with samples that are not in the running lists
+                procs += [(pid, None, None) for pid in util if pid not in listed]
+                resolved = names.names(pid for pid, _, _ in procs)
+                if not procs:
+                    lines.append(formatter.format_row(stamp + [idx, None, None] + [None] * len(columns) + [None]))
+                for pid, type_, mem in procs:
+                    u = util.get(pid)
+                    row = stamp + [idx, pid, type_] + [value(u, mem) for _, _, value in columns]
+                    lines.append(formatter.format_row(row + [resolved[pid]]))
+            sys.stdout.write("\n".join(lines) + "\n")
+            sys.stdout.flush()
+
+        loop.run_every(args.delay, sample, args.count)
+    finally:
+        nvml.shutdown()
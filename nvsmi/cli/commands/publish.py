@@ -0,0 +1,31 @@
+import sys
+import nvsmi.nvml as nvml
+import nvsmi.loop as loop
+
+
+def attach_parser(subparsers):
+    """Attach publish subcommand to argument parser"""
+    parser = subparsers.add_parser("publish",
+                                   help="Keep the latest snapshot in shared memory for other nvsmi calls")
+    parser.add_argument("--path", metavar="FILE",
+                        help="segment to write (default: $NVSMI_SHM or /dev/shm/nvsmi)")
+    loop.add_loop_arguments(parser)
+    parser.add_argument("--workers", type=int, default=1, metavar="N",
+                        help="query up to N GPUs concurrently (default: 1)")
+    parser.set_defaults(func=publish_main)
+
+
+def publish_main(args):
+    """Main function for publish command"""
+    from nvsmi.collect import Collector
+    from nvsmi.shm import Publisher, PublisherError
+    interval = loop.interval_from_args(args) or 1.0
+    try:
+        publisher = Publisher(args.path, interval)
+    except (PublisherError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    with publisher, Collector(workers=args.workers, cache_path=nvml.default_cache_path()) as collector:
+        print(f"nvsmi: publishing to {publisher.path} every {interval * 1000:g} ms",
+              file=sys.stderr)
+        loop.run_every(interval, lambda: publisher.publish(collector.snapshot()))
@@ -0,0 +1,35 @@
+import sys
+import nvsmi.nvml as nvml
+import nvsmi.loop as loop
+import nvsmi.shm as shm
+
+
+def attach_parser(subparsers):
+    """Attach record subcommand to argument parser"""
+    parser = subparsers.add_parser("record", help="Record snapshots to a compact binary file")
+    parser.add_argument("-o", "--output", required=True, metavar="FILE",
+                        help="recording to write (replaced if it exists)")
+    loop.add_loop_arguments(parser)
+    parser.add_argument("-c", "--count", type=int, metavar="N",
+                        help="stop after N snapshots")
+    parser.add_argument("--workers", type=int, default=1, metavar="N",
+                        help="query up to N GPUs concurrently (default: 1)")
+    shm.add_shm_arguments(parser)
+    parser.set_defaults(func=record_main)
+
+
+def record_main(args):
+    """Main function for record command"""
+    from nvsmi.record import RecordWriter
+    interval = loop.interval_from_args(args) or 1.0
+    with shm.open_collector(workers=args.workers, cache_path=nvml.default_cache_path(),
+                            interval=interval, shared=not args.no_shm) as collector, \
+            RecordWriter(args.output) as writer:
+        print(f"nvsmi: recording to {args.output} every {interval * 1000:g} ms",
+              file=sys.stderr)
+
+        def sample():
+            writer.write(collector.snapshot())
+            writer.flush()
+
+        loop.run_every(interval, sample, args.count)
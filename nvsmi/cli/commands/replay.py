@@ -0,0 +1,107 @@
+import sys
+import time
+import nvsmi.utils as utils
+
+FORMATS = ("summary", "openmetrics", "query", "xml", "json", "ndjson")
+
+
+def attach_parser(subparsers):
+    """Attach replay subcommand to argument parser"""
+    parser = subparsers.add_parser("replay", help="Replay a recording made with nvsmi record")
+    parser.add_argument("file", metavar="FILE", help="recording to read")
+    parser.add_argument("--start", type=parse_time, metavar="TIME",
+                        help="first snapshot at or after TIME (epoch seconds or ISO 8601)")
+    parser.add_argument("--end", type=parse_time, metavar="TIME",
+                        help="stop before TIME (epoch seconds or ISO 8601)")
+    parser.add_argument("-c", "--count", type=int, metavar="N",
+                        help="show at most N snapshots")
+    parser.add_argument("--format", choices=FORMATS, default="summary",
+                        help="output format (default: summary)")
+    parser.add_argument("--speed", type=float, metavar="FACTOR",
+                        help="pace output like the original run, FACTOR times faster")
+    parser.add_argument("--info", action="store_true",
+                        help="only print the number of snapshots and the time range")
+    parser.set_defaults(func=replay_main)
+
+
+def parse_time(value):
+    """Epoch seconds or an ISO 8601 date/time (local time unless it has an offset)"""
+    import argparse
+    import datetime
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid time: {value!r}")
+
+
+def structured_writer(fmt, out):
+    """Streaming writer for the -q / XML / JSON formats, None for the others"""
+    if fmt == "query":
+        from nvsmi.formatter.text.query import QueryWriter
+        return QueryWriter(out)
+    if fmt == "xml":
+        from nvsmi.formatter.xml.summary import XmlWriter
+        return XmlWriter(out)
+    if fmt == "json":
+        from nvsmi.formatter.json.summary import JsonWriter
+        return JsonWriter(out)
+    if fmt == "ndjson":
+        from nvsmi.formatter.json.summary import NdjsonWriter
+        return NdjsonWriter(out)
+    return None
+
+
+def render(snapshot, fmt):
+    if fmt == "openmetrics":
+        from nvsmi.formatter.openmetrics.summary import format_metrics
+        return format_metrics(snapshot)
+    from nvsmi.formatter.text.summary import format_summary
+    summary = format_summary(
+        driver_version = snapshot.driver_version,
+        cuda_version   = snapshot.cuda_version,
+        gpus           = snapshot.gpus,
+        processes      = snapshot.processes
+    )
+    return f"{utils.get_timestamp(snapshot.timestamp)}\n{summary}\n"
+
+
+def replay_main(args):
+    """Main function for replay command"""
+    from itertools import islice
+    from nvsmi.record import Recording, RecordingError
+    try:
+        recording = Recording(args.file)
+    except (OSError, RecordingError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    with recording:
+        if recording.recovered:
+            print(f"nvsmi: {args.file} was not closed cleanly, "
+                  f"recovered {len(recording)} snapshot(s)", file=sys.stderr)
+        if args.info:
+            print(f"{len(recording)} snapshot(s)")
+            if len(recording):
+                print(f"from {utils.get_timestamp(recording.timestamps[0])}")
+                print(f"to   {utils.get_timestamp(recording.timestamps[-1])}")
+            return
+        out = sys.stdout
+        writer = structured_writer(args.format, out)
+        if writer is not None:
+            from nvsmi.formatter.stream import write_snapshot
+        previous = None
+        try:
+            for snapshot in islice(recording.between(args.start, args.end), args.count):
+                if args.speed and previous is not None:
+                    time.sleep(max(0.0, (snapshot.timestamp - previous) / args.speed))
+                previous = snapshot.timestamp
+                if writer is not None:
+                    write_snapshot(writer, snapshot)
+                    continue
+                out.write(render(snapshot, args.format))
+                out.flush()
+        except (KeyboardInterrupt, BrokenPipeError):
+            pass
@@ -0,0 +1,51 @@
+import sys
+import nvsmi.nvml as nvml
+import nvsmi.loop as loop
+
+
+def attach_parser(subparsers):
+    """Attach serve subcommand to argument parser"""
+    parser = subparsers.add_parser("serve", help="Serve GPU metrics for Prometheus/OpenMetrics")
+    parser.add_argument("--listen", default="0.0.0.0", metavar="ADDR",
+                        help="address to listen on (default: 0.0.0.0)")
+    parser.add_argument("-p", "--port", type=int, default=9400,
+                        help="port to listen on (default: 9400)")
+    loop.add_loop_arguments(parser)
+    parser.add_argument("--workers", type=int, default=1, metavar="N",
+                        help="query up to N GPUs concurrently (default: 1)")
+    parser.add_argument("--window", type=float, default=60.0, metavar="SECONDS",
+                        help="also export min/max/mean/percentiles over the last SECONDS "
+                             "(default: 60, 0 disables)")
+    parser.set_defaults(func=serve_main)
+
+
+def serve_main(args):
+    """Main function for serve command"""
+    import asyncio
+    from nvsmi.collect import Collector
+    from nvsmi.exporter import Sampler, serve
+    from nvsmi.history import History
+    interval = loop.interval_from_args(args) or 1.0
+    history = History.for_window(args.window, interval) if args.window > 0 else None
+
+    def started(server):
+        port = server.sockets[0].getsockname()[1]
+        print(f"nvsmi: serving /metrics and /snapshot on {args.listen}:{port} "
+              f"every {interval * 1000:g} ms", file=sys.stderr)
+
+    with Collector(workers=args.workers, cache_path=nvml.default_cache_path()) as collector:
+        sampler = Sampler(collector, interval, history, args.window)
+        sampler.start()
+        sampler.ready.wait()
+        if sampler.snapshot is None:
+            sampler.stop()
+            sampler.join()
+            print(f"nvsmi serve: first sample failed: {sampler.error}", file=sys.stderr)
+            return 1
+        try:
+            asyncio.run(serve(sampler, args.listen, args.port, started))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sampler.stop()
+            sampler.join()
@@ -1,87 +1,147 @@
-import argparse
+import sys
 import nvsmi.utils as utils
 import nvsmi.nvml as nvml
-from nvsmi.formatter.text.summary import format_summary
-import nvsmi.models.models as models
+import nvsmi.loop as loop
+import nvsmi.shm as shm
 
 def attach_parser(subparsers):
     p = subparsers.add_parser(
         "summary",
         help="show overall GPU summary (default if no subcommand given)"
     )
-    
+    loop.add_loop_arguments(p)
+    p.add_argument("--workers", type=int, default=1, metavar="N",
+                   help="query up to N GPUs and MIG devices concurrently (default: 1)")
+    p.add_argument("--no-cache", action="store_true",
+                   help="do not read or write the on-disk static attribute cache")
+    shm.add_shm_arguments(p)
+    query = p.add_mutually_exclusive_group()
+    query.add_argument("--query-gpu", metavar="FIELDS",
+                       help="print the given GPU fields (e.g. index,memory.used,utilization.gpu)")
+    query.add_argument("--query-compute-apps", metavar="FIELDS",
+                       help="print the given fields for each compute process (e.g. pid,used_memory)")
+    p.add_argument("--window", type=float, metavar="SECONDS",
+                   help="with -l/-lms, also show averages and peaks over the last SECONDS "
+                        "below the table")
+    p.add_argument("--top", type=int, metavar="N",
+                   help="only list the N processes using the most GPU memory, heaviest first")
+    p.add_argument("-q", "--query", action="store_true",
+                   help="display GPU attributes, one per line")
+    p.add_argument("-x", "--xml-format", action="store_true",
+                   help="with -q, produce XML output")
+    p.add_argument("--format", metavar="FORMAT",
+                   help="json, ndjson[,changes] (only changed fields in loop mode), or for "
+                        "--query-gpu/--query-compute-apps csv[,noheader][,nounits] (default: csv)")
+
     # Default no-flags implementation
     p.set_defaults(func=run_summary)
 
-def run_summary(args):
+def print_summary(collector, history=None, window=None, top=None):
+    from nvsmi.formatter.text.summary import format_summary, format_window
+    snap = collector.snapshot()
+    processes = snap.processes
+    if top is not None:
+        from nvsmi.accounting import top as heaviest
+        processes = heaviest(processes, top)
+    summary = format_summary(
+        driver_version = snap.driver_version,
+        cuda_version   = snap.cuda_version,
+        gpus           = snap.gpus,
+        processes      = processes
+    )
+    print(utils.get_timestamp())
+    if history is not None:
+        history.record(snap)
+        summary += "\n" + format_window(history, window, snap.gpus)
+    print(summary, flush=True)
+
+def run_query(args, interval, cache_path):
+    """--query-gpu / --query-compute-apps: stream CSV rows from a compiled plan"""
+    from nvsmi.query import GpuQuery, AppsQuery
+    from nvsmi.formatter.csv.query import format_header, format_row
+    kind, *options = (args.format or "csv").split(",")
+    if kind != "csv":
+        raise ValueError(f"unsupported query format: {kind}")
+    units = "nounits" not in options
+    query = GpuQuery(args.query_gpu) if args.query_gpu else AppsQuery(args.query_compute_apps)
+
     nvml.initialize()
     try:
-        # --- versions ---
-        drv_ver = nvml.get_driver_version()       # e.g. "515.65.01"
-        cuda_ver = utils.get_cuda_via_runtime()   # e.g. "11.7"
-        
-        # --- per-GPU stats ---
-        gpus = []
-        count = nvml.get_device_count()
-        for idx in range(count):
-            h = nvml.get_device_handle_by_index(idx)
-            name = nvml.get_device_name(h)
-            bus_id = nvml.get_device_pci_info(h).busId
-            mem = nvml.get_device_memory_info(h)                   # has .used, .total in bytes
-            util = nvml.get_device_utilization_rates(h)            # has .gpu (%)
-            temp = nvml.get_device_temperature(h, nvml.NVML_TEMPERATURE_GPU)                  # GPU temp in °C
-            power = nvml.get_device_power_usage(h) / 1000         # mW → W
-            fan   = nvml.get_device_fan_speed(h)                   # %
-            
-            gpus.append(models.GPUInfo(
-                index     = idx,
-                name      = name,
-                fan       = fan,
-                bus_id    = bus_id,
-                temp      = temp,
-                power     = int(power),
-                mem_used  = int(utils.bytes_to_mib(mem.used)),
-                mem_total = int(utils.bytes_to_mib(mem.total)),
-                util      = util.gpu
-            ))
-        
-        # --- process list ---
-        processes = []
-        for idx in range(count):
-            h = nvml.get_device_handle_by_index(idx)
-            for p in nvml.get_device_compute_running_processes(h):
-                # list_processes should return objects with .pid, .usedGpuMemory, .type ('C'/'G')
-                proc_name = utils.get_process_name(p.pid)
-                mem_mb    = int(utils.bytes_to_mib(p.usedGpuMemory))
-                processes.append(models.ProcessInfo(
-                    gpu       = idx,
-                    pid       = p.pid,
-                    type      = "C",
-                    name      = proc_name,
-                    mem_usage = f"{mem_mb}MiB"
-                ))
-            for p in nvml.get_device_graphics_running_processes(h):                
-                # list_processes should return objects with .pid, .usedGpuMemory, .type ('C'/'G')
-                proc_name = utils.get_process_name(p.pid)
-                mem_mb    = int(utils.bytes_to_mib(p.usedGpuMemory))
-                processes.append(models.ProcessInfo(
-                    gpu       = idx,
-                    pid       = p.pid,
-                    type      = "G",
-                    name      = proc_name,
-                    mem_usage = f"{mem_mb}MiB"
-                ))
-        
-        print(f"processes: {processes}")
-        # --- print it all ---
-        summary = format_summary(
-            driver_version = drv_ver,
-            cuda_version   = cuda_ver,
-            gpus           = gpus,
-            processes      = processes
-        )
-        print(summary)
-    except Exception as e:
-        print(f"Error: {e}")
+        driver_version = nvml.get_driver_version()
+        handles = [nvml.get_device_handle_by_index(i) for i in range(nvml.get_device_count())]
+        static = nvml.StaticCache(cache_path)
+        static.load(driver_version)
+        query.bind(handles, static)
+
+        out = sys.stdout
+        if "noheader" not in options:
+            out.write(format_header(query.columns) + "\n")
+
+        def emit():
+            for values in query.rows(driver_version):
+                out.write(format_row(query.columns, values, units) + "\n")
+            out.flush()
+
+        if interval is None:
+            emit()
+        else:
+            loop.run_every(interval, emit)
+        static.save()
     finally:
         nvml.shutdown()
+
+def structured_writer(args, out):
+    """The streaming writer selected by -q, -x and --format, or None for the table"""
+    kind, *options = (args.format or "").split(",")
+    if args.xml_format:
+        from nvsmi.formatter.xml.summary import XmlWriter
+        return XmlWriter(out)
+    if args.query:
+        from nvsmi.formatter.text.query import QueryWriter
+        return QueryWriter(out)
+    if kind == "json":
+        from nvsmi.formatter.json.summary import JsonWriter
+        return JsonWriter(out)
+    if kind == "ndjson":
+        from nvsmi.formatter.json.summary import NdjsonWriter
+        return NdjsonWriter(out, changes="changes" in options)
+    if kind:
+        raise ValueError(f"unsupported format: {kind}")
+    return None
+
+def run_summary(args):
+    # The collection stack is imported by open_collector, so `summary --help`
+    # does not load it; with a fresh published segment NVML is never loaded
+    try:
+        interval = loop.interval_from_args(args)
+        # One NVML session and one set of handles for the whole run,
+        # however many times we loop.
+        cache_path = None if args.no_cache else nvml.default_cache_path()
+        if args.window is not None and interval is None:
+            raise ValueError("--window needs -l or -lms")
+        if args.window is not None and (args.query_gpu or args.query_compute_apps
+                                        or args.query or args.xml_format or args.format):
+            raise ValueError("--window only applies to the summary table")
+        if args.query_gpu or args.query_compute_apps:
+            return run_query(args, interval, cache_path)
+        writer = structured_writer(args, sys.stdout)
+        with shm.open_collector(workers=args.workers, cache_path=cache_path, interval=interval,
+                                shared=not args.no_shm) as collector:
+            if writer is not None:
+                from nvsmi.formatter.stream import write_collected
+                sample = lambda: write_collected(writer, collector)
+                if interval is None:
+                    sample()
+                else:
+                    loop.run_every(interval, sample)
+            elif interval is None:
+                print_summary(collector, top=args.top)
+            elif args.window:
+                from nvsmi.history import History
+                history = History.for_window(args.window, interval)
+                loop.run_every(interval, lambda: print_summary(collector, history, args.window, args.top))
+            else:
+                loop.run_every(interval, lambda: print_summary(collector, top=args.top))
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
@@ -0,0 +1,44 @@
+import nvsmi.nvml as nvml
+
+# -p2p choices -> caption
+P2P_NAMES = {"r": "Read", "w": "Write", "n": "NVLink", "a": "Atomics", "p": "PCIe"}
+
+
+def attach_parser(subparsers):
+    """Attach topo subcommand to argument parser"""
+    parser = subparsers.add_parser("topo", help="Display topology information about the system")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("-m", "--matrix", action="store_true",
+                      help="Display the GPUDirect communication matrix for the system")
+    mode.add_argument("-p2p", "--p2pstatus", choices=P2P_NAMES, metavar="CAPS",
+                      help="Display P2P status for one of r (read), w (write), n (NVLink), "
+                           "a (atomics), p (PCIe)")
+    parser.add_argument("--workers", type=int, default=8, metavar="N",
+                        help="probe up to N GPU pairs concurrently (default: 8)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="probe again instead of using the cached topology")
+    parser.set_defaults(func=topo_main)
+
+
+def topo_main(args):
+    """Main function for topo command"""
+    import nvsmi.topo as topo
+    from nvsmi.formatter.text.topo import format_matrix, format_p2p
+    nvml.initialize()
+    try:
+        # Topology is static: probe once per boot and driver load
+        static = nvml.StaticCache(None if args.no_cache else nvml.default_cache_path())
+        static.load(nvml.get_driver_version())
+        handles = [nvml.get_device_handle_by_index(i) for i in range(nvml.get_device_count())]
+        if args.matrix:
+            infos = [static.device(i, h) for i, h in enumerate(handles)]
+            result = static.lookup(topo.cache_name(infos), lambda: topo.probe(handles, infos, args.workers),
+                                   replaces="topology")
+            print(format_matrix(result))
+        else:
+            result = static.lookup(f"p2p_{args.p2pstatus}",
+                                   lambda: topo.p2p_matrix(handles, args.p2pstatus, args.workers))
+            print(format_p2p(result, P2P_NAMES[args.p2pstatus]))
+        static.save()
+    finally:
+        nvml.shutdown()
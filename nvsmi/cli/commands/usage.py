@@ -0,0 +1,55 @@
+import sys
+import nvsmi.nvml as nvml
+import nvsmi.loop as loop
+import nvsmi.shm as shm
+
+# nvsmi.accounting.GROUPS, repeated so that --help does not import it
+GROUPS = ("user", "container", "pod", "process")
+
+
+def attach_parser(subparsers):
+    """Attach usage subcommand to argument parser"""
+    parser = subparsers.add_parser("usage", help="GPU memory per user, container, pod or process")
+    parser.add_argument("-b", "--by", choices=GROUPS, default="user",
+                        help="what to account GPU memory to (default: user)")
+    parser.add_argument("--top", type=int, metavar="N",
+                        help="only show the N heaviest entries")
+    parser.add_argument("--format", choices=("text", "json"), default="text",
+                        help="output format (default: text)")
+    loop.add_loop_arguments(parser)
+    parser.add_argument("--workers", type=int, default=1, metavar="N",
+                        help="query up to N GPUs concurrently (default: 1)")
+    shm.add_shm_arguments(parser)
+    parser.set_defaults(func=usage_main)
+
+
+def usage_main(args):
+    """Main function for usage command"""
+    from nvsmi.accounting import aggregate, top
+    from nvsmi.proc import ProcessCache
+    if args.format == "json":
+        from nvsmi.formatter.json.usage import format_usage
+    else:
+        from nvsmi.formatter.text.usage import format_usage
+    interval = loop.interval_from_args(args)
+    # Owners are cached across loop iterations, like process names
+    owners = ProcessCache()
+    # Text tables are separated by a blank line, JSON documents are one per line
+    end = "\n" if args.format == "json" else "\n\n"
+    try:
+        with shm.open_collector(workers=args.workers, cache_path=nvml.default_cache_path(),
+                                interval=interval, shared=not args.no_shm) as collector:
+
+            def sample():
+                snap = collector.snapshot()
+                usages = aggregate(snap.processes, owners.owners(p.pid for p in snap.processes), args.by)
+                print(format_usage(top(usages, args.top), args.by, len(usages), snap.timestamp),
+                      end=end, flush=True)
+
+            if interval is None:
+                sample()
+            else:
+                loop.run_every(interval, sample)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
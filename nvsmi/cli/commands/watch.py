@@ -0,0 +1,151 @@
+import os
+import sys
+import time
+import nvsmi.nvml as nvml
+import nvsmi.loop as loop
+import nvsmi.shm as shm
+import nvsmi.utils as utils
+
+# Process sort orders: key function on ProcessInfo
+SORTS = {
+    "gpu":    lambda p: (p.gpu, p.pid),
+    "pid":    lambda p: p.pid,
+    "memory": lambda p: p.used_memory or 0,
+    "name":   lambda p: p.name or "",
+}
+
+KEYS = "[s]ort [r]everse [n]ext/[p]rev page [q]uit"
+PAGE_DOWN, PAGE_UP = "\x1b[6~", "\x1b[5~"
+
+
+def attach_parser(subparsers):
+    """Attach watch subcommand to argument parser"""
+    parser = subparsers.add_parser("watch", help="Full-screen summary that refreshes in place")
+    loop.add_loop_arguments(parser)
+    parser.add_argument("--sort", choices=SORTS, default="gpu",
+                        help="initial process sort order (default: gpu)")
+    parser.add_argument("--workers", type=int, default=1, metavar="N",
+                        help="query up to N GPUs concurrently (default: 1)")
+    shm.add_shm_arguments(parser)
+    parser.set_defaults(func=watch_main)
+
+
+class Terminal:
+    """
+    Alternate screen, hidden cursor and unbuffered key input for the
+    duration of a `with` block; the terminal is restored on exit.
+    """
+
+    def __init__(self, out=sys.stdout, fd=None):
+        self.out = out
+        self.fd = sys.stdin.fileno() if fd is None else fd
+
+    def __enter__(self):
+        import termios
+        import tty
+        self.saved = termios.tcgetattr(self.fd)
+        tty.setcbreak(self.fd)
+        self.out.write("\x1b[?1049h\x1b[?25l")
+        self.out.flush()
+        return self
+
+    def __exit__(self, *exc):
+        import termios
+        self.out.write("\x1b[?25h\x1b[?1049l")
+        self.out.flush()
+        termios.tcsetattr(self.fd, termios.TCSADRAIN, self.saved)
+
+    def size(self):
+        size = os.get_terminal_size(self.out.fileno())
+        return size.columns, size.lines
+
+    def read_key(self, timeout):
+        """A key (or escape sequence) typed within timeout seconds, else None"""
+        import select
+        ready, _, _ = select.select([self.fd], [], [], max(0.0, timeout))
+        if not ready:
+            return None
+        return os.read(self.fd, 32).decode(errors="replace")
+
+
+class View:
+    """Sort order and page of the process section, changed by keys"""
+
+    def __init__(self, sort):
+        self.sort = sort
+        self.reverse = False
+        self.page = 0
+        self.pages = 1
+
+    def handle(self, key):
+        """Apply a key; return False to quit"""
+        if key in ("q", "Q"):
+            return False
+        if key == "s":
+            names = list(SORTS)
+            self.sort = names[(names.index(self.sort) + 1) % len(names)]
+        elif key == "r":
+            self.reverse = not self.reverse
+        elif key in ("n", " ", PAGE_DOWN):
+            self.page = min(self.page + 1, self.pages - 1)
+        elif key in ("p", PAGE_UP):
+            self.page = max(self.page - 1, 0)
+        return True
+
+    def frame(self, snap, rows):
+        """Frame lines for a terminal `rows` high"""
+        from nvsmi.formatter.text.summary import format_summary
+
+        def table(processes):
+            return format_summary(
+                driver_version = snap.driver_version,
+                cuda_version   = snap.cuda_version,
+                gpus           = snap.gpus,
+                processes      = processes
+            ).split("\n")
+
+        # Rows left for processes once the GPU table, timestamp and status
+        # line are drawn ("No running processes found" takes one row)
+        per_page = max(1, rows - len(table([])) - 1)
+        processes = sorted(snap.processes, key=SORTS[self.sort], reverse=self.reverse)
+        self.pages = max(1, -(-len(processes) // per_page))
+        self.page = min(self.page, self.pages - 1)
+        first = self.page * per_page
+        lines = [utils.get_timestamp(snap.timestamp)] + table(processes[first:first + per_page])
+        order = "desc" if self.reverse else "asc"
+        status = (f" sort: {self.sort} {order}  page {self.page + 1}/{self.pages}  "
+                  f"({len(processes)} processes)  {KEYS}")
+        # Status line pinned to the last row
+        return lines[:rows - 1] + [""] * (rows - 1 - len(lines)) + [status]
+
+
+def watch_main(args):
+    """Main function for watch command"""
+    from nvsmi.formatter.text.screen import Screen
+    if not (sys.stdin.isatty() and sys.stdout.isatty()):
+        print("Error: watch needs an interactive terminal", file=sys.stderr)
+        return 1
+    interval = loop.interval_from_args(args) or 1.0
+    view = View(args.sort)
+    with shm.open_collector(workers=args.workers, cache_path=nvml.default_cache_path(),
+                            interval=interval, shared=not args.no_shm) as collector, \
+            Terminal() as term:
+        screen = Screen(sys.stdout, *term.size())
+        next_sample = time.monotonic()
+        snap = None
+        try:
+            while True:
+                now = time.monotonic()
+                if now >= next_sample:
+                    snap = collector.snapshot()
+                    # Stay on the interval grid, skipping ticks we overran
+                    next_sample += interval * (int((now - next_sample) // interval) + 1)
+                size = term.size()
+                if size != (screen.cols, screen.rows):
+                    screen.resize(*size)
+                screen.render(view.frame(snap, screen.rows))
+                key = term.read_key(next_sample - time.monotonic())
+                if key is not None and not view.handle(key):
+                    break
+        except KeyboardInterrupt:
+            pass
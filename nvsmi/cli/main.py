@@ -1,27 +1,77 @@
 import argparse
-from nvsmi.cli.commands import summary, nvlink
+import importlib
+import sys
+
+# Subcommands are registered lazily: only the module of the command being
+# run is imported, so `--help` and light commands never load NVML, psutil
+# or the modules of other commands.
+COMMANDS = {
+    # name       module                          help
+    "summary": ("nvsmi.cli.commands.summary", "show overall GPU summary (default if no subcommand given)"),
+    "nvlink":  ("nvsmi.cli.commands.nvlink",  "Display nvlink status"),
+    "dmon":    ("nvsmi.cli.commands.dmon",    "Monitor devices, one line per GPU per interval"),
+    "pmon":    ("nvsmi.cli.commands.pmon",    "Monitor per-process GPU utilization"),
+    "record":  ("nvsmi.cli.commands.record",  "Record snapshots to a compact binary file"),
+    "replay":  ("nvsmi.cli.commands.replay",  "Replay a recording made with nvsmi record"),
+    "watch":   ("nvsmi.cli.commands.watch",   "Full-screen summary that refreshes in place"),
+    "topo":    ("nvsmi.cli.commands.topo",    "Display topology information about the system"),
+    "events":  ("nvsmi.cli.commands.events",  "Wait for and print GPU events (Xid, clocks, processes)"),
+    "serve":   ("nvsmi.cli.commands.serve",   "Serve GPU metrics for Prometheus/OpenMetrics"),
+    "cluster": ("nvsmi.cli.commands.cluster", "Query `nvsmi serve` agents on many hosts at once"),
+    "usage":   ("nvsmi.cli.commands.usage",   "GPU memory per user, container, pod or process"),
+    "publish": ("nvsmi.cli.commands.publish", "Keep the latest snapshot in shared memory for other nvsmi calls"),
+}
+DEFAULT_COMMAND = "summary"
+
+
+def find_command(argv):
+    """Return the subcommand named in argv, or None"""
+    return next((a for a in argv if a in COMMANDS), None)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # --profile is accepted before or after the subcommand
+    profiling = "--profile" in argv
+    if profiling:
+        argv.remove("--profile")
+    cmd = find_command(argv)
+    if cmd is None and not {"-h", "--help"} & set(argv):
+        cmd = DEFAULT_COMMAND
+        argv.insert(0, cmd)
 
-def main():
     p = argparse.ArgumentParser(prog="nvidia-smi")
+    p.add_argument("--profile", action="store_true",
+                   help="after the command, print NVML call counts, latencies and errors to stderr")
 
     # # --- global args (id, filename, loop, etc.) ---
     # parser.add_argument("-i", "--id", help="GPU index/UUID")
     # parser.add_argument("-f", "--filename", help="output file")
-    # parser.add_argument("-l", "--loop", type=int, help="loop interval (s)")
     # parser.add_argument("-q", "--query", action="store_true",
     #                     help="full GPU attribute dump")
     # parser.add_argument("-d", "--display", help="selective fields",
     #                     choices=[...])
 
     subs = p.add_subparsers(dest="cmd", required=True)
-    summary.attach_parser(subs)
-    nvlink.attach_parser(subs)
+    for name, (module, help) in COMMANDS.items():
+        if name == cmd:
+            importlib.import_module(module).attach_parser(subs)
+        else:
+            subs.add_parser(name, help=help)
     # TODO: add other subcommands
-    # - topo, c2c, drain, clocks, vgpu, mig, boost-slider
+    # - c2c, drain, clocks, vgpu, mig, boost-slider
     # - power-hint, conf-compute, power-smoothing, power-profiles, encodersessions
 
-    args = p.parse_args()
-    args.func(args)
+    args = p.parse_args(argv)
+    if not profiling:
+        return args.func(args)
+
+    import nvsmi.profile as profile
+    profile.enable()
+    try:
+        return args.func(args)
+    finally:
+        print(profile.disable().report(), file=sys.stderr)
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
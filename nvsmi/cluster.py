@@ -0,0 +1,164 @@
+"""
+Fleet-wide queries for `nvsmi cluster`.
+
+Every host runs `nvsmi serve`, which keeps its latest snapshot rendered
+as JSON at /snapshot. Fleet.query() fetches all of them concurrently on
+one asyncio loop: at most `concurrency` requests are in flight, each
+host gets `timeout` seconds, and every host keeps one persistent
+HTTP/1.1 connection that is reused by the next query (in loop mode) and
+re-established when the agent closed it.
+"""
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+from nvsmi.formatter.json.summary import parse_snapshot
+from nvsmi.models.models import Snapshot
+
+DEFAULT_PORT = 9400
+MAX_HEADER = 16384
+
+
+class AgentError(Exception):
+    """The agent answered, but not with a snapshot"""
+
+
+@dataclass
+class HostResult:
+    """
+    Outcome of querying one host.
+
+    Attributes:
+        host:     Host as given ("name" or "name:port")
+        snapshot: The host's latest Snapshot, None if the query failed
+        error:    Why the query failed, None if it succeeded
+        elapsed:  Seconds the query took
+    """
+    host: str
+    snapshot: Optional[Snapshot]
+    error: Optional[str]
+    elapsed: float
+
+
+def parse_hosts(text: str) -> List[str]:
+    """Hosts from a comma, whitespace or newline separated list; '#' starts a comment"""
+    hosts = []
+    for line in text.splitlines():
+        hosts += line.split("#", 1)[0].replace(",", " ").split()
+    return hosts
+
+
+def split_host(host: str):
+    """'name[:port]' or '[v6addr]:port' -> (name, port)"""
+    if host.startswith("["):
+        name, _, port = host[1:].partition("]")
+        return name, int(port.lstrip(":") or DEFAULT_PORT)
+    name, sep, port = host.rpartition(":")
+    if not sep or ":" in name:          # no port, or a bare IPv6 address
+        return host, DEFAULT_PORT
+    return name, int(port)
+
+
+class AgentClient:
+    """One persistent HTTP/1.1 connection to the agent on `host`"""
+
+    def __init__(self, host: str):
+        self.host = host
+        self.name, self.port = split_host(host)
+        self.reader = self.writer = None
+
+    async def _connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.name, self.port)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+    async def _request(self, path):
+        self.writer.write(f"GET {path} HTTP/1.1\r\nHost: {self.name}\r\n\r\n".encode())
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        if len(head) > MAX_HEADER:
+            raise AgentError("response header too large")
+        lines = head.decode("latin-1").split("\r\n")
+        status = lines[0].split(" ", 2)
+        length = None
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-length":
+                if not value.strip().isdigit():
+                    raise AgentError(f"bad Content-Length: {value.strip()!r}")
+                length = int(value)
+        if length is None:
+            raise AgentError("response without Content-Length")
+        body = await self.reader.readexactly(length)
+        if len(status) < 2 or status[1] != "200":
+            raise AgentError(" ".join(status[1:]) or "bad response")
+        return body
+
+    async def get(self, path):
+        """Body of GET path, on the kept-alive connection when there is one"""
+        if self.writer is not None:
+            try:
+                return await self._request(path)
+            except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                # The agent closed the idle connection: reconnect once
+                self.close()
+        await self._connect()
+        try:
+            return await self._request(path)
+        except BaseException:
+            self.close()
+            raise
+
+
+class Fleet:
+    """
+    Agents on `hosts`, queried `concurrency` at a time with a per-host
+    `timeout` in seconds. Use as an async context manager, or call close().
+    """
+
+    def __init__(self, hosts: List[str], timeout=2.0, concurrency=64):
+        self.clients = [AgentClient(h) for h in hosts]
+        self.timeout = timeout
+        self.limit = asyncio.Semaphore(concurrency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for client in self.clients:
+            client.close()
+
+    async def _query(self, client: AgentClient) -> HostResult:
+        async with self.limit:
+            start = time.monotonic()
+            snapshot = None
+            try:
+                body = await asyncio.wait_for(client.get("/snapshot"), self.timeout)
+                snapshot = parse_snapshot(json.loads(body))
+                return HostResult(client.host, snapshot, None, time.monotonic() - start)
+            except asyncio.TimeoutError:
+                error = f"timed out after {self.timeout:g} s"
+            except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, AgentError) as e:
+                error = str(e) or type(e).__name__
+            except (ValueError, KeyError, TypeError) as e:
+                error = f"bad snapshot: {e}"
+            finally:
+                # Whatever went wrong, the connection may be mid-response: never reuse it
+                if snapshot is None:
+                    client.close()
+            return HostResult(client.host, None, error, time.monotonic() - start)
+
+    def results(self):
+        """HostResults as each host answers or fails (an iterator of awaitables)"""
+        return asyncio.as_completed([self._query(c) for c in self.clients])
+
+    async def query(self) -> List[HostResult]:
+        """One HostResult per host, in the order hosts were given"""
+        return await asyncio.gather(*(self._query(c) for c in self.clients))
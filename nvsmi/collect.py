@@ -0,0 +1,212 @@
+"""
+Snapshot collection over a single, long-lived NVML session.
+"""
+
+import time
+import nvsmi.utils as utils
+import nvsmi.nvml as nvml
+import nvsmi.models.models as models
+from nvsmi.mig import MAX_MIG_DEVICES, MigMap, instance_id
+from nvsmi.proc import ProcessCache
+
+
+class Collector:
+    """
+    Owns an NVML session and the device handles for its lifetime.
+
+    Creating a Collector initializes NVML and looks up every handle and
+    the static device attributes once; snapshot() can then be called
+    repeatedly and only queries dynamic metrics. With a cache_path the
+    static attributes are shared between invocations (see
+    nvml.StaticCache). Use as a context manager, or call close() to shut
+    NVML down.
+
+    With workers > 1 devices, and the MIG devices of MIG-enabled GPUs,
+    are collected concurrently on a bounded thread pool (ctypes releases
+    the GIL for the duration of each NVML call); results are always
+    returned in device-index order. The MIG layout is discovered once
+    (see nvsmi.mig.MigMap).
+    """
+
+    def __init__(self, batch_fields=True, workers=1, cache_path=None):
+        nvml.initialize()
+        self.executor = None
+        try:
+            self.driver_version = nvml.get_driver_version()   # e.g. "515.65.01"
+            # Static attributes: queried once, or read from cache_path
+            self.static = nvml.StaticCache(cache_path)
+            self.static.load(self.driver_version)
+            self.cuda_version = self.static.lookup(                # e.g. "11.7"
+                "cuda_version", lambda: utils.get_cuda_version(self.driver_version))
+            count = nvml.get_device_count()
+            self.handles = [nvml.get_device_handle_by_index(i) for i in range(count)]
+            for idx, h in enumerate(self.handles):
+                self.static.device(idx, h)
+            self.static.save()
+            # One reusable field-value batch per device
+            self.readers = [nvml.FieldReader(h, nvml.SUMMARY_FIELDS, batch=batch_fields)
+                            for h in self.handles]
+            # Threads are only started as tasks need them, so MIG-less GPUs cost none
+            workers = min(workers, len(self.handles) * (1 + MAX_MIG_DEVICES))
+            self.map = map
+            if workers > 1:
+                from concurrent.futures import ThreadPoolExecutor
+                self.executor = ThreadPoolExecutor(workers, thread_name_prefix="nvsmi")
+                self.map = self.executor.map
+            self.mig = MigMap(self.handles, self.map)
+        except Exception:
+            if self.executor is not None:
+                self.executor.shutdown()
+            nvml.shutdown()
+            raise
+        # Process names live as long as the collector, across snapshots
+        self.process_cache = ProcessCache()
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+        self.static.save()
+        nvml.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def device_count(self):
+        return len(self.handles)
+
+    def collect_gpu(self, idx):
+        h = self.handles[idx]
+        static = self.static.device(idx, h)
+        m = self.readers[idx].read()
+        mem = m["memory"]                                      # has .used, .total in bytes
+        power = m["power"]                                     # mW
+
+        return models.GPUInfo(
+            index     = idx,
+            name      = static.name,
+            fan       = m["fan"],                              # %
+            bus_id    = static.bus_id,
+            temp      = m["temp"],                             # GPU temp in °C
+            power     = None if power is None else power // 1000,  # mW → W
+            mem_used  = int(utils.bytes_to_mib(mem.used)),
+            mem_total = int(utils.bytes_to_mib(mem.total)),
+            util      = None if m["util"] is None else m["util"].gpu,
+            power_limit = static.power_limit
+        )
+
+    def collect_processes(self, idx):
+        h = self.handles[idx]
+        processes = []
+        for type_, procs in (("C", nvml.get_device_compute_running_processes(h)),
+                             ("G", nvml.get_device_graphics_running_processes(h))):
+            for p in procs:
+                # list_processes should return objects with .pid, .usedGpuMemory
+                processes.append(models.ProcessInfo(
+                    gpu         = idx,
+                    pid         = p.pid,
+                    type        = type_,
+                    name        = None,   # resolved per snapshot, in bulk
+                    used_memory = p.usedGpuMemory,  # bytes, None if not available
+                    # Older process structs have no instance IDs
+                    gpu_instance     = instance_id(getattr(p, "gpuInstanceId", None)),
+                    compute_instance = instance_id(getattr(p, "computeInstanceId", None)),
+                ))
+        return processes
+
+    def collect_device(self, idx):
+        """
+        Collect one device's GPUInfo and processes in a single pass.
+
+        Errors do not propagate: they are recorded on the returned GPUInfo
+        so that one bad device cannot abort the whole snapshot.
+        """
+        try:
+            gpu = self.collect_gpu(idx)
+        except Exception as e:
+            if nvml.is_gpu_lost(e):
+                # Re-read static attributes and the MIG layout once the GPU is back
+                self.static.invalidate(idx)
+                self.mig.invalidate(idx)
+            return models.GPUInfo.unavailable(idx, str(e)), []
+        try:
+            processes = self.collect_processes(idx)
+        except Exception as e:
+            gpu.error = f"process list: {e}"
+            processes = []
+        return gpu, processes
+
+    def collect_mig(self, idx, instance):
+        """MigInfo for one MIG device of GPU idx; errors are recorded on it"""
+        info = models.MigInfo(
+            index            = instance.index,
+            gpu_instance     = instance.gpu_instance,
+            compute_instance = instance.compute_instance,
+            profile          = instance.profile,
+            uuid             = instance.uuid,
+        )
+        try:
+            m = instance.reader.read()
+            info.mem_used = int(utils.bytes_to_mib(m["memory"].used))
+            info.mem_total = int(utils.bytes_to_mib(m["memory"].total))
+        except Exception as e:
+            if isinstance(e, nvml.pynvml.NVMLError):
+                # Most likely reconfigured: walk the GPU again next time
+                self.mig.invalidate(idx)
+            info.error = str(e)
+            return info
+        info.util = None if m["util"] is None else m["util"].gpu
+        return info
+
+    def _collect(self):
+        """
+        Yield (GPUInfo, processes) for every device in index order, each
+        as soon as it and its MIG devices have been collected. Every
+        device and MIG device is a separate task, so that with workers
+        they are all queried concurrently.
+        """
+        self.mig.refresh(self.map)
+        tasks = []
+        for idx in range(len(self.handles)):
+            tasks.append((self.collect_device, idx))
+            tasks += [(self.collect_mig, idx, instance) for instance in self.mig.instances[idx]]
+        run = lambda task: task[0](*task[1:])
+        results = self.map(run, tasks)
+        for idx in range(len(self.handles)):
+            gpu, processes = next(results)
+            mig = [next(results) for _ in self.mig.instances[idx]]
+            if gpu.name:
+                gpu.mig_mode, gpu.mig = self.mig.modes[idx], mig
+                self.mig.check(idx, processes)
+            yield gpu, processes
+
+    def devices(self):
+        """
+        Yield (GPUInfo, processes) for every device in index order, each
+        as soon as it has been collected, with process names resolved.
+        """
+        for gpu, processes in self._collect():
+            names = self.process_cache.names(p.pid for p in processes)
+            for p in processes:
+                p.name = names[p.pid]
+            yield gpu, processes
+
+    def snapshot(self):
+        """Collect GPU and process information for every device"""
+        gpus, processes = [], []
+        for gpu, procs in self._collect():
+            gpus.append(gpu)
+            processes.extend(procs)
+        names = self.process_cache.names(p.pid for p in processes)
+        for p in processes:
+            p.name = names[p.pid]
+        return models.Snapshot(
+            timestamp      = time.time(),
+            driver_version = self.driver_version,
+            cuda_version   = self.cuda_version,
+            gpus           = gpus,
+            processes      = processes
+        )
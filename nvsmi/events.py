@@ -0,0 +1,160 @@
+"""
+Event-driven GPU monitoring over NVML event sets.
+
+EventListener registers the requested event types on every device and
+blocks in nvmlEventSetWait, so an idle listener costs no CPU between
+events. NVML has no events for processes starting or exiting; when
+'process' is requested the running-process lists are diffed each time a
+wait times out, i.e. every `process_interval` seconds.
+"""
+
+import collections
+import time
+from typing import Iterator, Optional
+import nvsmi.nvml as nvml
+from nvsmi.models.models import Event
+from nvsmi.proc import ProcessCache
+
+# Event kind -> nvmlEventType* name
+EVENT_TYPES = {
+    "xid":    "nvmlEventTypeXidCriticalError",
+    "clock":  "nvmlEventTypeClock",
+    "power":  "nvmlEventTypePowerSourceChange",
+    "pstate": "nvmlEventTypePState",
+    "sbe":    "nvmlEventTypeSingleBitEccError",
+    "dbe":    "nvmlEventTypeDoubleBitEccError",
+}
+PROCESS = "process"
+DEFAULT_KINDS = ("xid", "clock", "power", PROCESS)
+
+# Longest single nvmlEventSetWait: the call cannot be interrupted, so this
+# bounds how late Ctrl-C and close() take effect.
+MAX_WAIT = 1.0
+
+_NO_INSTANCE = 0xFFFFFFFF
+
+
+class EventListener:
+    """
+    Owns an NVML session and an event set for its lifetime.
+
+    `kinds` are EVENT_TYPES keys and/or 'process'; `indices` selects GPUs
+    (default all). Kinds a device cannot report are skipped and listed
+    in `unsupported` ({index: [kind, ...]}). Use as a context manager, or
+    call close().
+    """
+
+    def __init__(self, kinds=DEFAULT_KINDS, indices=None, process_interval=1.0):
+        unknown = set(kinds) - set(EVENT_TYPES) - {PROCESS}
+        if unknown:
+            raise ValueError(f"unknown event type(s): {', '.join(sorted(unknown))}")
+        nvml.initialize()
+        try:
+            count = nvml.get_device_count()
+            self.indices = list(range(count)) if indices is None else list(indices)
+            self.handles = {i: nvml.get_device_handle_by_index(i) for i in self.indices}
+            self.event_set = nvml.create_event_set()
+            masks = {kind: nvml.event_type(EVENT_TYPES[kind]) for kind in kinds if kind in EVENT_TYPES}
+            self.kinds = {mask: kind for kind, mask in masks.items()}
+            self.unsupported = {}
+            for index, handle in self.handles.items():
+                self._register(index, handle, masks)
+        except Exception:
+            nvml.shutdown()
+            raise
+        self.process_interval = process_interval if PROCESS in kinds else None
+        self.processes = {i: self._pids(h) for i, h in self.handles.items()} if self.process_interval else {}
+        self.process_cache = ProcessCache()
+        self.pending = collections.deque()
+        self.next_process_check = time.monotonic() + (self.process_interval or 0)
+
+    def _register(self, index, handle, masks):
+        try:
+            supported = nvml.get_device_supported_event_types(handle)
+        except nvml.pynvml.NVMLError:
+            supported = 0
+        wanted = 0
+        for kind, mask in masks.items():
+            if supported & mask:
+                wanted |= mask
+            else:
+                self.unsupported.setdefault(index, []).append(kind)
+        if wanted:
+            nvml.register_device_events(handle, wanted, self.event_set)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        nvml.free_event_set(self.event_set)
+        nvml.shutdown()
+
+    @staticmethod
+    def _pids(handle):
+        try:
+            procs = nvml.get_device_compute_running_processes(handle)
+            procs += nvml.get_device_graphics_running_processes(handle)
+        except nvml.pynvml.NVMLError:
+            return None
+        return {p.pid for p in procs}
+
+    def _check_processes(self):
+        now = time.time()
+        for index, handle in self.handles.items():
+            pids = self._pids(handle)
+            known = self.processes.get(index)
+            if pids is None or known is None:
+                self.processes[index] = pids
+                continue
+            started = sorted(pids - known)
+            names = self.process_cache.names(started)
+            for pid in started:
+                self.pending.append(Event(now, index, "process_start", pid, detail=names[pid]))
+            for pid in sorted(known - pids):
+                self.pending.append(Event(now, index, "process_exit", pid))
+            self.processes[index] = pids
+
+    def _convert(self, data) -> Event:
+        index = nvml.get_device_index(data.device)
+        kind = self.kinds.get(data.eventType, f"0x{data.eventType:x}")
+        detail = None
+        if kind == "clock":
+            handle = self.handles.get(index, data.device)
+            try:
+                detail = (f"graphics {nvml.get_device_clock_info(handle, nvml.NVML_CLOCK_SM)} MHz, "
+                          f"memory {nvml.get_device_clock_info(handle, nvml.NVML_CLOCK_MEM)} MHz")
+            except nvml.pynvml.NVMLError:
+                pass
+
+        def instance(value):
+            return None if value == _NO_INSTANCE else value
+        return Event(time.time(), index, kind, data.eventData,
+                     instance(data.gpuInstanceId), instance(data.computeInstanceId), detail)
+
+    def wait(self, timeout: Optional[float] = None) -> Optional[Event]:
+        """The next event, or None if `timeout` seconds pass without one"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.pending:
+            now = time.monotonic()
+            if self.process_interval and now >= self.next_process_check:
+                self._check_processes()
+                self.next_process_check = now + self.process_interval
+                continue
+            wait = MAX_WAIT
+            if self.process_interval:
+                wait = min(wait, self.next_process_check - now)
+            if deadline is not None:
+                if now >= deadline:
+                    return None
+                wait = min(wait, deadline - now)
+            data = nvml.wait_event(self.event_set, max(1, int(wait * 1000)))
+            if data is not None:
+                return self._convert(data)
+        return self.pending.popleft()
+
+    def __iter__(self) -> Iterator[Event]:
+        while True:
+            yield self.wait()
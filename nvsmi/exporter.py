@@ -0,0 +1,143 @@
+"""
+Background sampler and HTTP server behind `nvsmi serve`.
+
+A single sampler thread owns the NVML session. Each sample is rendered
+once into complete HTTP responses (headers and body) for /metrics
+(OpenMetrics) and /snapshot (the `summary --format json` document,
+read by `nvsmi cluster`), and swapped in as immutable bytes objects.
+The asyncio server answers every request with a single write of the
+latest response, so clients never touch NVML and never wait for
+rendering, however many there are.
+"""
+
+import asyncio
+import io
+import sys
+import threading
+import nvsmi.loop as loop
+from nvsmi.formatter.json.summary import JsonWriter
+from nvsmi.formatter.openmetrics.summary import format_metrics
+from nvsmi.formatter.stream import write_snapshot
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+JSON_CONTENT_TYPE = "application/json"
+
+
+def http_response(status, body, content_type="text/plain; charset=utf-8"):
+    """A complete HTTP/1.1 response as bytes"""
+    head = (f"HTTP/1.1 {status}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n")
+    return head.encode() + body
+
+
+NOT_FOUND = http_response("404 Not Found", b"Not Found\n")
+UNAVAILABLE = http_response("503 Service Unavailable", b"No sample yet\n")
+BAD_REQUEST = http_response("400 Bad Request", b"Bad Request\n")
+
+
+class Sampler(threading.Thread):
+    """
+    Takes a snapshot from `collector` every `interval` seconds and keeps
+    the latest snapshot and its pre-rendered response. With a `history`,
+    every snapshot is recorded and aggregates over the last `window`
+    seconds are served alongside the instantaneous values.
+
+    Attributes:
+        snapshot:          The latest Snapshot (None before the first sample)
+        response:          HTTP response serving the latest snapshot as OpenMetrics
+        snapshot_response: HTTP response serving the latest snapshot as JSON
+        error:             Why the latest sample failed, None if it succeeded
+        ready:             Set once the first sample has been attempted
+    """
+
+    def __init__(self, collector, interval, history=None, window=None):
+        super().__init__(name="nvsmi-sampler", daemon=True)
+        self.collector = collector
+        self.interval = interval
+        self.history = history
+        self.window = window
+        self.snapshot = None
+        self.response = http_response("200 OK", b"# EOF\n", CONTENT_TYPE)
+        self.snapshot_response = UNAVAILABLE
+        self.error = None
+        self.ready = threading.Event()
+        self.stopping = threading.Event()
+
+    def sample(self):
+        snapshot = self.collector.snapshot()
+        if self.history is not None:
+            self.history.record(snapshot)
+        body = format_metrics(snapshot, self.history, self.window).encode()
+        response = http_response("200 OK", body, CONTENT_TYPE)
+        out = io.StringIO()
+        write_snapshot(JsonWriter(out), snapshot)
+        snapshot_response = http_response("200 OK", out.getvalue().encode(), JSON_CONTENT_TYPE)
+        # Plain attribute stores: readers see either the old or the new sample
+        self.snapshot, self.response, self.snapshot_response = snapshot, response, snapshot_response
+
+    def run(self):
+        ticker = loop.Ticker(self.interval, sleep=self.stopping.wait)
+        while not self.stopping.is_set():
+            try:
+                self.sample()
+                self.error = None
+            except Exception as e:
+                self.error = e
+                if self.ready.is_set():     # serve_main reports the first failure
+                    print(f"nvsmi serve: sampling failed: {e}", file=sys.stderr)
+            finally:
+                # Whether or not it worked, so serve_main never waits forever
+                self.ready.set()
+            skipped = ticker.wait()
+            if skipped:
+                print(f"nvsmi serve: missed {skipped} sampling interval(s)", file=sys.stderr)
+
+    def stop(self):
+        self.stopping.set()
+
+
+class MetricsProtocol(asyncio.Protocol):
+    """
+    Minimal HTTP/1.1 server: GET /metrics and /snapshot on persistent connections.
+
+    Requests are answered from the sampler's responses with one write, which
+    also keeps Nagle's algorithm from delaying a separately written body.
+    """
+
+    # path -> Sampler attribute holding the pre-rendered response
+    routes = {b"/metrics": "response", b"/snapshot": "snapshot_response"}
+
+    def __init__(self, sampler):
+        self.sampler = sampler
+        self.buffer = b""
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        self.buffer += data
+        while b"\r\n\r\n" in self.buffer:
+            head, _, self.buffer = self.buffer.partition(b"\r\n\r\n")
+            request = head.split(b"\r\n", 1)[0].split()
+            if len(request) != 3 or request[0] != b"GET":
+                self.transport.write(BAD_REQUEST)
+                self.transport.close()
+                return
+            route = self.routes.get(request[1].split(b"?", 1)[0])
+            self.transport.write(NOT_FOUND if route is None else getattr(self.sampler, route))
+            if request[2] == b"HTTP/1.0" or b"connection: close" in head.lower():
+                self.transport.close()
+                return
+        if len(self.buffer) > 16384:
+            self.transport.close()
+
+
+async def serve(sampler, host, port, started=None):
+    """Serve the sampler's responses until cancelled"""
+    loop_ = asyncio.get_running_loop()
+    server = await loop_.create_server(lambda: MetricsProtocol(sampler), host, port, backlog=1024)
+    if started is not None:
+        started(server)
+    async with server:
+        await server.serve_forever()
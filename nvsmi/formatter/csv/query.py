@@ -0,0 +1,23 @@
+from typing import List, Optional, Tuple
+
+
+def format_header(columns: List[Tuple[str, str]]) -> str:
+    """nvidia-smi style header, e.g. 'index, memory.used [MiB]'"""
+    return ", ".join(f"{name} [{unit}]" if unit else name for name, unit in columns)
+
+
+def format_row(
+    columns: List[Tuple[str, str]],
+    values: List[Optional[object]],
+    units: bool = True
+) -> str:
+    """One CSV line; values that are not available print as [N/A]"""
+    cells = []
+    for (_, unit), value in zip(columns, values):
+        if value is None:
+            cells.append("[N/A]")
+        elif units and unit:
+            cells.append(f"{value} {unit}")
+        else:
+            cells.append(str(value))
+    return ", ".join(cells)
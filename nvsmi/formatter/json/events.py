@@ -0,0 +1,8 @@
+import json
+from dataclasses import asdict
+from nvsmi.models.models import Event
+
+
+def format_event(event: Event) -> str:
+    """One NDJSON line per event"""
+    return json.dumps(asdict(event), separators=(",", ":"))
@@ -0,0 +1,80 @@
+import json
+from dataclasses import asdict, fields
+from nvsmi.formatter.stream import Writer
+from nvsmi.models.models import GPUInfo, ProcessInfo, Snapshot
+
+_dumps = json.JSONEncoder(separators=(",", ":")).encode
+
+
+def device_record(gpu, processes) -> dict:
+    """JSON object for one GPU and its processes"""
+    record = asdict(gpu)
+    # mem_usage is derived from used_memory; kept for existing consumers
+    record["processes"] = [dict(asdict(p), mem_usage=p.mem_usage) for p in processes]
+    return record
+
+
+def _known(cls, record: dict) -> dict:
+    names = {f.name for f in fields(cls)}
+    return {k: v for k, v in record.items() if k in names}
+
+
+def parse_snapshot(doc: dict) -> Snapshot:
+    """The Snapshot a JsonWriter document was written from"""
+    gpus, processes = [], []
+    for record in doc["gpus"]:
+        processes += [ProcessInfo(**_known(ProcessInfo, p)) for p in record.get("processes", ())]
+        gpus.append(GPUInfo(**_known(GPUInfo, record)))
+    return Snapshot(timestamp=doc["timestamp"], driver_version=doc["driver_version"],
+                    cuda_version=doc["cuda_version"], gpus=gpus, processes=processes)
+
+
+class JsonWriter(Writer):
+    """One JSON document per sample, written a device at a time"""
+
+    def start(self, timestamp, driver_version, cuda_version, gpu_count):
+        self.separator = ""
+        self.out.write(f'{{"timestamp":{timestamp},"driver_version":{_dumps(driver_version)},'
+                       f'"cuda_version":{_dumps(cuda_version)},"gpus":[')
+
+    def device(self, gpu, processes):
+        self.out.write(self.separator + _dumps(device_record(gpu, processes)))
+        self.separator = ","
+
+    def finish(self):
+        self.out.write("]}\n")
+        super().finish()
+
+
+class NdjsonWriter(Writer):
+    """
+    One JSON line per GPU per sample.
+
+    With changes=True only the fields that differ from the previous line
+    for the same GPU are written (the first line of each GPU is complete),
+    and GPUs with no changes produce no line at all.
+    """
+
+    def __init__(self, out, changes=False, labels=None):
+        super().__init__(out)
+        self.changes = changes
+        self.previous = {}
+        # Constant fields written after the timestamp, e.g. {"host": ...}
+        self.labels = "".join(f"{_dumps(k)}:{_dumps(v)}," for k, v in (labels or {}).items())
+
+    def start(self, timestamp, driver_version, cuda_version, gpu_count):
+        self.timestamp = timestamp
+        self.versions = {"driver_version": driver_version, "cuda_version": cuda_version}
+
+    def device(self, gpu, processes):
+        record = dict(self.versions, **device_record(gpu, processes))
+        del record["index"]         # written as "gpu"
+        if self.changes:
+            last = self.previous.get(gpu.index)
+            self.previous[gpu.index] = record
+            if last is not None:
+                record = {k: v for k, v in record.items() if last.get(k) != v}
+                if not record:
+                    return
+        self.out.write(f'{{"timestamp":{self.timestamp},{self.labels}"gpu":{gpu.index},'
+                       + _dumps(record)[1:] + "\n")
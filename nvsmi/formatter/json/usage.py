@@ -0,0 +1,10 @@
+import json
+from dataclasses import asdict
+from typing import List
+from nvsmi.models.models import Usage
+
+
+def format_usage(usages: List[Usage], by: str, total: int, timestamp: float) -> str:
+    """One JSON document per sample; `total` is the number of groups before any --top cut"""
+    return json.dumps({"timestamp": timestamp, "by": by, "total": total,
+                       "groups": [asdict(u) for u in usages]}, separators=(",", ":"))
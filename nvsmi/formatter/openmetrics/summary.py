@@ -0,0 +1,121 @@
+from typing import Optional
+from nvsmi.models.models import Snapshot
+
+MIB = 1024 * 1024
+
+# name, help, GPUInfo getter (None values are skipped)
+GPU_GAUGES = [
+    ("nvsmi_gpu_utilization_percent", "GPU utilization", lambda g: g.util),
+    ("nvsmi_gpu_memory_used_bytes", "Framebuffer memory used", lambda g: g.mem_used * MIB),
+    ("nvsmi_gpu_memory_total_bytes", "Framebuffer memory total", lambda g: g.mem_total * MIB),
+    ("nvsmi_gpu_temperature_celsius", "GPU temperature", lambda g: g.temp),
+    ("nvsmi_gpu_power_watts", "Power draw", lambda g: g.power),
+    ("nvsmi_gpu_power_limit_watts", "Enforced power limit", lambda g: g.power_limit),
+    ("nvsmi_gpu_fan_speed_percent", "Fan speed", lambda g: g.fan),
+]
+
+# name, help, MigInfo getter (None values are skipped)
+MIG_GAUGES = [
+    ("nvsmi_mig_utilization_percent", "MIG device utilization", lambda m: m.util),
+    ("nvsmi_mig_memory_used_bytes", "MIG device memory used", lambda m: m.mem_used * MIB),
+    ("nvsmi_mig_memory_total_bytes", "MIG device memory total", lambda m: m.mem_total * MIB),
+]
+
+# name, help, history metric, scale to the exported unit
+WINDOW_GAUGES = [
+    ("nvsmi_gpu_utilization_percent_window", "GPU utilization", "util", 1),
+    ("nvsmi_gpu_memory_used_bytes_window", "Framebuffer memory used", "mem_used", MIB),
+    ("nvsmi_gpu_temperature_celsius_window", "GPU temperature", "temp", 1),
+    ("nvsmi_gpu_power_watts_window", "Power draw", "power", 1),
+    ("nvsmi_gpu_fan_speed_percent_window", "Fan speed", "fan", 1),
+]
+WINDOW_STATS = ("min", "max", "mean", "p50", "p95", "p99")
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _number(value) -> str:
+    """A value as exposed: integers exactly, other floats with repr() (no rounding)"""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def format_metrics(snapshot: Snapshot, history=None, window: Optional[float] = None) -> str:
+    """
+    Render a snapshot in the OpenMetrics text exposition format, plus
+    aggregates over the last `window` seconds when a History is given
+    """
+    lines = [
+        "# TYPE nvsmi_driver info",
+        "# HELP nvsmi_driver Driver and CUDA versions",
+        f'nvsmi_driver_info{{driver_version="{_escape(snapshot.driver_version)}",'
+        f'cuda_version="{_escape(snapshot.cuda_version)}"}} 1',
+        "# TYPE nvsmi_sample_timestamp_seconds gauge",
+        "# HELP nvsmi_sample_timestamp_seconds When the served sample was taken",
+        f"nvsmi_sample_timestamp_seconds {snapshot.timestamp:.3f}",
+        "# TYPE nvsmi_gpu info",
+        "# HELP nvsmi_gpu GPU identity",
+    ]
+    labels = []
+    for gpu in snapshot.gpus:
+        label = f'gpu="{gpu.index}"'
+        labels.append(label)
+        lines.append(f'nvsmi_gpu_info{{{label},name="{_escape(gpu.name)}",bus_id="{_escape(gpu.bus_id)}"}} 1')
+
+    lines.append("# TYPE nvsmi_gpu_up gauge")
+    lines.append("# HELP nvsmi_gpu_up Whether the GPU could be queried")
+    for gpu, label in zip(snapshot.gpus, labels):
+        lines.append(f"nvsmi_gpu_up{{{label}}} {0 if gpu.error else 1}")
+
+    for name, help, get in GPU_GAUGES:
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"# HELP {name} {help}")
+        for gpu, label in zip(snapshot.gpus, labels):
+            value = get(gpu)
+            if value is not None and gpu.name:
+                lines.append(f"{name}{{{label}}} {value}")
+
+    mig = [(f'gpu="{gpu.index}",gpu_instance="{m.gpu_instance}",compute_instance="{m.compute_instance}"', m)
+           for gpu in snapshot.gpus for m in gpu.mig if not m.error]
+    if mig:
+        lines.append("# TYPE nvsmi_mig info")
+        lines.append("# HELP nvsmi_mig MIG device identity")
+        for label, m in mig:
+            lines.append(f'nvsmi_mig_info{{{label},profile="{_escape(m.profile)}",uuid="{_escape(m.uuid)}"}} 1')
+        for name, help, get in MIG_GAUGES:
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"# HELP {name} {help}")
+            for label, m in mig:
+                value = get(m)
+                if value is not None:
+                    lines.append(f"{name}{{{label}}} {value}")
+
+    if history is not None:
+        for name, help, metric, scale in WINDOW_GAUGES:
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"# HELP {name} {help} over the last {window:g} s")
+            for gpu, label in zip(snapshot.gpus, labels):
+                stats = history.stats(gpu.index, metric, window, snapshot.timestamp)
+                if stats is None:
+                    continue
+                for stat in WINDOW_STATS:
+                    value = getattr(stats, stat) * scale
+                    lines.append(f'{name}{{{label},stat="{stat}"}} {_number(value)}')
+
+    lines.append("# TYPE nvsmi_process_memory_used_bytes gauge")
+    lines.append("# HELP nvsmi_process_memory_used_bytes GPU memory used by a process")
+    for p in snapshot.processes:
+        if p.used_memory is None:
+            continue
+        instance = "" if p.gpu_instance is None else \
+            f'gpu_instance="{p.gpu_instance}",compute_instance="{p.compute_instance}",'
+        lines.append(
+            f'nvsmi_process_memory_used_bytes{{gpu="{p.gpu}",{instance}pid="{p.pid}",type="{p.type}",'
+            f'name="{_escape(p.name)}"}} {p.used_memory}'
+        )
+
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
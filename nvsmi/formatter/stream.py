@@ -0,0 +1,48 @@
+"""
+Streaming writers for structured output.
+
+A writer receives one sample as start(), then device() once per GPU in
+index order, then finish(), and writes to its output as it goes, so
+nothing larger than one device is ever buffered. Writers can be fed
+from a live Collector, device by device, or from a complete Snapshot
+(e.g. a replayed one).
+"""
+
+import time
+from typing import Dict, List
+from nvsmi.models.models import GPUInfo, ProcessInfo, Snapshot
+
+
+class Writer:
+    """Base class for streaming writers; `out` is a text stream"""
+
+    def __init__(self, out):
+        self.out = out
+
+    def start(self, timestamp: float, driver_version: str, cuda_version: str, gpu_count: int):
+        pass
+
+    def device(self, gpu: GPUInfo, processes: List[ProcessInfo]):
+        pass
+
+    def finish(self):
+        self.out.flush()
+
+
+def write_snapshot(writer: Writer, snapshot: Snapshot):
+    """Feed a complete snapshot to writer"""
+    by_gpu: Dict[int, List[ProcessInfo]] = {}
+    for p in snapshot.processes:
+        by_gpu.setdefault(p.gpu, []).append(p)
+    writer.start(snapshot.timestamp, snapshot.driver_version, snapshot.cuda_version, len(snapshot.gpus))
+    for gpu in snapshot.gpus:
+        writer.device(gpu, by_gpu.get(gpu.index, []))
+    writer.finish()
+
+
+def write_collected(writer: Writer, collector):
+    """Feed a sample from collector to writer, each device as soon as it is collected"""
+    writer.start(time.time(), collector.driver_version, collector.cuda_version, collector.device_count)
+    for gpu, processes in collector.devices():
+        writer.device(gpu, processes)
+    writer.finish()
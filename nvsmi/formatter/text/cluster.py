@@ -0,0 +1,41 @@
+from typing import List
+from nvsmi.cluster import HostResult
+
+
+def _na(value, unit=""):
+    return "N/A" if value is None else f"{value}{unit}"
+
+
+def format_fleet(results: List[HostResult], elapsed: float) -> str:
+    """
+    One row per GPU of every host, then one line per failed host and a
+    fleet total, e.g.
+
+        Host          GPU  Name                   Temp     Power       Memory-Usage  Util  Procs
+        node001:9400    0  NVIDIA H100 80GB HBM3   43C  574/700W  2048/81920MiB   89%      2
+    """
+    width = max([len("Host")] + [len(r.host) for r in results])
+    lines = [f"{'Host':<{width}}  GPU  {'Name':<24} {'Temp':>5} {'Power':>10} "
+             f"{'Memory-Usage':>16} {'Util':>5}  Procs"]
+    failed, gpus = [], 0
+    for r in results:
+        if r.snapshot is None:
+            failed.append(r)
+            continue
+        procs = {}
+        for p in r.snapshot.processes:
+            procs[p.gpu] = procs.get(p.gpu, 0) + 1
+        for g in r.snapshot.gpus:
+            gpus += 1
+            if g.error and not g.name:
+                lines.append(f"{r.host:<{width}}  {g.index:>3}  error: {g.error}")
+                continue
+            power = f"{_na(g.power)}/{_na(g.power_limit)}W"
+            memory = f"{g.mem_used}/{g.mem_total}MiB"
+            lines.append(f"{r.host:<{width}}  {g.index:>3}  {g.name[:24]:<24} {_na(g.temp, 'C'):>5} "
+                         f"{power:>10} {memory:>16} {_na(g.util, '%'):>5}  {procs.get(g.index, 0):>5}")
+    for r in failed:
+        lines.append(f"{r.host:<{width}}    -  error: {r.error}")
+    lines.append(f"{len(results)} hosts ({len(results) - len(failed)} ok, {len(failed)} failed), "
+                 f"{gpus} GPUs, {elapsed:.2f} s")
+    return "\n".join(lines)
@@ -0,0 +1,30 @@
+from typing import List, Sequence, Tuple
+
+
+def _comment(line: str) -> str:
+    """Mark a header line with a leading '#' without shifting the columns"""
+    if line.startswith(" "):
+        return "#" + line[1:]
+    name, _, rest = line.partition(" ")
+    return "#" + name + rest
+
+
+class DmonFormatter:
+    """
+    Fixed-width rows for `nvsmi dmon`.
+
+    The header and the row format string are built once for the selected
+    columns; format_row() is then a single str.format call per device.
+    Missing values are shown as '-'.
+    """
+
+    def __init__(self, columns: List[Tuple[str, str]], prefix: Sequence[str] = ()):
+        # prefix: optional "Date" / "Time" columns printed before the gpu index
+        self.prefix = list(prefix)
+        names = [f"{name:<8}" for name in self.prefix] + ["  gpu"] + [f"{n:>6}" for n, _ in columns]
+        units = [f"{'':<8}" for _ in self.prefix] + ["  Idx"] + [f"{u:>6}" for _, u in columns]
+        self.header = _comment(" ".join(names)) + "\n" + _comment(" ".join(units))
+        self.row_format = " ".join(["{:<8}"] * len(self.prefix) + ["{:>5}"] + ["{:>6}"] * len(columns))
+
+    def format_row(self, values: Sequence[object]) -> str:
+        return self.row_format.format(*("-" if v is None else v for v in values))
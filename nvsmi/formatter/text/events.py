@@ -0,0 +1,14 @@
+import time
+from nvsmi.models.models import Event
+
+
+def format_event(event: Event) -> str:
+    """One line per event, e.g. '2024-05-01 12:00:00.123  GPU 0  xid  79'"""
+    stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(event.timestamp))
+    millis = int(event.timestamp * 1000) % 1000
+    line = f"{stamp}.{millis:03d}  GPU {event.gpu:<3} {event.type:<14} {event.data}"
+    if event.gpu_instance is not None:
+        line += f"  GI {event.gpu_instance} CI {event.compute_instance}"
+    if event.detail:
+        line += f"  {event.detail}"
+    return line
@@ -0,0 +1,48 @@
+from typing import Dict, List, Optional, Tuple
+from nvsmi.models.models import NvLinkInfo, StaticInfo
+
+# -gt kinds: counter caption prefix
+KINDS = {"d": "Data", "r": "Raw"}
+
+
+def format_gpu(index: int, info: StaticInfo) -> str:
+    return f"GPU {index}: {info.name} (UUID: {info.uuid})"
+
+
+def format_status(links: List[NvLinkInfo], active: Dict[int, Optional[bool]]) -> List[str]:
+    """Speed of each active link, <inactive> for the others"""
+    lines = []
+    for link in links:
+        if active.get(link.link) and link.speed:
+            lines.append(f"\t Link {link.link}: {link.speed / 1000:.3f} GB/s")
+        else:
+            lines.append(f"\t Link {link.link}: <inactive>")
+    return lines
+
+
+def format_remote(links: List[NvLinkInfo]) -> List[str]:
+    return [f"\t Link {link.link}: Remote PCI Bus Id: {link.remote_bus_id or 'N/A'}" for link in links]
+
+
+def format_version(links: List[NvLinkInfo]) -> List[str]:
+    return [f"\t Link {link.link}: Version {'N/A' if link.version is None else link.version}"
+            for link in links]
+
+
+def format_counters(counters: Dict[int, Tuple[Optional[int], Optional[int]]], kind: str) -> List[str]:
+    """Cumulative Tx/Rx counters in KiB, as nvidia-smi nvlink -gt prints them"""
+    lines = []
+    for link, (tx, rx) in sorted(counters.items()):
+        if tx is None and rx is None:
+            continue
+        lines.append(f"\t Link {link}: {KINDS[kind]} Tx: {'N/A' if tx is None else tx} KiB")
+        lines.append(f"\t Link {link}: {KINDS[kind]} Rx: {'N/A' if rx is None else rx} KiB")
+    return lines
+
+
+def format_rates(rates: Dict[int, Tuple[Optional[float], Optional[float]]], kind: str) -> List[str]:
+    """Tx/Rx throughput per link in GB/s"""
+    def rate(value):
+        return "N/A" if value is None else f"{value:.3f} GB/s"
+    return [f"\t Link {link}: {KINDS[kind]} Tx: {rate(tx)}, {KINDS[kind]} Rx: {rate(rx)}"
+            for link, (tx, rx) in sorted(rates.items()) if tx is not None or rx is not None]
@@ -0,0 +1,22 @@
+from typing import List, Sequence, Tuple
+from nvsmi.formatter.text.dmon import _comment
+
+
+class PmonFormatter:
+    """
+    Fixed-width rows for `nvsmi pmon`: gpu, pid, type, the selected
+    metric columns, then the command name. Missing values are shown as '-'.
+    """
+
+    def __init__(self, columns: List[Tuple[str, str]], prefix: Sequence[str] = ()):
+        self.prefix = list(prefix)
+        head = [f"{name:<8}" for name in self.prefix] + ["  gpu", f"{'pid':>10}", f"{'type':>6}"]
+        unit = [f"{'':<8}" for _ in self.prefix] + ["  Idx", f"{'#':>10}", f"{'C/G':>6}"]
+        names = head + [f"{n:>6}" for n, _ in columns] + ["  command"]
+        units = unit + [f"{u:>6}" for _, u in columns] + ["  name"]
+        self.header = _comment(" ".join(names)) + "\n" + _comment(" ".join(units))
+        self.row_format = " ".join(["{:<8}"] * len(self.prefix) + ["{:>5}", "{:>10}", "{:>6}"]
+                                   + ["{:>6}"] * len(columns) + ["  {}"])
+
+    def format_row(self, values: Sequence[object]) -> str:
+        return self.row_format.format(*("-" if v is None else v for v in values))
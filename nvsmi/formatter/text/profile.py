@@ -0,0 +1,60 @@
+import time
+
+# Rows of the per-device table (slowest function/device pairs first)
+TOP_DEVICE_ROWS = 10
+
+
+def _us(seconds):
+    return f"{seconds * 1e6:.1f}"
+
+
+def format_profile(profile) -> str:
+    """
+    Breakdown of the NVML calls recorded by a nvsmi.profile.Profile, e.g.
+
+        NVML calls: 96 in 12.3 ms over 0.08 s (8 errors)
+        Function                          Calls  Errors  Total ms   Mean us    p50 us    p99 us    Max us
+        nvmlDeviceGetFieldValues              8       0     6.120     765.0    1000.0    1000.0     812.4
+        ...
+    """
+    functions = sorted(profile.functions.items(), key=lambda item: item[1].total, reverse=True)
+    calls = sum(s.count for _, s in functions)
+    errors = sum(s.error_count for _, s in functions)
+    total = sum(s.total for _, s in functions)
+    lines = [f"NVML calls: {calls} in {total * 1000:.1f} ms over "
+             f"{time.monotonic() - profile.started:.2f} s ({errors} errors)"]
+    width = max([len("Function")] + [len(name) for name, _ in functions])
+
+    lines.append(f"{'Function':<{width}}  {'Calls':>6}  {'Errors':>6}  {'Total ms':>8}"
+                 f"  {'Mean us':>8}  {'p50 us':>8}  {'p99 us':>8}  {'Max us':>8}")
+    for name, s in functions:
+        lines.append(f"{name:<{width}}  {s.count:>6}  {s.error_count:>6}  {s.total * 1000:>8.3f}"
+                     f"  {_us(s.mean):>8}  {_us(s.percentile(50)):>8}  {_us(s.percentile(99)):>8}"
+                     f"  {_us(s.max):>8}")
+
+    if profile.devices:
+        per_gpu = {}
+        for (_, gpu), s in profile.devices.items():
+            per_gpu[gpu] = per_gpu.get(gpu, 0.0) + s.total
+        lines.append("")
+        lines.append("Time per GPU (ms): " + "  ".join(f"{gpu}: {per_gpu[gpu] * 1000:.3f}"
+                                                      for gpu in sorted(per_gpu)))
+        slowest = sorted(profile.devices.items(), key=lambda item: item[1].max, reverse=True)
+        lines.append(f"{'Slowest calls by GPU':<{width}}  {'GPU':>6}  {'Calls':>6}  {'Errors':>6}"
+                     f"  {'Mean us':>8}  {'Max us':>8}")
+        for (name, gpu), s in slowest[:TOP_DEVICE_ROWS]:
+            lines.append(f"{name:<{width}}  {gpu:>6}  {s.count:>6}  {s.error_count:>6}"
+                         f"  {_us(s.mean):>8}  {_us(s.max):>8}")
+
+    failed = [(name, s.errors) for name, s in functions if s.errors]
+    if failed:
+        lines.append("")
+        lines.append("Errors:")
+        for name, by_error in failed:
+            lines.append(f"  {name}: " + ", ".join(f"{e} x{n}" for e, n in sorted(by_error.items())))
+
+    if profile.process_caches:
+        hits, misses = profile.process_cache_stats()
+        lines.append("")
+        lines.append(f"Process cache: {hits} hits, {misses} misses")
+    return "\n".join(lines)
@@ -0,0 +1,46 @@
+from nvsmi.formatter.stream import Writer
+from nvsmi.formatter.tree import bus_id, gpu_tree
+import nvsmi.utils as utils
+
+LABEL_WIDTH = 42
+
+
+def _line(depth, label, value):
+    indent = "    " * depth
+    return f"{indent}{label:<{LABEL_WIDTH - len(indent)}}: {value}"
+
+
+class QueryWriter(Writer):
+    """nvidia-smi -q style attribute listing"""
+
+    def start(self, timestamp, driver_version, cuda_version, gpu_count):
+        self.out.write("\n".join([
+            "",
+            "==============NVSMI LOG==============",
+            "",
+            _line(0, "Timestamp", utils.get_timestamp(timestamp)),
+            _line(0, "Driver Version", driver_version),
+            _line(0, "CUDA Version", cuda_version),
+            "",
+            _line(0, "Attached GPUs", gpu_count),
+            "",
+        ]))
+
+    def device(self, gpu, processes):
+        lines = [f"GPU {bus_id(gpu)}"]
+        _attributes(gpu_tree(gpu, processes), 1, lines)
+        lines.append("")
+        self.out.write("\n".join(lines) + "\n")
+
+
+def _attributes(nodes, depth, lines):
+    for _, label, value in nodes:
+        if not isinstance(value, list):
+            lines.append(_line(depth, label, value))
+        elif not value:
+            lines.append(_line(depth, label, "None"))
+        elif label:
+            lines.append("    " * depth + label)
+            _attributes(value, depth + 1, lines)
+        else:
+            _attributes(value, depth, lines)
@@ -0,0 +1,84 @@
+"""
+Incremental full-screen renderer for `nvsmi watch`.
+
+The screen keeps the last frame it drew as one string per terminal row.
+Rendering a new frame compares it row by row and cell by cell with the
+previous one and writes only cursor moves and the runs of cells that
+changed, so output per refresh is proportional to what changed rather
+than to the size of the table.
+"""
+
+from typing import List, Optional
+
+CSI = "\x1b["
+# Unchanged cells shorter than this between two changed runs are rewritten
+# rather than skipped with a cursor move (which costs ~8 bytes).
+MERGE_GAP = 8
+
+
+def _runs(old: str, new: str):
+    """(start, end) spans of cells in `new` that differ from `old`"""
+    runs = []
+    start = None
+    width = max(len(old), len(new))
+    old, new = old.ljust(width), new.ljust(width)
+    for col in range(width):
+        if old[col] != new[col]:
+            if start is None:
+                start = col
+            last = col
+        elif start is not None and col - last > MERGE_GAP:
+            runs.append((start, last + 1))
+            start = None
+    if start is not None:
+        runs.append((start, last + 1))
+    return runs
+
+
+class Screen:
+    """
+    A terminal of `rows` x `cols` cells that is redrawn incrementally.
+
+    Attributes:
+        written: Total number of characters written so far
+    """
+
+    def __init__(self, out, cols: int, rows: int):
+        self.out = out
+        self.cols = cols
+        self.rows = rows
+        self.frame: Optional[List[str]] = None
+        self.written = 0
+
+    def resize(self, cols: int, rows: int):
+        """Change the size; the next frame is drawn in full"""
+        self.cols, self.rows = cols, rows
+        self.frame = None
+
+    def render(self, lines: List[str]) -> int:
+        """Draw lines (one per row, extra rows and columns cut off); return chars written"""
+        lines = [line[:self.cols] for line in lines[:self.rows]]
+        lines += [""] * (self.rows - len(lines))
+        if self.frame is None:
+            buf = [CSI + "H" + CSI + "2J"]
+            previous = [""] * self.rows
+        else:
+            buf = []
+            previous = self.frame
+        for row, (old, new) in enumerate(zip(previous, lines), 1):
+            if old == new:
+                continue
+            for start, end in _runs(old, new):
+                buf.append(f"{CSI}{row};{start + 1}H")
+                text = new[start:end]
+                buf.append(text)
+                if len(text) < end - start:
+                    # The row got shorter: clear what is left of the old text
+                    buf.append(CSI + "K")
+        self.frame = lines
+        data = "".join(buf)
+        if data:
+            self.out.write(data)
+            self.out.flush()
+        self.written += len(data)
+        return len(data)
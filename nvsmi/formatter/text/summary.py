@@ -1,6 +1,39 @@
-from typing import List
+from typing import List, Optional
 from nvsmi.models.models import GPUInfo, ProcessInfo
 
+MIG_MODES = {True: "Enabled", False: "Disabled", None: "N/A"}
+
+
+def _instance(value: Optional[int]) -> str:
+    return "N/A" if value is None else str(value)
+
+
+def format_mig_devices(gpus: List[GPUInfo]) -> List[str]:
+    """The "MIG devices" table, or no lines if no GPU has MIG devices"""
+    if not any(gpu.mig for gpu in gpus):
+        return []
+    separator = "+------------------+----------------------------------+-----------+-----------------------+"
+    lines = [
+        "\n+-----------------------------------------------------------------------------------------+",
+        "| MIG devices:                                                                            |",
+        separator,
+        "| GPU  GI  CI  MIG |                     Memory-Usage |  GPU-Util | Profile               |",
+        "|      ID  ID  Dev |                                  |           |                       |",
+        "|==================+==================================+===========+=======================|",
+    ]
+    for gpu in gpus:
+        for m in gpu.mig:
+            ids = f"{gpu.index:>4}{m.gpu_instance:>4}{m.compute_instance:>4}{m.index:>5}"
+            if m.error:
+                lines.append(f"|{ids}  {'ERR! ' + m.error:<70.70}|")
+                continue
+            memory = f"{m.mem_used}MiB / {m.mem_total}MiB"
+            util = "N/A" if m.util is None else f"{m.util}%"
+            lines.append(f"|{ids} |{memory:>33} |{util:>10} | {m.profile:<22}|")
+        if gpu.mig:
+            lines.append(separator)
+    return lines
+
 
 def format_summary(
     driver_version: str,
@@ -8,7 +41,6 @@ def format_summary(
     gpus: List[GPUInfo],
     processes: List[ProcessInfo]
 ) -> str:
-    print(f"hi")
     # Header
     lines = []
     lines.extend([
@@ -23,6 +55,13 @@ def format_summary(
 
     # Per-GPU lines
     for gpu in gpus:
+        if not gpu.name:
+            # Device could not be queried at all
+            lines.append(f"|{gpu.index:>4}  {'ERR! ' + gpu.error:<83.83}|")
+            lines.append(
+                "+-----------------------------------------+------------------------+----------------------+"
+            )
+            continue
         # Format bus ID if available
         try:
             raw = gpu.bus_id  # e.g. '0000:50:00.0'
@@ -34,16 +73,26 @@ def format_summary(
         lines.append(
             f"|{gpu.index:>4}  {gpu.name:<31}Off |{busid:>19} Off |                  Off |"
         )
+        fan = "N/A" if gpu.fan is None else f"{gpu.fan}%"
+        temp = "N/A" if gpu.temp is None else f"{gpu.temp}C"
+        power = "N/A" if gpu.power is None else f"{gpu.power}W"
+        util = "N/A" if gpu.util is None else f"{gpu.util}%"
+        cap = "N/A" if gpu.power_limit is None else f"{gpu.power_limit}W"
         lines.append(
-            f"|{gpu.fan:>3}%{gpu.temp:>5}C    P2{gpu.power:>15}W /  300W |{gpu.mem_used:>8}MiB /{gpu.mem_total:>7}MiB |{gpu.util:>7}%      Default |"
-        )
-        lines.append(
-            "|                                         |                        |                  N/A |"
+            f"|{fan:>4}{temp:>6}    P2{power:>16} / {cap:>5} |{gpu.mem_used:>8}MiB /{gpu.mem_total:>7}MiB |{util:>8}      Default |"
         )
+        if gpu.error:
+            lines.append(f"|      {'ERR! ' + gpu.error:<83.83}|")
+        else:
+            lines.append(
+                f"|                                         |                        |{MIG_MODES[gpu.mig_mode]:>21} |"
+            )
         lines.append(
             "+-----------------------------------------+------------------------+----------------------+"
         )
 
+    lines.extend(format_mig_devices(gpus))
+
     # Processes section
     lines.append("\n+-----------------------------------------------------------------------------------------+")
     lines.append("| Processes:                                                                              |")
@@ -56,9 +105,9 @@ def format_summary(
         )
     else:
         for p in processes:
-            # TODO: Print MIG IDs as N/A
             lines.append(
-                f"|{p.gpu:>5}   N/A  N/A{p.pid:>10}{p.type:>7}   {p.name:<38}{p.mem_usage:>14} |"
+                f"|{p.gpu:>5}{_instance(p.gpu_instance):>6}{_instance(p.compute_instance):>5}"
+                f"{p.pid:>10}{p.type:>7}   {p.name:<38}{p.mem_usage:>14} |"
             )
 
     # Footer
@@ -67,3 +116,31 @@ def format_summary(
     )
 
     return "\n".join(lines)
+
+
+def format_window(history, window: float, gpus: List[GPUInfo]) -> str:
+    """Per-GPU averages and peaks over the last `window` seconds"""
+    columns = [("GPU-Util", "util", "%"), ("Power", "power", "W"),
+               ("Temp", "temp", "C"), ("Memory-Usage", "mem_used", "MiB")]
+
+    def cell(index, metric, unit):
+        stats = history.stats(index, metric, window)
+        if stats is None:
+            return "N/A"
+        return f"{stats.mean:.0f}{unit} / {stats.max:.0f}{unit}"
+
+    title = f"Last {window:g}s (avg / max)"
+    header = f"{'GPU':>5} " + "".join(f"{name:>20}" for name, _, _ in columns)
+    lines = [
+        "+-----------------------------------------------------------------------------------------+",
+        f"| {title:<88}|",
+        f"|{header:<89}|",
+        "|=========================================================================================|",
+    ]
+    for gpu in gpus:
+        row = f"{gpu.index:>5} " + "".join(f"{cell(gpu.index, m, u):>20}" for _, m, u in columns)
+        lines.append(f"|{row:<89}|")
+    lines.append(
+        "+-----------------------------------------------------------------------------------------+"
+    )
+    return "\n".join(lines)
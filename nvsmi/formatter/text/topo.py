@@ -0,0 +1,55 @@
+from typing import Dict, List
+
+LEGEND = """
+Legend:
+
+  X    = Self
+  SYS  = Connection traversing PCIe as well as the SMP interconnect between NUMA nodes (e.g., QPI/UPI)
+  NODE = Connection traversing PCIe as well as the interconnect between PCIe Host Bridges within a NUMA node
+  PHB  = Connection traversing PCIe as well as a PCIe Host Bridge (typically the CPU)
+  PXB  = Connection traversing multiple PCIe bridges (without traversing the PCIe Host Bridge)
+  PIX  = Connection traversing at most a single PCIe bridge
+  NV#  = Connection traversing a bonded set of # NVLinks"""
+
+P2P_LEGEND = """
+Legend:
+
+  X    = Self
+  OK   = Status Ok
+  CNS  = Chipset not supported
+  GNS  = GPU not supported
+  TNS  = Topology not supported
+  NS   = Not supported
+  U    = Unknown"""
+
+
+def _table(names: List[str], rows: List[List[str]], extra: Dict[str, List[str]]) -> List[str]:
+    header = " " * 8 + "".join(f"{name:<8}" for name in names)
+    header += "".join(f"{title:<16}" for title in extra)
+    lines = [header.rstrip()]
+    for r, (name, row) in enumerate(zip(names, rows)):
+        cells = "".join(f"{cell:^7} " for cell in row)
+        cells += "".join(f"{column[r]:<16}" for column in extra.values())
+        lines.append(f"{name:<8}{cells}".rstrip())
+    return lines
+
+
+def format_matrix(topology: Dict) -> str:
+    """topo -m: GPU/NIC connection matrix with CPU and NUMA affinity"""
+    lines = _table(topology["names"], topology["matrix"], {
+        "CPU Affinity": topology["cpu_affinity"],
+        "NUMA Affinity": topology["numa_affinity"],
+    })
+    lines.append(LEGEND)
+    if topology["nics"]:
+        lines.append("\nNIC Legend:\n")
+        lines += [f"  NIC{k}: {name}" for k, name in enumerate(topology["nics"])]
+    return "\n".join(lines)
+
+
+def format_p2p(matrix: List[List[str]], caps_name: str) -> str:
+    """topo -p2p: P2P status matrix for one capability"""
+    names = [f"GPU{i}" for i in range(len(matrix))]
+    lines = [f"{' ' * 8}{caps_name}"] + _table(names, matrix, {})
+    lines.append(P2P_LEGEND)
+    return "\n".join(lines)
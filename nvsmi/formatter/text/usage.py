@@ -0,0 +1,27 @@
+from typing import List
+from nvsmi.models.models import MIB, Usage
+
+HEADERS = {"user": "User", "container": "Container", "pod": "Pod UID", "process": "PID  Process name"}
+NONE_LABELS = {"user": "<unknown>", "container": "<host>", "pod": "<not in a pod>", "process": "<unknown>"}
+
+
+def _gpus(indices: List[int]) -> str:
+    return ",".join(map(str, indices))
+
+
+def format_usage(usages: List[Usage], by: str, total: int, timestamp: float) -> str:
+    """
+    Table of GPU memory per group, in the given order, noting how many of
+    the `total` groups were left out, e.g.
+
+        User                Processes   GPUs          GPU Memory
+        alice                      12   0,1,2,3        40960MiB
+    """
+    width = max([len(HEADERS[by])] + [len(u.key or NONE_LABELS[by]) for u in usages])
+    lines = [f"{HEADERS[by]:<{width}}  {'Processes':>9}   {'GPUs':<12}{'GPU Memory':>12}"]
+    for u in usages:
+        lines.append(f"{u.key or NONE_LABELS[by]:<{width}}  {u.processes:>9}   {_gpus(u.gpus):<12}"
+                     f"{u.used_memory // MIB:>9}MiB")
+    if len(usages) < total:
+        lines.append(f"({total - len(usages)} more)")
+    return "\n".join(lines)
@@ -0,0 +1,86 @@
+"""
+The nvidia-smi -q attribute tree of one GPU, shared by the -q text and
+-q -x XML writers.
+
+Nodes are (tag, label, value) where value is a display string, or a list
+of child nodes. Tags are the nvidia-smi XML element names and labels the
+-q text captions.
+"""
+
+from typing import List
+from nvsmi.models.models import GPUInfo, MigInfo, ProcessInfo
+
+NA = "N/A"
+
+
+def bus_id(gpu: GPUInfo) -> str:
+    """Bus ID with the 8-digit domain nvidia-smi prints, e.g. '00000000:18:00.0'"""
+    domain, sep, rest = gpu.bus_id.partition(":")
+    return domain.zfill(8) + sep + rest if sep else NA
+
+
+def _unit(value, unit, fmt="{}"):
+    return NA if value is None else f"{fmt.format(value)} {unit}"
+
+
+def _id(value):
+    return NA if value is None else str(value)
+
+
+def mig_tree(m: MigInfo) -> list:
+    nodes = [
+        ("index", "Index", str(m.index)),
+        ("gpu_instance_id", "GPU Instance ID", str(m.gpu_instance)),
+        ("compute_instance_id", "Compute Instance ID", str(m.compute_instance)),
+        ("profile", "Profile", m.profile),
+        ("uuid", "UUID", m.uuid),
+    ]
+    if m.error:
+        return nodes + [("error", "Error", m.error)]
+    return nodes + [
+        ("fb_memory_usage", "FB Memory Usage", [
+            ("total", "Total", _unit(m.mem_total, "MiB")),
+            ("used", "Used", _unit(m.mem_used, "MiB")),
+            ("free", "Free", _unit(m.mem_total - m.mem_used, "MiB")),
+        ]),
+        ("utilization", "Utilization", [("gpu_util", "Gpu", _unit(m.util, "%"))]),
+    ]
+
+
+def process_tree(p: ProcessInfo) -> list:
+    return [
+        ("gpu_instance_id", "GPU instance ID", _id(p.gpu_instance)),
+        ("compute_instance_id", "Compute instance ID", _id(p.compute_instance)),
+        ("pid", "Process ID", str(p.pid)),
+        ("type", "Type", p.type),
+        ("process_name", "Name", p.name or NA),
+        ("used_memory", "Used GPU Memory", p.mem_usage.replace("MiB", " MiB")),
+    ]
+
+
+def gpu_tree(gpu: GPUInfo, processes: List[ProcessInfo]) -> list:
+    """-q attribute tree for one GPU"""
+    nodes = [
+        ("product_name", "Product Name", gpu.name or NA),
+        ("pci", "PCI", [("pci_bus_id", "Bus Id", bus_id(gpu))]),
+        ("fan_speed", "Fan Speed", _unit(gpu.fan, "%")),
+        ("fb_memory_usage", "FB Memory Usage", [
+            ("total", "Total", _unit(gpu.mem_total, "MiB")),
+            ("used", "Used", _unit(gpu.mem_used, "MiB")),
+            ("free", "Free", _unit(gpu.mem_total - gpu.mem_used, "MiB")),
+        ]),
+        ("utilization", "Utilization", [("gpu_util", "Gpu", _unit(gpu.util, "%"))]),
+        ("temperature", "Temperature", [("gpu_temp", "GPU Current Temp", _unit(gpu.temp, "C"))]),
+        ("gpu_power_readings", "GPU Power Readings", [
+            ("power_draw", "Power Draw", _unit(gpu.power, "W", "{:.2f}")),
+            ("current_power_limit", "Current Power Limit", _unit(gpu.power_limit, "W", "{:.2f}")),
+        ]),
+        ("mig_mode", "MIG Mode", [
+            ("current_mig", "Current", {True: "Enabled", False: "Disabled", None: NA}[gpu.mig_mode]),
+        ]),
+        ("mig_devices", "MIG Devices", [("mig_device", "MIG Device", mig_tree(m)) for m in gpu.mig]),
+        ("processes", "Processes", [("process_info", "", process_tree(p)) for p in processes]),
+    ]
+    if gpu.error:
+        nodes.insert(1, ("error", "Error", gpu.error))
+    return nodes
@@ -0,0 +1,42 @@
+from xml.sax.saxutils import escape, quoteattr
+from nvsmi.formatter.stream import Writer
+from nvsmi.formatter.tree import bus_id, gpu_tree
+import nvsmi.utils as utils
+
+INDENT = "\t"
+
+
+class XmlWriter(Writer):
+    """nvidia-smi -q -x compatible XML, one <nvidia_smi_log> document per sample"""
+
+    def start(self, timestamp, driver_version, cuda_version, gpu_count):
+        self.out.write(
+            '<?xml version="1.0" ?>\n'
+            '<!DOCTYPE nvidia_smi_log SYSTEM "nvsmi_device_v12.dtd">\n'
+            "<nvidia_smi_log>\n"
+            f"{INDENT}<timestamp>{escape(utils.get_timestamp(timestamp))}</timestamp>\n"
+            f"{INDENT}<driver_version>{escape(driver_version)}</driver_version>\n"
+            f"{INDENT}<cuda_version>{escape(cuda_version)}</cuda_version>\n"
+            f"{INDENT}<attached_gpus>{gpu_count}</attached_gpus>\n"
+        )
+
+    def device(self, gpu, processes):
+        lines = [f"{INDENT}<gpu id={quoteattr(bus_id(gpu))}>"]
+        _elements(gpu_tree(gpu, processes), 2, lines)
+        lines.append(f"{INDENT}</gpu>\n")
+        self.out.write("\n".join(lines))
+
+    def finish(self):
+        self.out.write("</nvidia_smi_log>\n")
+        super().finish()
+
+
+def _elements(nodes, depth, lines):
+    pad = INDENT * depth
+    for tag, _, value in nodes:
+        if isinstance(value, list):
+            lines.append(f"{pad}<{tag}>")
+            _elements(value, depth + 1, lines)
+            lines.append(f"{pad}</{tag}>")
+        else:
+            lines.append(f"{pad}<{tag}>{escape(value)}</{tag}>")
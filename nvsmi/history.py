@@ -0,0 +1,131 @@
+"""
+Fixed-capacity metric history for long-running modes.
+
+Each GPU gets one ring of samples stored column-wise in preallocated
+array('d') buffers: a timestamp column plus one column per metric, with
+NaN for missing values. Memory is capacity * 8 bytes * (metrics + 1) per
+GPU, fixed at construction, and appending a sample overwrites one slot
+per column whatever the run time.
+"""
+
+import math
+from array import array
+from typing import Dict, Optional, Sequence
+from nvsmi.models.models import Snapshot, WindowStats
+
+NAN = float("nan")
+
+# metric -> GPUInfo getter (None when not reported)
+METRICS = {
+    "util":     lambda g: g.util,
+    "mem_used": lambda g: g.mem_used,
+    "power":    lambda g: g.power,
+    "temp":     lambda g: g.temp,
+    "fan":      lambda g: g.fan,
+}
+
+
+def _rank(ordered, q):
+    """Nearest-rank percentile of a sorted non-empty sequence"""
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+class DeviceHistory:
+    """
+    Ring of the last `capacity` samples of one GPU.
+
+    Timestamps are expected to be non-decreasing; a sample that goes back
+    in time (e.g. a wall-clock step) is stored at the previous timestamp
+    so windows can still be located by binary search.
+    """
+
+    def __init__(self, capacity: int, metrics: Sequence[str] = tuple(METRICS)):
+        if capacity < 1:
+            raise ValueError("history capacity must be at least 1")
+        self.capacity = capacity
+        self.metrics = list(metrics)
+        self.times = array("d", [0.0]) * capacity
+        self.columns = {m: array("d", [NAN]) * capacity for m in self.metrics}
+        self._columns = [self.columns[m] for m in self.metrics]
+        self.appended = 0
+
+    def __len__(self):
+        return min(self.appended, self.capacity)
+
+    @property
+    def nbytes(self) -> int:
+        return self.times.itemsize * self.capacity * (len(self._columns) + 1)
+
+    def append(self, timestamp: float, values: Sequence[Optional[float]]):
+        """Store one sample, values in `metrics` order; O(1)"""
+        if self.appended:
+            timestamp = max(timestamp, self.times[(self.appended - 1) % self.capacity])
+        slot = self.appended % self.capacity
+        self.times[slot] = timestamp
+        for column, value in zip(self._columns, values):
+            column[slot] = NAN if value is None else value
+        self.appended += 1
+
+    def _slot(self, i):
+        """Buffer slot of the i-th oldest retained sample"""
+        return (self.appended - len(self) + i) % self.capacity
+
+    def _first(self, since):
+        """Index of the oldest retained sample taken at or after `since`"""
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.times[self._slot(mid)] < since:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def stats(self, metric: str, seconds: float, now: Optional[float] = None) -> Optional[WindowStats]:
+        """Aggregates of `metric` over the last `seconds`, None if there are no values"""
+        if not self.appended:
+            return None
+        if now is None:
+            now = self.times[(self.appended - 1) % self.capacity]
+        column = self.columns[metric]
+        values = [column[self._slot(i)] for i in range(self._first(now - seconds), len(self))]
+        values = sorted(v for v in values if v == v)    # drop NaN
+        if not values:
+            return None
+        return WindowStats(count=len(values), min=values[0], max=values[-1],
+                           mean=math.fsum(values) / len(values),
+                           p50=_rank(values, 50), p95=_rank(values, 95), p99=_rank(values, 99))
+
+
+class History:
+    """
+    Per-GPU DeviceHistory rings fed from Snapshots.
+
+    Attributes:
+        capacity: Samples kept per GPU
+        devices:  GPU index -> DeviceHistory
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.devices: Dict[int, DeviceHistory] = {}
+
+    @classmethod
+    def for_window(cls, window: float, interval: float) -> "History":
+        """History large enough to cover `window` seconds sampled every `interval`"""
+        return cls(math.ceil(window / interval) + 1)
+
+    def record(self, snapshot: Snapshot):
+        """Append every GPU of a snapshot; devices that failed are stored as gaps"""
+        getters = list(METRICS.values())
+        for gpu in snapshot.gpus:
+            device = self.devices.get(gpu.index)
+            if device is None:
+                device = self.devices[gpu.index] = DeviceHistory(self.capacity)
+            values = [get(gpu) for get in getters] if gpu.name else [None] * len(getters)
+            device.append(snapshot.timestamp, values)
+
+    def stats(self, index: int, metric: str, seconds: float, now: Optional[float] = None) -> Optional[WindowStats]:
+        """Aggregates of `metric` on GPU `index` over the last `seconds`"""
+        device = self.devices.get(index)
+        return None if device is None else device.stats(metric, seconds, now)
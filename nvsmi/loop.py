@@ -0,0 +1,100 @@
+"""
+Fixed-rate scheduling for the -l / -lms loop modes.
+"""
+
+import sys
+import time
+
+
+def positive(convert):
+    """argparse type= that converts with `convert` and rejects values <= 0"""
+    def parse(text):
+        import argparse
+        try:
+            value = convert(text)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid value: {text!r}") from None
+        if not value > 0:
+            raise argparse.ArgumentTypeError(f"must be positive: {text!r}")
+        return value
+    parse.__name__ = convert.__name__       # named in argparse's messages
+    return parse
+
+
+def add_loop_arguments(parser):
+    """Attach the nvidia-smi style -l SECONDS / -lms MILLISECONDS options"""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("-l", "--loop", type=positive(float), metavar="SECONDS",
+                       help="repeat every SECONDS, keeping one NVML session open")
+    group.add_argument("-lms", "--loop-ms", type=positive(int), metavar="MILLISECONDS",
+                       help="repeat every MILLISECONDS, keeping one NVML session open")
+
+
+def interval_from_args(args):
+    """Return the loop interval in seconds, or None for a single run"""
+    if getattr(args, "loop_ms", None) is not None:
+        interval = args.loop_ms / 1000
+    elif getattr(args, "loop", None) is not None:
+        interval = args.loop
+    else:
+        return None
+    if interval <= 0:
+        raise ValueError("loop interval must be positive")
+    return interval
+
+
+class Ticker:
+    """
+    Sleeps until the next tick of a fixed grid anchored at construction time.
+
+    Deadlines are start + k * interval, so the time spent between calls to
+    wait() never accumulates as drift. When the caller overruns one or more
+    deadlines those ticks are skipped rather than run back to back, and
+    counted in `missed`.
+    """
+
+    def __init__(self, interval, clock=time.monotonic, sleep=time.sleep):
+        self.interval = interval
+        self.clock = clock
+        self.sleep = sleep
+        self.start = clock()
+        self.tick = 0
+        self.missed = 0
+
+    def wait(self):
+        """Block until the next deadline; return how many ticks were skipped"""
+        self.tick += 1
+        deadline = self.start + self.tick * self.interval
+        now = self.clock()
+        skipped = 0
+        if now > deadline:
+            skipped = int((now - deadline) // self.interval) + 1
+            self.tick += skipped
+            self.missed += skipped
+            deadline = self.start + self.tick * self.interval
+        self.sleep(deadline - now)
+        return skipped
+
+
+def run_every(interval, func, count=None):
+    """
+    Call func() every `interval` seconds until interrupted (or `count` runs).
+
+    Missed intervals are reported on stderr as they happen.
+    """
+    ticker = Ticker(interval)
+    runs = 0
+    try:
+        while True:
+            func()
+            runs += 1
+            if count is not None and runs >= count:
+                break
+            skipped = ticker.wait()
+            if skipped:
+                print(f"nvsmi: missed {skipped} sampling interval(s) "
+                      f"of {interval * 1000:g} ms ({ticker.missed} total)",
+                      file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+    return ticker.missed
@@ -0,0 +1,138 @@
+"""
+MIG device discovery for the Collector.
+
+Finding the MIG devices of a GPU takes a mode query, then a handle, the
+GPU and compute instance IDs, the name and the UUID of every populated
+slot: some 40 NVML calls for a GPU split seven ways. The layout only
+changes when an administrator reconfigures MIG, so MigMap walks each GPU
+once and keeps the MIG device handles. A GPU is walked again only after
+invalidate(): when a query on one of its MIG devices failed, or one of
+its processes runs on an instance that is not in the map.
+
+Reconfiguring MIG does not reload the driver, so unlike StaticCache the
+map is never persisted; it lives as long as the Collector.
+"""
+
+import nvsmi.nvml as nvml
+
+NO_INSTANCE = 0xFFFFFFFF    # instance ID of processes and events outside MIG
+MAX_MIG_DEVICES = 7         # MIG devices a GPU can be split into
+
+
+def instance_id(value):
+    """GPU or compute instance ID as reported by NVML, None outside MIG"""
+    return None if value is None or value == NO_INSTANCE else value
+
+
+class MigInstance:
+    """
+    A MIG device as found when its GPU was walked.
+
+    Attributes:
+        index:            MIG device index on the parent GPU
+        handle:           NVML handle of the MIG device
+        gpu_instance:     GPU instance ID
+        compute_instance: Compute instance ID
+        profile:          Instance profile, e.g. '1g.10gb'
+        uuid:             MIG device UUID
+        reader:           FieldReader for the MIG device's dynamic metrics
+    """
+
+    def __init__(self, index, handle):
+        self.index = index
+        self.handle = handle
+        self.gpu_instance = nvml.get_gpu_instance_id(handle)
+        self.compute_instance = nvml.get_compute_instance_id(handle)
+        # MIG devices are named after their parent, e.g. "NVIDIA A100-SXM4-40GB MIG 1g.5gb"
+        self.profile = nvml.get_device_name(handle).rpartition("MIG ")[2]
+        self.uuid = nvml.get_device_uuid(handle)
+        self.reader = nvml.FieldReader(handle, nvml.MIG_FIELDS)
+
+
+def probe(handle):
+    """(MIG mode, number of MIG device slots) of a GPU; see nvml.get_device_mig_mode for the mode"""
+    mode = nvml.get_device_mig_mode(handle)
+    return mode, nvml.get_max_mig_device_count(handle) if mode else 0
+
+
+def find_instance(handle, index):
+    """MigInstance in slot `index` of a GPU, None if the slot is empty"""
+    mig_handle = nvml.get_mig_device_handle_by_index(handle, index)
+    return None if mig_handle is None else MigInstance(index, mig_handle)
+
+
+def _attempt(task):
+    try:
+        return task[0](*task[1:])
+    except Exception as e:
+        return e
+
+
+class MigMap:
+    """
+    MIG mode and MIG devices of every GPU, by GPU index.
+
+    Every GPU is walked on creation; refresh() walks again only the GPUs
+    invalidated since. Walks go through `map`, e.g. an executor's map, so
+    that GPUs and their MIG device slots can be queried concurrently.
+    Invalidation is safe from worker threads.
+
+    Attributes:
+        modes:     GPU index -> MIG mode (True, False or None)
+        instances: GPU index -> [MigInstance], by MIG device index
+    """
+
+    def __init__(self, handles, map=map):
+        self.handles = handles
+        self.modes = {}
+        self.instances = {}
+        self.stale = set(range(len(handles)))
+        self.refresh(map)
+
+    @property
+    def count(self):
+        """Number of MIG devices across all GPUs"""
+        return sum(map(len, self.instances.values()))
+
+    def refresh(self, map=map):
+        """Walk the GPUs that were invalidated since they were last walked"""
+        stale = sorted(self.stale)
+        if not stale:
+            return
+        self.stale.difference_update(stale)
+        # Modes first, then every slot of every MIG-enabled GPU in one go
+        probes = list(map(_attempt, [(probe, self.handles[idx]) for idx in stale]))
+        slots = [(idx, index) for idx, found in zip(stale, probes)
+                 if not isinstance(found, Exception) for index in range(found[1])]
+        found = list(map(_attempt, [(find_instance, self.handles[idx], index) for idx, index in slots]))
+        failed = set()
+        for idx, result in zip(stale, probes):
+            if isinstance(result, Exception):
+                failed.add(idx)
+            else:
+                self.modes[idx], self.instances[idx] = result[0], []
+        for (idx, _), result in zip(slots, found):
+            if isinstance(result, Exception):
+                failed.add(idx)
+            elif result is not None:
+                self.instances[idx].append(result)
+        for idx in failed:
+            # e.g. the GPU is lost: no MIG devices until it can be walked
+            self.modes[idx], self.instances[idx] = None, []
+            self.stale.add(idx)
+
+    def invalidate(self, idx):
+        """Walk a GPU again on the next refresh()"""
+        self.stale.add(idx)
+
+    def check(self, idx, processes):
+        """Invalidate a GPU if any of its processes runs on an instance not in the map"""
+        known = None
+        for p in processes:
+            if p.gpu_instance is None:
+                continue
+            if known is None:
+                known = {(i.gpu_instance, i.compute_instance) for i in self.instances.get(idx, ())}
+            if (p.gpu_instance, p.compute_instance) not in known:
+                self.invalidate(idx)
+                return
@@ -1,4 +1,33 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+MIB = 1024 * 1024
+
+@dataclass
+class MigInfo:
+    """
+    One MIG device: a compute instance inside a GPU instance of a GPU.
+
+    Attributes:
+        index:            MIG device index on the parent GPU
+        gpu_instance:     GPU instance ID
+        compute_instance: Compute instance ID
+        profile:          Instance profile, e.g. '1g.10gb'
+        uuid:             MIG device UUID
+        mem_used:         Memory used in MiB
+        mem_total:        Total memory in MiB
+        util:             Utilization percentage, None if the driver does not report it
+        error:            Why the instance could not be queried, None if it was
+    """
+    index: int
+    gpu_instance: int
+    compute_instance: int
+    profile: str
+    uuid: str
+    mem_used: int = 0
+    mem_total: int = 0
+    util: Optional[int] = None
+    error: Optional[str] = None
 
 @dataclass
 class GPUInfo:
@@ -14,16 +43,85 @@ class GPUInfo:
         mem_used:  Memory used in MiB
         mem_total: Total memory in MiB
         util:  GPU utilization percentage
+        power_limit: Enforced power limit in Watts
+        error: Why the device could not be (fully) queried, None if it was
+        mig_mode: True if MIG is enabled, False if disabled, None without MIG support
+        mig:   MigInfo for each MIG device, by MIG device index
+
+    fan, temp, power and util are None when the device does not report them.
     """
     index: int
     name: str
     bus_id: str
-    fan: int
-    temp: int
-    power: int
+    fan: Optional[int]
+    temp: Optional[int]
+    power: Optional[int]
     mem_used: int
     mem_total: int
-    util: int
+    util: Optional[int]
+    power_limit: Optional[int] = None
+    error: Optional[str] = None
+    mig_mode: Optional[bool] = None
+    mig: List[MigInfo] = field(default_factory=list)
+
+    def __post_init__(self):
+        # Entries are plain dicts when parsed from JSON
+        self.mig = [MigInfo(**m) if isinstance(m, dict) else m for m in self.mig]
+
+    @classmethod
+    def unavailable(cls, index, error):
+        """Placeholder for a device that could not be queried"""
+        return cls(index=index, name="", bus_id="", fan=None, temp=None, power=None,
+                   mem_used=0, mem_total=0, util=None, error=error)
+
+@dataclass
+class NvLinkInfo:
+    """
+    One NVLink of a device, as discovered when the driver was loaded.
+
+    Attributes:
+        link:          Link number
+        version:       NVLink version, None if not reported
+        remote_bus_id: PCI bus ID of the device at the other end, None if the link was down
+        speed:         Link speed in MB/s, None if not reported
+    """
+    link: int
+    version: Optional[int]
+    remote_bus_id: Optional[str]
+    speed: Optional[int]
+
+@dataclass
+class StaticInfo:
+    """
+    Device attributes that do not change while the driver is loaded.
+
+    Attributes:
+        uuid:        GPU UUID string
+        name:        GPU model name string
+        bus_id:      PCI bus ID (e.g. '00000000:18:00.0')
+        serial:      Board serial number, None if not reported
+        mem_total:   Total memory in bytes
+        power_limit: Enforced power limit in Watts, None if not reported
+        nvlinks:     NvLinkInfo for each NVLink, by link number
+    """
+    uuid: str
+    name: str
+    bus_id: str
+    serial: Optional[str]
+    mem_total: int
+    power_limit: Optional[int]
+    nvlinks: List[NvLinkInfo] = field(default_factory=list)
+
+    def __post_init__(self):
+        # Entries are plain dicts when loaded from the JSON cache
+        nvlinks = []
+        for l in self.nvlinks:
+            if isinstance(l, dict):
+                l = NvLinkInfo(**l)
+            elif not isinstance(l, NvLinkInfo):
+                raise TypeError(f"nvlinks entries must be NvLinkInfo, not {type(l).__name__}")
+            nvlinks.append(l)
+        self.nvlinks = nvlinks
 
 @dataclass
 class ProcessInfo:
@@ -34,11 +132,121 @@ class ProcessInfo:
         gpu:       GPU index the process is running on
         pid:       Process ID
         type:      'C' for compute or 'G' for graphics
-        name:      Executable or command name
-        mem_usage: Memory usage string (e.g., "123MiB")
+        name:        Executable or command name
+        used_memory: GPU memory used in bytes, None if the driver does not report it
+        gpu_instance:     MIG GPU instance ID, None outside MIG
+        compute_instance: MIG compute instance ID, None outside MIG
     """
     gpu: int
     pid: int
     type: str
     name: str
-    mem_usage: str
+    used_memory: Optional[int]
+    gpu_instance: Optional[int] = None
+    compute_instance: Optional[int] = None
+
+    @property
+    def mem_usage(self) -> str:
+        """Memory usage as nvidia-smi prints it (e.g., "123MiB")"""
+        return "N/A" if self.used_memory is None else f"{self.used_memory // MIB}MiB"
+
+
+@dataclass
+class ProcessOwner:
+    """
+    Who a process belongs to, for accounting.
+
+    Attributes:
+        uid:       Real user ID, None if unknown
+        user:      User name (the uid as a string if it has no name), None if unknown
+        cgroup:    cgroup path, None if unknown
+        container: Container ID (12 characters, like `docker ps`), None outside containers
+        pod:       Kubernetes pod UID, None outside Kubernetes
+    """
+    uid: Optional[int] = None
+    user: Optional[str] = None
+    cgroup: Optional[str] = None
+    container: Optional[str] = None
+    pod: Optional[str] = None
+
+
+@dataclass
+class Usage:
+    """
+    GPU memory of a group of processes (a user, container, pod or process) across all GPUs.
+
+    Attributes:
+        key:         Group name, e.g. a user name or container ID; None for processes outside any
+        used_memory: Total GPU memory in bytes (processes that do not report memory count as 0)
+        processes:   Number of GPU processes in the group
+        gpus:        Indices of the GPUs the group uses, ascending
+    """
+    key: Optional[str]
+    used_memory: int
+    processes: int
+    gpus: List[int] = field(default_factory=list)
+
+
+@dataclass
+class Snapshot:
+    """
+    One sample of the whole node.
+
+    Attributes:
+        timestamp:      Wall-clock time the sample was taken (seconds since epoch)
+        driver_version: Driver version string
+        cuda_version:   CUDA version string
+        gpus:           Per-GPU information, in device-index order
+        processes:      GPU processes across all devices
+    """
+    timestamp: float
+    driver_version: str
+    cuda_version: str
+    gpus: List[GPUInfo] = field(default_factory=list)
+    processes: List[ProcessInfo] = field(default_factory=list)
+
+
+@dataclass
+class WindowStats:
+    """
+    Aggregates of one metric over a recent time window.
+
+    Attributes:
+        count: Number of samples in the window that had a value
+        min:   Smallest value
+        max:   Largest value
+        mean:  Arithmetic mean
+        p50:   Median (nearest rank)
+        p95:   95th percentile (nearest rank)
+        p99:   99th percentile (nearest rank)
+    """
+    count: int
+    min: float
+    max: float
+    mean: float
+    p50: float
+    p95: float
+    p99: float
+
+
+@dataclass
+class Event:
+    """
+    Something that happened on a GPU, reported by `nvsmi events`.
+
+    Attributes:
+        timestamp:         Wall-clock time the event was received (seconds since epoch)
+        gpu:               GPU index
+        type:              Event kind, e.g. 'xid', 'clock', 'process_start'
+        data:              Event payload: Xid number, PID, or NVML's eventData
+        gpu_instance:      MIG GPU instance ID, None if not applicable
+        compute_instance:  MIG compute instance ID, None if not applicable
+        detail:            Human-readable extra information, if any
+    """
+    timestamp: float
+    gpu: int
+    type: str
+    data: int
+    gpu_instance: Optional[int] = None
+    compute_instance: Optional[int] = None
+    detail: Optional[str] = None
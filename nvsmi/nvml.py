@@ -1,13 +1,78 @@
 """
-Light wrapper over pynvml (for now).
+Light wrapper over an NVML backend.
+
+The backend is any object (or module) with pynvml's interface: the
+nvml* functions and NVML_* constants this module uses, the NVMLError
+classes, c_nvmlFieldValue_t and _nvmlGetFunctionPointer for the raw
+nvmlDeviceGetFieldValues entry point. pynvml itself is the default;
+nvsmi.simulated.SimulatedNVML implements the same interface without a
+GPU. Backends are picked by name with NVSMI_BACKEND (see BACKENDS and
+register_backend()), or passed in directly with use_backend().
 """
 
-import ctypes
-import pynvml
+import importlib
+import os
+
+pynvml = None   # the backend, loaded by initialize() so importing this module stays cheap
+
+# NVSMI_BACKEND name -> "module:callable" returning a backend
+BACKENDS = {
+    "pynvml":    "nvsmi.nvml:_import_pynvml",
+    "simulated": "nvsmi.simulated:from_environment",
+}
+DEFAULT_BACKEND = "pynvml"
+
+# Applied to every backend as it is selected (set by nvsmi.profile.enable())
+_wrap_backend = None
+
+
+def _import_pynvml():
+    import pynvml
+    return pynvml
+
+
+def register_backend(name, factory):
+    """
+    Make a backend selectable as NVSMI_BACKEND=name. `factory` is a
+    callable returning the backend, or a "module:callable" string so the
+    backend module is only imported when selected.
+    """
+    BACKENDS[name] = factory
+
+
+def _load():
+    global pynvml
+    if pynvml is None:
+        name = os.environ.get("NVSMI_BACKEND") or DEFAULT_BACKEND
+        factory = BACKENDS.get(name)
+        if factory is None:
+            raise ValueError(f"unknown NVSMI_BACKEND {name!r} (choose from {', '.join(BACKENDS)})")
+        if isinstance(factory, str):
+            module, _, attr = factory.partition(":")
+            factory = getattr(importlib.import_module(module), attr)
+        pynvml = factory() if _wrap_backend is None else _wrap_backend(factory())
+    return pynvml
+
+
+def use_backend(backend):
+    """
+    Route all NVML calls to `backend`, an object with pynvml's interface
+    (e.g. nvsmi.simulated.SimulatedNVML). Call before initialize().
+    """
+    global pynvml
+    pynvml = backend if _wrap_backend is None else _wrap_backend(backend)
+
+
+def __getattr__(name):
+    # NVML_* constants are forwarded from pynvml on first use
+    if name.startswith("NVML_"):
+        return getattr(_load(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def initialize():
     """Initialize NVML library"""
-    pynvml.nvmlInit()
+    _load().nvmlInit()
 
 
 def shutdown():
@@ -20,6 +85,11 @@ def get_driver_version():
     return pynvml.nvmlSystemGetDriverVersion()
 
 
+def get_cuda_driver_version():
+    """Get CUDA version supported by the driver as an int, e.g. 12040 for 12.4"""
+    return pynvml.nvmlSystemGetCudaDriverVersion()
+
+
 def get_nvml_version():
     """Get NVML version string"""
     return pynvml.nvmlSystemGetNVMLVersion()
@@ -75,13 +145,62 @@ def get_device_pci_info(handle):
     return pynvml.nvmlDeviceGetPciInfo(handle)
 
 
+def get_device_serial(handle):
+    """Get device board serial number string"""
+    return pynvml.nvmlDeviceGetSerial(handle)
+
+
+def get_device_power_limit(handle):
+    """Get device enforced power limit in milliwatts"""
+    return pynvml.nvmlDeviceGetEnforcedPowerLimit(handle)
+
+
+def get_device_encoder_utilization(handle):
+    """Get encoder utilization as [percent, sampling period in us]"""
+    return pynvml.nvmlDeviceGetEncoderUtilization(handle)
+
+
+def get_device_decoder_utilization(handle):
+    """Get decoder utilization as [percent, sampling period in us]"""
+    return pynvml.nvmlDeviceGetDecoderUtilization(handle)
+
+
+def get_device_clock_info(handle, clock_type):
+    """Get current clock in MHz for the given NVML_CLOCK_* type"""
+    return pynvml.nvmlDeviceGetClockInfo(handle, clock_type)
+
+
+def get_device_violation_status(handle, perf_policy):
+    """Get throttling time (.violationTime, ns) for an NVML_PERF_POLICY_* reason"""
+    return pynvml.nvmlDeviceGetViolationStatus(handle, perf_policy)
+
+
+def get_device_bar1_memory_info(handle):
+    """Get BAR1 memory information (bar1Total, bar1Free, bar1Used)"""
+    return pynvml.nvmlDeviceGetBAR1MemoryInfo(handle)
+
+
+def get_device_total_ecc_errors(handle, error_type, counter_type):
+    """Get ECC error count for an NVML_MEMORY_ERROR_TYPE_* / *_ECC counter"""
+    return pynvml.nvmlDeviceGetTotalEccErrors(handle, error_type, counter_type)
+
+
+def get_device_pcie_replay_counter(handle):
+    """Get PCIe replay counter"""
+    return pynvml.nvmlDeviceGetPcieReplayCounter(handle)
+
+
+def get_device_pcie_throughput(handle, counter):
+    """Get PCIe throughput in KB/s for an NVML_PCIE_UTIL_* counter"""
+    return pynvml.nvmlDeviceGetPcieThroughput(handle, counter)
+
+
 def get_device_compute_running_processes(handle):
     """Get running compute processes on device"""
     try:
         return pynvml.nvmlDeviceGetComputeRunningProcesses(handle)
-    except Exception as e:
-        print(f"Error getting compute running processes: {e}")
-        # If no processes found or other error, return empty list
+    except pynvml.NVMLError_NotFound:
+        # No processes found; anything else is a real error for the caller
         return []
 
 
@@ -89,55 +208,490 @@ def get_device_graphics_running_processes(handle):
     """Get running graphics processes on device"""
     try:
         return pynvml.nvmlDeviceGetGraphicsRunningProcesses(handle)
-    except Exception as e:
-        print(f"Error getting graphics running processes: {e}")
-        # If no processes found or other error, return empty list
+    except pynvml.NVMLError_NotFound:
+        # No processes found; anything else is a real error for the caller
+        return []
+
+
+def get_device_process_utilization(handle, last_seen_timestamp):
+    """
+    Get per-process utilization samples (pid, timeStamp, smUtil, memUtil,
+    encUtil, decUtil) newer than last_seen_timestamp (us)
+    """
+    try:
+        return pynvml.nvmlDeviceGetProcessUtilization(handle, last_seen_timestamp)
+    except pynvml.NVMLError_NotFound:
+        # No samples since last_seen_timestamp
         return []
 
 
 def get_device_nvlink_state(handle, link):
-    """Get NvLink state for specified link (placeholder implementation)"""
-    # Note: This is a placeholder since pynvml nvlink functions may not be available
-    # in all versions. In a real implementation, you would use:
-    # return pynvml.nvmlDeviceGetNvLinkState(handle, link)
-    return None
+    """True if the link is active"""
+    return pynvml.nvmlDeviceGetNvLinkState(handle, link) == pynvml.NVML_FEATURE_ENABLED
 
 
 def get_device_nvlink_version(handle, link):
-    """Get NvLink version for specified link (placeholder implementation)"""
-    # Note: This is a placeholder since pynvml nvlink functions may not be available
-    # in all versions. In a real implementation, you would use:
-    # return pynvml.nvmlDeviceGetNvLinkVersion(handle, link)
-    return None
+    """Get NvLink version for specified link"""
+    return pynvml.nvmlDeviceGetNvLinkVersion(handle, link)
+
+
+def get_device_nvlink_remote_bus_id(handle, link):
+    """Get PCI bus ID of the device at the other end of a link"""
+    return pynvml.nvmlDeviceGetNvLinkRemotePciInfo(handle, link).busId
 
 
 def get_nvlink_link_count(handle):
-    """Get number of NvLink links on device (placeholder implementation)"""
-    # Note: This is a placeholder since pynvml nvlink functions may not be available
-    # in all versions. For now, return 0 (no links detected)
-    return 0
+    """Get number of NvLink links on device (0 if it has none)"""
+    reader = FieldReader(handle, [("links", "NVML_FI_DEV_NVLINK_LINK_COUNT", None)])
+    return reader.read()["links"] or 0
 
 
 def get_device_nvlink_utilization(handle, link, counter):
-    """Get NvLink utilization counter (placeholder implementation)"""
-    # Note: This is a placeholder since pynvml nvlink functions may not be available
-    # in all versions. In a real implementation, you would use:
-    # return pynvml.nvmlDeviceGetNvLinkUtilizationCounter(handle, link, counter)
-    return None, None
+    """
+    Get NvLink utilization counter as (rx, tx). Deprecated by NVML in
+    favour of the NVML_FI_DEV_NVLINK_THROUGHPUT_* fields (see nvlink_fields)
+    """
+    return pynvml.nvmlDeviceGetNvLinkUtilizationCounter(handle, link, counter)
 
 
 def get_device_max_nvlink_bandwidth(handle, link):
-    """Get max NvLink bandwidth for a link (estimated)"""
+    """Get NvLink speed for a link in GB/s (0.0 if not reported)"""
+    speed = FieldReader(handle, [("speed", ("NVML_FI_DEV_NVLINK_GET_SPEED", link), None)]).read()["speed"]
+    return speed / 1000 if speed else 0.0
+
+
+def nvlink_fields(field, links, fallback=None):
+    """
+    FieldReader metrics reading one per-link field (e.g.
+    NVML_FI_DEV_NVLINK_GET_STATE) for each of `links`, keyed by link;
+    fallback(handle, link) is used where the field is not supported
+    """
+    def per_link(link):
+        return None if fallback is None else (lambda h: fallback(h, link))
+    return [(link, (field, link), per_link(link)) for link in links]
+
+
+def query_nvlinks(handle):
+    """
+    Discover the NvLinks of a device: speed, version and state of every
+    link in one batched field read, then the remote end of active links
+    """
+    from nvsmi.models.models import NvLinkInfo
+    count = get_nvlink_link_count(handle)
+    if not count:
+        return []
+    links = range(count)
+    metrics = [("common_speed", "NVML_FI_DEV_NVLINK_SPEED_MBPS_COMMON", None)]
+    metrics += [(("speed", k), f, None) for k, f, _ in nvlink_fields("NVML_FI_DEV_NVLINK_GET_SPEED", links)]
+    metrics += [(("version", k), f, g) for k, f, g in
+                nvlink_fields("NVML_FI_DEV_NVLINK_GET_VERSION", links, get_device_nvlink_version)]
+    metrics += [(("state", k), f, g) for k, f, g in
+                nvlink_fields("NVML_FI_DEV_NVLINK_GET_STATE", links, get_device_nvlink_state)]
+    values = FieldReader(handle, metrics).read()
+    result = []
+    for link in links:
+        # NVML_NVLINK_STATE_ACTIVE and NVML_FEATURE_ENABLED are both 1
+        active = values[("state", link)] == 1
+        result.append(NvLinkInfo(
+            link          = link,
+            version       = values[("version", link)],
+            remote_bus_id = get_device_nvlink_remote_bus_id(handle, link) if active else None,
+            speed         = values[("speed", link)] or values["common_speed"],
+        ))
+    return result
+
+
+def get_device_index(handle):
+    """Get the NVML index of a device handle"""
+    return pynvml.nvmlDeviceGetIndex(handle)
+
+
+# --- MIG ---
+
+def get_device_mig_mode(handle):
+    """True if MIG is enabled, False if disabled, None if the GPU has no MIG support"""
+    try:
+        current, _pending = pynvml.nvmlDeviceGetMigMode(handle)
+    except pynvml.NVMLError as e:
+        if not _is_not_supported(e):
+            raise
+        return None
+    return current == pynvml.NVML_DEVICE_MIG_ENABLE
+
+
+def get_max_mig_device_count(handle):
+    """Number of MIG device slots on a GPU"""
+    return pynvml.nvmlDeviceGetMaxMigDeviceCount(handle)
+
+
+def get_mig_device_handle_by_index(handle, index):
+    """Handle of the MIG device in slot `index` of a GPU, None if the slot is empty"""
+    try:
+        return pynvml.nvmlDeviceGetMigDeviceHandleByIndex(handle, index)
+    except pynvml.NVMLError_NotFound:
+        return None
+
+
+def get_gpu_instance_id(mig_handle):
+    """GPU instance ID of a MIG device"""
+    return pynvml.nvmlDeviceGetGpuInstanceId(mig_handle)
+
+
+def get_compute_instance_id(mig_handle):
+    """Compute instance ID of a MIG device"""
+    return pynvml.nvmlDeviceGetComputeInstanceId(mig_handle)
+
+
+def event_type(name):
+    """nvmlEventType* mask by name, e.g. event_type('nvmlEventTypeXidCriticalError')"""
+    return getattr(_load(), name)
+
+
+def create_event_set():
+    """Create an NVML event set; free it with free_event_set()"""
+    return pynvml.nvmlEventSetCreate()
+
+
+def free_event_set(event_set):
+    pynvml.nvmlEventSetFree(event_set)
+
+
+def get_device_supported_event_types(handle):
+    """Mask of nvmlEventType* the device can report"""
+    return pynvml.nvmlDeviceGetSupportedEventTypes(handle)
+
+
+def register_device_events(handle, event_types, event_set):
+    """Deliver the device's events of the given mask to event_set"""
+    pynvml.nvmlDeviceRegisterEvents(handle, event_types, event_set)
+
+
+def wait_event(event_set, timeout_ms):
+    """
+    Block until an event arrives (device, eventType, eventData,
+    gpuInstanceId, computeInstanceId), or return None after timeout_ms
+    """
+    try:
+        return pynvml.nvmlEventSetWait(event_set, timeout_ms)
+    except pynvml.NVMLError_Timeout:
+        return None
+
+
+def get_topology_common_ancestor(handle1, handle2):
+    """Closest common PCIe ancestor of two devices, an NVML_TOPOLOGY_* level"""
+    return pynvml.nvmlDeviceGetTopologyCommonAncestor(handle1, handle2)
+
+
+def get_p2p_status(handle1, handle2, caps_index):
+    """P2P status (NVML_P2P_STATUS_*) between two devices for an NVML_P2P_CAPS_INDEX_*"""
+    return pynvml.nvmlDeviceGetP2PStatus(handle1, handle2, caps_index)
+
+
+def _mask_bits(words):
+    """Bit numbers set in an NVML affinity mask of 64-bit words"""
+    return [64 * i + bit for i, word in enumerate(words) for bit in range(64) if word >> bit & 1]
+
+
+def get_device_cpu_affinity(handle):
+    """CPU numbers ideal for the device"""
+    size = -(-(os.cpu_count() or 1) // 64)
+    return _mask_bits(pynvml.nvmlDeviceGetCpuAffinity(handle, size))
+
+
+def get_device_numa_affinity(handle, max_nodes=1024):
+    """NUMA nodes closest to the device"""
+    return _mask_bits(pynvml.nvmlDeviceGetMemoryAffinity(handle, max_nodes // 64,
+                                                         pynvml.NVML_AFFINITY_SCOPE_NODE))
+
+
+def get_device_field_values(handle, values):
+    """Fill a preallocated c_nvmlFieldValue_t array in place (one NVML call)"""
+    # pynvml.nvmlDeviceGetFieldValues builds a new array on every call; go
+    # to the function pointer directly so FieldReader can reuse its array.
+    from ctypes import c_int32
+    fn = pynvml._nvmlGetFunctionPointer("nvmlDeviceGetFieldValues")
+    ret = fn(handle, c_int32(len(values)), values)
+    pynvml._nvmlCheckReturn(ret)
+    return values
+
+
+# c_nvmlValue_t member to read for each nvmlValueType_t
+_VALUE_MEMBERS = {
+    0: "dVal",    # NVML_VALUE_TYPE_DOUBLE
+    1: "uiVal",   # NVML_VALUE_TYPE_UNSIGNED_INT
+    2: "ulVal",   # NVML_VALUE_TYPE_UNSIGNED_LONG
+    3: "ullVal",  # NVML_VALUE_TYPE_UNSIGNED_LONG_LONG
+    4: "sllVal",  # NVML_VALUE_TYPE_SIGNED_LONG_LONG
+    5: "siVal",   # NVML_VALUE_TYPE_SIGNED_INT
+}
+
+
+def _field_id(field):
+    """Resolve a field name (or (name, scopeId) pair) to ids, None if unknown"""
+    name, scope = field if isinstance(field, tuple) else (field, 0)
+    fid = getattr(pynvml, name, None) if name else None
+    return None if fid is None else (fid, scope)
+
+
+def _is_not_supported(e):
+    return getattr(e, "value", None) == pynvml.NVML_ERROR_NOT_SUPPORTED
+
+
+def is_gpu_lost(e):
+    """True for errors meaning the GPU fell off the bus or needs a reset"""
+    return getattr(e, "value", None) in (pynvml.NVML_ERROR_GPU_IS_LOST,
+                                         pynvml.NVML_ERROR_RESET_REQUIRED)
+
+
+class FieldReader:
+    """
+    Reads a fixed set of metrics from one device, batching every metric
+    that has an NVML field ID into a single nvmlDeviceGetFieldValues call.
+
+    `metrics` is a sequence of (key, field, fallback): `field` is the name
+    of an NVML_FI_* constant (or a (name, scopeId) pair, or None when NVML
+    has no field for the metric) and `fallback(handle)` is the per-metric
+    call used when the field is missing or the driver does not support it.
+
+    The field-value array is built once and refilled in place by read().
+    Fields the driver rejects on the first read are moved to their
+    fallback for good, and metrics whose fallback raises NotSupported are
+    remembered and read as None from then on, so a steady-state read()
+    makes exactly one batched call plus one call per non-field metric.
+    """
+
+    def __init__(self, handle, metrics, batch=True):
+        self.handle = handle
+        self.fallbacks = {}     # key -> per-metric call (None: unsupported)
+        batched = []
+        for key, field, fallback in metrics:
+            ids = _field_id(field) if batch else None
+            if ids is None:
+                self.fallbacks[key] = fallback
+            else:
+                batched.append((key, ids, fallback))
+        self._set_batch(batched)
+        self._probed = False
+
+    def _set_batch(self, batched):
+        self.batched = batched
+        self.values = (pynvml.c_nvmlFieldValue_t * len(batched))()
+        for value, (_, (fid, scope), _) in zip(self.values, batched):
+            value.fieldId = fid
+            value.scopeId = scope
+
+    def read(self):
+        """Return {key: value}; unsupported metrics map to None"""
+        result = {}
+        if self.batched:
+            try:
+                get_device_field_values(self.handle, self.values)
+                rejected = []
+                for value, entry in zip(self.values, self.batched):
+                    if value.nvmlReturn == pynvml.NVML_SUCCESS:
+                        result[entry[0]] = getattr(value.value, _VALUE_MEMBERS.get(value.valueType, "ullVal"))
+                    elif not self._probed:
+                        rejected.append(entry)
+                    else:
+                        result[entry[0]] = None
+            except pynvml.NVMLError:
+                # Drivers without nvmlDeviceGetFieldValues: per-metric only
+                if self._probed:
+                    raise
+                rejected = list(self.batched)
+            if rejected:
+                for key, _, fallback in rejected:
+                    self.fallbacks[key] = fallback
+                    result.pop(key, None)
+                self._set_batch([e for e in self.batched if e not in rejected])
+        self._probed = True
+
+        for key, fallback in self.fallbacks.items():
+            if fallback is None:
+                result[key] = None
+                continue
+            try:
+                result[key] = fallback(self.handle)
+            except pynvml.NVMLError as e:
+                if not _is_not_supported(e):
+                    raise
+                self.fallbacks[key] = None
+                result[key] = None
+        return result
+
+
+# Dynamic metrics shown by `nvsmi summary`. NVML only defines field IDs for
+# some of them; the rest always go through their per-metric call.
+SUMMARY_FIELDS = (
+    # key       field ID                      per-metric fallback
+    ("power",   "NVML_FI_DEV_POWER_INSTANT",  lambda h: get_device_power_usage(h)),        # mW
+    ("temp",    None,                         lambda h: get_device_temperature(h, pynvml.NVML_TEMPERATURE_GPU)),
+    ("fan",     None,                         lambda h: get_device_fan_speed(h)),          # %
+    ("memory",  None,                         lambda h: get_device_memory_info(h)),        # .used, .total
+    ("util",    None,                         lambda h: get_device_utilization_rates(h)),  # .gpu
+)
+
+
+# Dynamic metrics of one MIG device. There are no field IDs scoped to MIG
+# devices, and drivers without per-instance utilization report NotSupported.
+MIG_FIELDS = (
+    ("memory",  None,                         lambda h: get_device_memory_info(h)),        # .used, .total
+    ("util",    None,                         lambda h: get_device_utilization_rates(h)),  # .gpu
+)
+
+
+# --- static device attributes ---
+
+def query_static_info(handle):
+    """Query the attributes that cannot change while the driver is loaded"""
+    from nvsmi.models.models import StaticInfo
+
+    def optional(query):
+        try:
+            return query(handle)
+        except pynvml.NVMLError as e:
+            if not _is_not_supported(e):
+                raise
+            return None
+
+    power_limit = optional(get_device_power_limit)
+    return StaticInfo(
+        uuid        = get_device_uuid(handle),
+        name        = get_device_name(handle),
+        bus_id      = get_device_pci_info(handle).busId,
+        serial      = optional(get_device_serial),
+        mem_total   = get_device_memory_info(handle).total,
+        power_limit = None if power_limit is None else power_limit // 1000,
+        nvlinks     = query_nvlinks(handle),
+    )
+
+
+def _read_first_line(path):
+    try:
+        with open(path) as f:
+            return f.readline().strip()
+    except OSError:
+        return ""
+
+
+# Layout of the persisted StaticCache; bump whenever StaticInfo or a cached
+# value changes shape (2: nvlinks are NvLinkInfo records, not bus IDs)
+CACHE_VERSION = 2
+
+
+def _driver_load_key(driver_version):
+    """
+    Identifies one load of the driver, and the cache layout: the boot,
+    the driver version, and the creation time of /dev/nvidiactl, which is
+    recreated whenever the kernel module is reloaded.
+    """
     try:
-        # For NVLink 2.0 (common on A6000), bandwidth is typically 14.062 GB/s per link
-        # For NVLink 3.0 (A100), it's 28.125 GB/s per link
-        # Since we can't easily determine the exact version, we'll use 14.062 as default
-        return 14.062
-    except Exception as e:
-        return 0.0
-
-
-# Constants from pynvml
-NVML_TEMPERATURE_GPU = pynvml.NVML_TEMPERATURE_GPU
-NVML_FEATURE_ENABLED = pynvml.NVML_FEATURE_ENABLED
-NVML_FEATURE_DISABLED = pynvml.NVML_FEATURE_DISABLED
\ No newline at end of file
+        loaded = os.stat("/dev/nvidiactl").st_ctime_ns
+    except OSError:
+        loaded = 0
+    boot_id = _read_first_line("/proc/sys/kernel/random/boot_id")
+    return f"v{CACHE_VERSION}/{boot_id}/{driver_version}/{loaded}"
+
+
+def default_cache_path():
+    """$NVSMI_CACHE_DIR, else $XDG_CACHE_HOME/nvsmi, else ~/.cache/nvsmi"""
+    root = os.environ.get("NVSMI_CACHE_DIR")
+    if not root:
+        xdg = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        root = os.path.join(xdg, "nvsmi")
+    return os.path.join(root, "static.json")
+
+
+class StaticCache:
+    """
+    Per-process cache of static device attributes (StaticInfo), optionally
+    persisted to `path` so later invocations only query dynamic metrics.
+
+    The file is keyed by CACHE_VERSION, boot ID, driver version and driver
+    load time, so a format change, reboot or driver reload discards it.
+    Each entry loaded from disk is checked once against the device UUID
+    (one NVML call instead of the whole attribute set), which catches GPUs
+    that were swapped or re-enumerated. Callers should invalidate() a
+    device whose queries fail with GPU-lost/reset-required errors so it is
+    re-read after the reset. Other per-boot values (e.g. topology) can be
+    stored with lookup().
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.key = None
+        self.devices = {}    # device index -> StaticInfo
+        self.extra = {}      # name -> JSON-serializable value
+        self.checked = set()
+        self.dirty = False
+
+    def load(self, driver_version):
+        """Read the persisted cache if it belongs to this driver load"""
+        self.key = _driver_load_key(driver_version)
+        if not self.path:
+            return
+        import json
+        from nvsmi.models.models import StaticInfo
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get("key") != self.key:
+                return
+            self.devices = {int(i): StaticInfo(**d) for i, d in data["devices"].items()}
+            self.extra = data.get("extra", {})
+        except (OSError, ValueError, KeyError, TypeError):
+            self.devices, self.extra = {}, {}
+
+    def save(self):
+        """Persist the cache if anything changed; failures are not fatal"""
+        if not self.path or not self.dirty:
+            return
+        import json
+        from dataclasses import asdict
+        data = {
+            "key": self.key,
+            "devices": {str(i): asdict(d) for i, d in self.devices.items()},
+            "extra": self.extra,
+        }
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+            self.dirty = False
+        except OSError:
+            pass
+
+    def device(self, index, handle):
+        """StaticInfo for a device, querying NVML only on a cache miss"""
+        info = self.devices.get(index)
+        if info is not None and index not in self.checked:
+            # Loaded from disk: make sure it is still the same GPU
+            if get_device_uuid(handle) != info.uuid:
+                info = None
+            self.checked.add(index)
+        if info is None:
+            info = self.devices[index] = query_static_info(handle)
+            self.checked.add(index)
+            self.dirty = True
+        return info
+
+    def invalidate(self, index):
+        """Forget a device's attributes (e.g. after a GPU reset)"""
+        if self.devices.pop(index, None) is not None:
+            self.dirty = True
+
+    def lookup(self, name, compute, replaces=None):
+        """
+        Return a cached per-driver-load value, computing it on first use.
+        When it is computed, cached values whose names start with
+        `replaces` are dropped (earlier versions of the same value).
+        """
+        if name not in self.extra:
+            if replaces:
+                for old in [k for k in self.extra if k.startswith(replaces)]:
+                    del self.extra[old]
+            self.extra[name] = compute()
+            self.dirty = True
+        return self.extra[name]
@@ -0,0 +1,183 @@
+"""
+Process metadata cache for naming GPU processes and finding their owners.
+"""
+
+import os
+import re
+import sys
+from nvsmi.models.models import ProcessOwner
+
+UNKNOWN = "<unknown>"
+
+# Container runtimes name cgroups after the 64-hex container ID
+# (docker-<id>.scope, cri-containerd-<id>.scope, crio-<id>, /docker/<id>, ...)
+CONTAINER_ID = re.compile(r"(?:^|[/-])([0-9a-f]{64})(?:\.scope)?(?:/|$)")
+# kubelet puts pod cgroups in pod<uid>; the systemd driver writes the UID with underscores
+POD_UID = re.compile(r"pod([0-9a-f]{8}[-_][0-9a-f]{4}[-_][0-9a-f]{4}[-_][0-9a-f]{4}[-_][0-9a-f]{12})")
+
+
+def _read_start_time(pid):
+    """Process start time in clock ticks since boot, None if it is gone"""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # comm (field 2) may contain spaces and parens; starttime is field 22
+    return int(stat.rpartition(b")")[2].split()[19])
+
+
+def _read_name(pid):
+    """First argument of the process command line, like psutil's cmdline()[0]"""
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            argv0 = f.read().split(b"\0", 1)[0]
+    except OSError:
+        return UNKNOWN
+    return argv0.decode(errors="replace") if argv0 else UNKNOWN
+
+
+def _cgroup(pid):
+    """
+    The process's cgroup path: the v2 hierarchy's, else (on hybrid hosts,
+    where v2 is often just "/") the v1 memory controller's
+    """
+    try:
+        with open(f"/proc/{pid}/cgroup") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    paths = {}
+    for line in lines:
+        _, controllers, path = line.split(":", 2)
+        for controller in controllers.split(","):
+            paths[controller] = path
+    unified = paths.get("")
+    if unified not in (None, "/"):
+        return unified
+    return paths.get("memory") or unified or next(iter(paths.values()), None)
+
+
+def parse_cgroup(path):
+    """(container ID, pod UID) from a cgroup path, None for each that is absent"""
+    if not path:
+        return None, None
+    container = CONTAINER_ID.search(path)
+    pod = POD_UID.search(path)
+    return (container.group(1)[:12] if container else None,
+            pod.group(1).replace("_", "-") if pod else None)
+
+
+_users = {}     # uid -> user name
+
+
+def user_name(uid):
+    """Login name for uid, or the uid itself if it has none"""
+    if uid not in _users:
+        import pwd
+        try:
+            _users[uid] = pwd.getpwuid(uid).pw_name
+        except KeyError:
+            _users[uid] = str(uid)
+    return _users[uid]
+
+
+def _read_owner(pid):
+    try:
+        uid = os.stat(f"/proc/{pid}").st_uid
+    except OSError:
+        return ProcessOwner()
+    cgroup = _cgroup(pid)
+    container, pod = parse_cgroup(cgroup)
+    return ProcessOwner(uid=uid, user=user_name(uid), cgroup=cgroup, container=container, pod=pod)
+
+
+def _psutil_start_time(pid):
+    import psutil
+    try:
+        return psutil.Process(pid).create_time()
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return None
+
+
+def _psutil_name(pid):
+    import psutil
+    try:
+        cmd = psutil.Process(pid).cmdline()
+        return cmd[0] if cmd else UNKNOWN
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return UNKNOWN
+
+
+def _psutil_owner(pid):
+    import psutil
+    try:
+        p = psutil.Process(pid)
+        return ProcessOwner(uid=p.uids().real, user=p.username())
+    except (psutil.NoSuchProcess, psutil.AccessDenied, AttributeError):
+        return ProcessOwner()
+
+
+class ProcessCache:
+    """
+    Process names and owners, cached per (pid, start time).
+
+    names() and owners() resolve a whole batch of pids at once by reading
+    /proc directly. A cached entry is only reused when the pid still has
+    the start time it was cached with, so a recycled pid is always looked
+    up afresh; entries for pids that have exited are evicted at the end of
+    every batch. Keep one instance alive across loop iterations.
+
+    Attributes:
+        hits:   Lookups answered from the cache
+        misses: Lookups that had to read /proc
+    """
+
+    def __init__(self):
+        self.entries = {}   # pid -> (start time, name)
+        self.owner_entries = {}   # pid -> (start time, ProcessOwner)
+        self.hits = 0
+        self.misses = 0
+        if os.path.isdir("/proc/self"):
+            self._start_time, self._name, self._owner = _read_start_time, _read_name, _read_owner
+        else:
+            self._start_time, self._name, self._owner = _psutil_start_time, _psutil_name, _psutil_owner
+        # Report hits and misses to `nvsmi --profile` (only loaded when profiling)
+        profile = sys.modules.get("nvsmi.profile")
+        if profile is not None and profile.active is not None:
+            profile.active.process_caches.append(self)
+
+    def _lookup(self, entries, read, pids, missing):
+        result = {}
+        for pid in set(pids):
+            start = self._start_time(pid)
+            if start is None:
+                entries.pop(pid, None)
+                result[pid] = missing
+                continue
+            entry = entries.get(pid)
+            if entry is not None and entry[0] == start:
+                self.hits += 1
+                result[pid] = entry[1]
+            else:
+                self.misses += 1
+                value = read(pid)
+                entries[pid] = (start, value)
+                result[pid] = value
+        self.evict_exited(entries, skip=result)
+        return result
+
+    def names(self, pids):
+        """Return {pid: name} for every pid in `pids`"""
+        return self._lookup(self.entries, self._name, pids, UNKNOWN)
+
+    def owners(self, pids):
+        """Return {pid: ProcessOwner} for every pid in `pids`, with one read of /proc per new process"""
+        return self._lookup(self.owner_entries, self._owner, pids, ProcessOwner())
+
+    def evict_exited(self, entries=None, skip=()):
+        """Drop entries for processes that no longer exist"""
+        entries = self.entries if entries is None else entries
+        for pid in [p for p in entries if p not in skip]:
+            if self._start_time(pid) != entries[pid][0]:
+                del entries[pid]
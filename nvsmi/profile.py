@@ -0,0 +1,217 @@
+"""
+Opt-in NVML call instrumentation (`nvsmi --profile`, or enable() from code).
+
+enable() puts an InstrumentedBackend in front of the NVML backend.
+Every nvml* function the backend exposes, and the raw
+nvmlDeviceGetFieldValues entry point, is then timed. Counts, latency
+histograms and errors are recorded per NVML function and per device.
+Devices are recognized by the handles nvmlDeviceGetHandleByIndex
+returned; MIG devices count towards their GPU. While profiling is off
+nothing is wrapped, so calls cost exactly what they did before.
+"""
+
+import bisect
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import nvsmi.nvml as nvml
+
+# Histogram bucket upper bounds in seconds (10 us .. 100 ms, then overflow)
+BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+           1e-2, 2.5e-2, 5e-2, 1e-1, float("inf"))
+
+
+class CallStats:
+    """
+    Latency and outcome of the calls to one NVML function (on one device).
+
+    Attributes:
+        count:     Number of calls
+        total:     Sum of latencies in seconds
+        max:       Largest latency in seconds
+        histogram: Call count per BUCKETS entry
+        errors:    Error class name -> count
+    """
+
+    __slots__ = ("count", "total", "max", "histogram", "errors")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram = [0] * len(BUCKETS)
+        self.errors: Dict[str, int] = {}
+
+    def add(self, elapsed, error=None):
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+        self.histogram[bisect.bisect_left(BUCKETS, elapsed)] += 1
+        if error is not None:
+            self.errors[error] = self.errors.get(error, 0) + 1
+
+    @property
+    def error_count(self):
+        return sum(self.errors.values())
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q) -> float:
+        """Upper bound of the bucket holding the q-th percentile (capped at max)"""
+        rank = q / 100 * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS, self.histogram):
+            seen += n
+            if n and seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class Profile:
+    """
+    Everything recorded while profiling.
+
+    Attributes:
+        functions:      NVML function name -> CallStats
+        devices:        (NVML function name, device index) -> CallStats
+        process_caches: ProcessCache instances created while profiling
+        started:        time.monotonic() when profiling began
+    """
+
+    def __init__(self):
+        self.functions: Dict[str, CallStats] = {}
+        self.devices: Dict[Tuple[str, int], CallStats] = {}
+        self.process_caches: List = []
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+
+    def record(self, function, device, elapsed, error=None):
+        with self.lock:
+            stats = self.functions.get(function)
+            if stats is None:
+                stats = self.functions[function] = CallStats()
+            stats.add(elapsed, error)
+            if device is not None:
+                stats = self.devices.get((function, device))
+                if stats is None:
+                    stats = self.devices[(function, device)] = CallStats()
+                stats.add(elapsed, error)
+
+    @property
+    def calls(self):
+        return sum(s.count for s in self.functions.values())
+
+    def process_cache_stats(self) -> Tuple[int, int]:
+        """(hits, misses) over every ProcessCache created while profiling"""
+        return (sum(c.hits for c in self.process_caches),
+                sum(c.misses for c in self.process_caches))
+
+    def report(self) -> str:
+        from nvsmi.formatter.text.profile import format_profile
+        return format_profile(self)
+
+
+class InstrumentedBackend:
+    """Proxy for an NVML backend that times every nvml* call into a Profile"""
+
+    def __init__(self, backend, profile: Profile):
+        self._backend = backend
+        self._profile = profile
+        self._handles = {}      # id(handle) -> (handle, device index)
+
+    def _device(self, args):
+        if args:
+            entry = self._handles.get(id(args[0]))
+            if entry is not None and entry[0] is args[0]:
+                return entry[1]
+        return None
+
+    def _wrap(self, name, func):
+        profile, clock = self._profile, time.perf_counter
+
+        if name == "nvmlDeviceGetHandleByIndex":
+            def call(index):
+                start = clock()
+                try:
+                    handle = func(index)
+                except Exception as e:
+                    profile.record(name, index, clock() - start, type(e).__name__)
+                    raise
+                profile.record(name, index, clock() - start)
+                self._handles[id(handle)] = (handle, index)
+                return handle
+            return call
+
+        mig = name == "nvmlDeviceGetMigDeviceHandleByIndex"
+
+        def call(*args):
+            start = clock()
+            try:
+                result = func(*args)
+            except Exception as e:
+                profile.record(name, self._device(args), clock() - start, type(e).__name__)
+                raise
+            device = self._device(args)
+            profile.record(name, device, clock() - start)
+            if mig and device is not None:
+                self._handles[id(result)] = (result, device)
+            return result
+        return call
+
+    def _nvmlGetFunctionPointer(self, name):
+        # Raw entry points report failure through their return code
+        func = self._backend._nvmlGetFunctionPointer(name)
+        profile, clock, success = self._profile, time.perf_counter, self._backend.NVML_SUCCESS
+
+        def call(*args):
+            start = clock()
+            ret = func(*args)
+            elapsed = clock() - start
+            profile.record(name, self._device(args), elapsed, None if ret == success else f"return {ret}")
+            return ret
+        return call
+
+    def __getattr__(self, name):
+        value = getattr(self._backend, name)
+        if name.startswith("nvml") and callable(value) and not isinstance(value, type):
+            value = self._wrap(name, value)
+            setattr(self, name, value)      # wrap once; later lookups skip __getattr__
+        return value
+
+
+active: Optional[Profile] = None
+
+
+def _instrument(backend):
+    if isinstance(backend, InstrumentedBackend):
+        return backend
+    return InstrumentedBackend(backend, active)
+
+
+def enable(profile: Optional[Profile] = None) -> Profile:
+    """
+    Start instrumenting NVML calls into `profile` (a new one by default) and
+    return it. Enable before NVML is initialized so that device handles are
+    seen being created; the backend itself is still only loaded on first use.
+    """
+    global active
+    if active is not None:
+        return active
+    active = profile or Profile()
+    nvml._wrap_backend = _instrument
+    if nvml.pynvml is not None:
+        nvml.use_backend(nvml.pynvml)
+    return active
+
+
+def disable() -> Optional[Profile]:
+    """Stop instrumenting and return what was recorded"""
+    global active
+    profile, active = active, None
+    nvml._wrap_backend = None
+    if isinstance(nvml.pynvml, InstrumentedBackend):
+        nvml.use_backend(nvml.pynvml._backend)
+    return profile
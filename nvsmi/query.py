@@ -0,0 +1,145 @@
+"""
+Compiled field plans for --query-gpu and --query-compute-apps.
+
+A plan is built once from the requested field list and knows exactly
+which NVML queries those fields depend on: `--query-gpu=memory.used`
+reads memory info and nothing else, and static fields come from the
+StaticCache. Rows are produced one device at a time so they can be
+streamed straight to the output.
+"""
+
+import time
+from collections import namedtuple
+import nvsmi.nvml as nvml
+from nvsmi.proc import ProcessCache
+
+MIB = 1024 * 1024
+
+# source: what has to be queried for the field (None: nothing per device)
+# unit:   shown in the header and, unless nounits, after the value
+Field = namedtuple("Field", "source unit get")
+
+GPU_FIELDS = {
+    "timestamp":          Field(None,     "",    lambda s: s["system"]["timestamp"]),
+    "driver_version":     Field(None,     "",    lambda s: s["system"]["driver_version"]),
+    "count":              Field(None,     "",    lambda s: s["system"]["count"]),
+    "index":              Field(None,     "",    lambda s: s["index"]),
+    "name":               Field("static", "",    lambda s: s["static"].name),
+    "uuid":               Field("static", "",    lambda s: s["static"].uuid),
+    "serial":             Field("static", "",    lambda s: s["static"].serial),
+    "pci.bus_id":         Field("static", "",    lambda s: s["static"].bus_id),
+    "memory.total":       Field("static", "MiB", lambda s: s["static"].mem_total // MIB),
+    "memory.used":        Field("memory", "MiB", lambda s: s["memory"].used // MIB),
+    "memory.free":        Field("memory", "MiB", lambda s: s["memory"].free // MIB),
+    "utilization.gpu":    Field("util",   "%",   lambda s: s["util"].gpu),
+    "utilization.memory": Field("util",   "%",   lambda s: s["util"].memory),
+    "temperature.gpu":    Field("temp",   "",    lambda s: s["temp"]),
+    "fan.speed":          Field("fan",    "%",   lambda s: s["fan"]),
+    "power.draw":         Field("power",  "W",   lambda s: f"{s['power'] / 1000:.2f}"),
+    "power.limit":        Field("static", "W",   lambda s: None if s["static"].power_limit is None else f"{s['static'].power_limit:.2f}"),
+}
+
+APP_FIELDS = {
+    "timestamp":       Field(None,     "",    lambda s: s["system"]["timestamp"]),
+    "gpu_name":        Field("static", "",    lambda s: s["static"].name),
+    "gpu_bus_id":      Field("static", "",    lambda s: s["static"].bus_id),
+    "gpu_serial":      Field("static", "",    lambda s: s["static"].serial),
+    "gpu_uuid":        Field("static", "",    lambda s: s["static"].uuid),
+    "pid":             Field(None,     "",    lambda s: s["process"].pid),
+    "process_name":    Field("names",  "",    lambda s: s["names"][s["process"].pid]),
+    # usedGpuMemory is None under WDDM, in MIG mode without privileges and in some containers
+    "used_gpu_memory": Field(None,     "MiB", lambda s: None if s["process"].usedGpuMemory is None
+                                                     else s["process"].usedGpuMemory // MIB),
+}
+
+ALIASES = {
+    "gpu_name": "name", "gpu_uuid": "uuid", "gpu_serial": "serial", "gpu_bus_id": "pci.bus_id",
+    "name": "process_name", "used_memory": "used_gpu_memory",
+}
+
+
+def _timestamp():
+    now = time.time()
+    return time.strftime("%Y/%m/%d %H:%M:%S", time.localtime(now)) + f".{int(now % 1 * 1000):03d}"
+
+
+class Query:
+    """
+    A compiled field list.
+
+    Attributes:
+        columns: (field name, unit) for each requested field, in order
+        sources: Everything the fields depend on
+    """
+
+    table = None
+
+    def __init__(self, spec):
+        fields = []
+        for name in (n.strip() for n in spec.split(",")):
+            if name not in self.table:
+                name = ALIASES.get(name, name)
+            if name not in self.table:
+                raise ValueError(f'Field "{name}" is not a valid field to query.')
+            fields.append((name, self.table[name]))
+        self.columns = [(name, f.unit) for name, f in fields]
+        self.fields = [f for _, f in fields]
+        self.sources = {f.source for f in self.fields} - {None}
+        self.handles = []
+        self.static = None
+
+    def bind(self, handles, static):
+        """Attach the plan to a session's device handles and StaticCache"""
+        self.handles = handles
+        self.static = static if "static" in self.sources else None
+
+    def _values(self, s):
+        return [None if f.source and s[f.source] is None else f.get(s) for f in self.fields]
+
+
+class GpuQuery(Query):
+    """--query-gpu plan: one row per device"""
+
+    table = GPU_FIELDS
+
+    def bind(self, handles, static):
+        super().bind(handles, static)
+        # Only the dynamic metrics the fields need, batched where possible
+        metrics = [m for m in nvml.SUMMARY_FIELDS if m[0] in self.sources]
+        self.readers = [nvml.FieldReader(h, metrics) for h in handles] if metrics else None
+
+    def rows(self, driver_version):
+        system = {"timestamp": _timestamp(), "driver_version": driver_version,
+                  "count": len(self.handles)}
+        for idx, h in enumerate(self.handles):
+            s = {"index": idx, "system": system}
+            if self.static is not None:
+                s["static"] = self.static.device(idx, h)
+            if self.readers is not None:
+                s.update(self.readers[idx].read())
+            yield self._values(s)
+
+
+class AppsQuery(Query):
+    """--query-compute-apps plan: one row per compute process"""
+
+    table = APP_FIELDS
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        self.process_cache = ProcessCache() if "names" in self.sources else None
+
+    def rows(self, driver_version):
+        system = {"timestamp": _timestamp()}
+        for idx, h in enumerate(self.handles):
+            procs = nvml.get_device_compute_running_processes(h)
+            if not procs:
+                continue
+            s = {"index": idx, "system": system}
+            if self.static is not None:
+                s["static"] = self.static.device(idx, h)
+            if self.process_cache is not None:
+                s["names"] = self.process_cache.names(p.pid for p in procs)
+            for p in procs:
+                s["process"] = p
+                yield self._values(s)
@@ -0,0 +1,348 @@
+"""
+Compact binary recording of Snapshots (`nvsmi record` / `nvsmi replay`).
+
+A recording is a file header followed by tagged little-endian records:
+
+    S  string table entry: id, length, UTF-8 bytes. Written once, just
+       before the first snapshot that uses the string.
+    N  snapshot: timestamp, driver/CUDA version string ids, GPU,
+       process and MIG device counts, then one fixed-layout GPU record
+       per GPU, one MIG record per MIG device (in GPU order) and one
+       fixed-layout process record per process.
+    I  index block, every INDEX_EVERY snapshots: offset of the previous
+       index block, then (timestamp, offset) for each snapshot and the
+       offsets of the strings defined since the previous block.
+    T  trailer, written on close: offset of the last index block.
+
+Missing values are stored as -1 (numbers), NO_MEMORY (process memory),
+NO_INSTANCE (MIG instance IDs of processes) or string id 0. A reader only
+walks the chain of index blocks to open a recording; a file without a
+trailer (e.g. the recorder was killed) is recovered by scanning it.
+Seeking by timestamp is a binary search and assumes that timestamps do
+not go backwards.
+"""
+
+import mmap
+import struct
+from array import array
+from bisect import bisect_left
+from typing import Iterator, Optional
+from nvsmi.models.models import GPUInfo, MigInfo, ProcessInfo, Snapshot
+
+MAGIC = b"NVSMIREC"
+VERSION = 2                                # 2: MIG devices and process instance IDs
+INDEX_EVERY = 1024
+
+FILE_HEADER = struct.Struct("<8sHH")       # magic, version, reserved
+STRING = struct.Struct("<cIH")             # b"S", id, length
+SNAPSHOT = struct.Struct("<cdIIHIH")       # b"N", timestamp, driver, cuda, gpus, processes, MIG devices
+GPU = struct.Struct("<HIIhhiIIhiIb")       # index, name, bus_id, fan, temp, power,
+                                           # mem_used, mem_total, util, power_limit, error, MIG mode
+MIG = struct.Struct("<HHIIIIIIhI")         # gpu, index, GPU instance, compute instance, profile,
+                                           # uuid, mem_used, mem_total, util, error
+PROCESS = struct.Struct("<HIcIQII")        # gpu, pid, type, name, used memory (MiB),
+                                           # GPU instance, compute instance
+INDEX = struct.Struct("<cQII")             # b"I", previous index, snapshots, strings
+INDEX_ENTRY = struct.Struct("<dQ")         # timestamp, offset
+INDEX_STRING = struct.Struct("<Q")         # offset of an S record
+TRAILER = struct.Struct("<cQ8s")           # b"T", last index, magic
+NO_MEMORY = 2 ** 64 - 1
+NO_INSTANCE = 0xFFFFFFFF
+MIB = 1024 * 1024
+
+
+class RecordingError(Exception):
+    """The file is not a recording this version can read"""
+
+
+def _num(value):
+    return -1 if value is None else value
+
+
+def _opt(value):
+    return None if value == -1 else value
+
+
+def _instance(value):
+    return NO_INSTANCE if value is None else value
+
+
+def _mig_mode(value):
+    return None if value == -1 else bool(value)
+
+
+def encode(snapshot: Snapshot, intern, buf: bytearray) -> int:
+    """
+    Append the N record for snapshot, with its GPU and process records,
+    to buf. intern(value, buf) returns the id of a string, appending its
+    S record to buf first if needed. Returns the offset of the N record
+    in buf.
+    """
+    driver = intern(snapshot.driver_version, buf)
+    cuda = intern(snapshot.cuda_version, buf)
+    gpus = [GPU.pack(g.index, intern(g.name, buf), intern(g.bus_id, buf),
+                     _num(g.fan), _num(g.temp), _num(g.power), g.mem_used, g.mem_total,
+                     _num(g.util), _num(g.power_limit), intern(g.error, buf),
+                     _num(None if g.mig_mode is None else int(g.mig_mode)))
+            for g in snapshot.gpus]
+    migs = [MIG.pack(g.index, m.index, m.gpu_instance, m.compute_instance, intern(m.profile, buf),
+                     intern(m.uuid, buf), m.mem_used, m.mem_total, _num(m.util), intern(m.error, buf))
+            for g in snapshot.gpus for m in g.mig]
+    procs = [PROCESS.pack(p.gpu, p.pid, p.type.encode()[:1] or b"?", intern(p.name, buf),
+                          NO_MEMORY if p.used_memory is None else p.used_memory // MIB,
+                          _instance(p.gpu_instance), _instance(p.compute_instance))
+             for p in snapshot.processes]
+    at = len(buf)
+    buf += SNAPSHOT.pack(b"N", snapshot.timestamp, driver, cuda, len(gpus), len(procs), len(migs))
+    buf += b"".join(gpus)
+    buf += b"".join(migs)
+    buf += b"".join(procs)
+    return at
+
+
+def read_string(data, offset):
+    """Decode the S record at offset; return (id, value, end offset)"""
+    _, sid, length = STRING.unpack_from(data, offset)
+    start = offset + STRING.size
+    return sid, bytes(data[start:start + length]).decode("utf-8", "replace"), start + length
+
+
+def decode(data, offset, strings) -> Snapshot:
+    """
+    Decode the N record at offset in data (bytes, mmap or memoryview),
+    resolving string ids through `strings`. Records are unpacked in place,
+    without copying them out of data.
+    """
+    view = memoryview(data)
+    s = strings
+    _, timestamp, driver, cuda, ngpus, nprocs, nmigs = SNAPSHOT.unpack_from(view, offset)
+    pos = offset + SNAPSHOT.size
+    gpus, by_index = [], {}
+    for (index, name, bus_id, fan, temp, power, mem_used, mem_total,
+         util, power_limit, error, mig_mode) in GPU.iter_unpack(view[pos:pos + ngpus * GPU.size]):
+        gpus.append(GPUInfo(index=index, name=s[name], bus_id=s[bus_id], fan=_opt(fan),
+                            temp=_opt(temp), power=_opt(power), mem_used=mem_used,
+                            mem_total=mem_total, util=_opt(util), power_limit=_opt(power_limit),
+                            error=s[error], mig_mode=_mig_mode(mig_mode)))
+        by_index[index] = gpus[-1]
+    pos += ngpus * GPU.size
+    for (gpu, index, gpu_instance, compute_instance, profile, uuid, mem_used, mem_total,
+         util, error) in MIG.iter_unpack(view[pos:pos + nmigs * MIG.size]):
+        by_index[gpu].mig.append(MigInfo(index=index, gpu_instance=gpu_instance,
+                                         compute_instance=compute_instance, profile=s[profile],
+                                         uuid=s[uuid], mem_used=mem_used, mem_total=mem_total,
+                                         util=_opt(util), error=s[error]))
+    pos += nmigs * MIG.size
+    processes = [ProcessInfo(gpu=gpu, pid=pid, type=type_.decode(), name=s[name],
+                             used_memory=None if mem == NO_MEMORY else mem * MIB,
+                             gpu_instance=None if gi == NO_INSTANCE else gi,
+                             compute_instance=None if ci == NO_INSTANCE else ci)
+                 for gpu, pid, type_, name, mem, gi, ci
+                 in PROCESS.iter_unpack(view[pos:pos + nprocs * PROCESS.size])]
+    view.release()
+    return Snapshot(timestamp=timestamp, driver_version=s[driver], cuda_version=s[cuda],
+                    gpus=gpus, processes=processes)
+
+
+class RecordWriter:
+    """
+    Appends Snapshots to a new recording.
+
+    Each snapshot is encoded into one buffer and written with a single
+    write. Use as a context manager, or call close() to write the final
+    index block and the trailer.
+    """
+
+    def __init__(self, path, index_every=INDEX_EVERY):
+        self.file = open(path, "wb")
+        self.index_every = index_every
+        self.offset = self.file.write(FILE_HEADER.pack(MAGIC, VERSION, 0))
+        self.strings = {}           # str -> id
+        self.last_index = 0
+        self.entries = []           # (timestamp, offset) since the last index block
+        self.new_strings = []       # S record offsets since the last index block
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _intern(self, value, buf):
+        """String id for value, appending its S record to buf when new"""
+        if value is None:
+            return 0
+        sid = self.strings.get(value)
+        if sid is None:
+            sid = self.strings[value] = len(self.strings) + 1
+            data = value.encode("utf-8", "replace")[:0xFFFF]
+            self.new_strings.append(self.offset + len(buf))
+            buf += STRING.pack(b"S", sid, len(data))
+            buf += data
+        return sid
+
+    def write(self, snapshot: Snapshot):
+        """Append one snapshot"""
+        buf = bytearray()
+        at = encode(snapshot, self._intern, buf)
+        self.entries.append((snapshot.timestamp, self.offset + at))
+        self.offset += self.file.write(buf)
+        if len(self.entries) >= self.index_every:
+            self._write_index()
+
+    def _write_index(self):
+        buf = bytearray(INDEX.pack(b"I", self.last_index, len(self.entries), len(self.new_strings)))
+        for entry in self.entries:
+            buf += INDEX_ENTRY.pack(*entry)
+        for offset in self.new_strings:
+            buf += INDEX_STRING.pack(offset)
+        self.last_index = self.offset
+        self.offset += self.file.write(buf)
+        self.entries, self.new_strings = [], []
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        if self.file.closed:
+            return
+        if self.entries or self.new_strings:
+            self._write_index()
+        self.file.write(TRAILER.pack(b"T", self.last_index, MAGIC))
+        self.file.close()
+
+
+class Recording:
+    """
+    Read-only, memory-mapped view of a recording.
+
+    Snapshots are decoded on access; len(), indexing and iteration work
+    like a sequence in timestamp order.
+
+    Attributes:
+        timestamps: Timestamp of each snapshot, array('d')
+        offsets:    File offset of each snapshot, array('Q')
+        recovered:  True if the file had no trailer and was scanned
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            try:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:      # empty file
+                raise RecordingError(f"{path}: not a complete nvsmi recording") from None
+        try:
+            self._check_header(path)
+        except RecordingError:
+            self.data.close()
+            raise
+        self.timestamps = array("d")
+        self.offsets = array("Q")
+        self.strings = {0: None}
+        self.recovered = not self._read_index()
+        if self.recovered:
+            self._scan()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.data.close()
+
+    def _check_header(self, path):
+        if len(self.data) < FILE_HEADER.size:
+            raise RecordingError(f"{path}: not a complete nvsmi recording")
+        magic, version, _ = FILE_HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            raise RecordingError(f"{path}: not an nvsmi recording")
+        if version != VERSION:
+            raise RecordingError(f"{path}: unsupported recording version {version}")
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, i) -> Snapshot:
+        return decode(self.data, self.offsets[i], self.strings)
+
+    def __iter__(self) -> Iterator[Snapshot]:
+        return self.between()
+
+    def _string(self, offset):
+        """Read the S record at offset into the string table; return its end"""
+        sid, value, end = read_string(self.data, offset)
+        self.strings[sid] = value
+        return end
+
+    def _read_index(self):
+        """Load the chain of index blocks; False if there is no usable trailer"""
+        if len(self.data) < FILE_HEADER.size + TRAILER.size:
+            return False
+        tag, offset, magic = TRAILER.unpack_from(self.data, len(self.data) - TRAILER.size)
+        if tag != b"T" or magic != MAGIC:
+            return False
+        try:
+            self._read_index_blocks(offset)
+        except struct.error:
+            # The trailer points past the data: scan the records instead
+            self.timestamps = array("d")
+            self.offsets = array("Q")
+            self.strings = {0: None}
+            return False
+        return True
+
+    def _read_index_blocks(self, offset):
+        blocks = []
+        while offset:
+            _, previous, snapshots, strings = INDEX.unpack_from(self.data, offset)
+            blocks.append((offset + INDEX.size, snapshots, strings))
+            offset = previous
+        for pos, snapshots, strings in reversed(blocks):
+            for _ in range(snapshots):
+                timestamp, at = INDEX_ENTRY.unpack_from(self.data, pos)
+                SNAPSHOT.unpack_from(self.data, at)     # struct.error if out of range
+                self.timestamps.append(timestamp)
+                self.offsets.append(at)
+                pos += INDEX_ENTRY.size
+            for _ in range(strings):
+                self._string(INDEX_STRING.unpack_from(self.data, pos)[0])
+                pos += INDEX_STRING.size
+
+    def _scan(self):
+        """Rebuild the index by walking every record, up to a truncated tail"""
+        data, pos, end = self.data, FILE_HEADER.size, len(self.data)
+        try:
+            while pos < end:
+                tag = data[pos:pos + 1]
+                if tag == b"S":
+                    if pos + STRING.size + STRING.unpack_from(data, pos)[2] > end:
+                        break
+                    pos = self._string(pos)
+                elif tag == b"N":
+                    _, timestamp, _, _, gpus, procs, migs = SNAPSHOT.unpack_from(data, pos)
+                    size = SNAPSHOT.size + gpus * GPU.size + migs * MIG.size + procs * PROCESS.size
+                    if pos + size > end:
+                        break
+                    self.timestamps.append(timestamp)
+                    self.offsets.append(pos)
+                    pos += size
+                elif tag == b"I":
+                    _, _, snapshots, strings = INDEX.unpack_from(data, pos)
+                    pos += INDEX.size + snapshots * INDEX_ENTRY.size + strings * INDEX_STRING.size
+                else:
+                    break
+        except struct.error:
+            pass        # truncated record header
+
+    def find(self, timestamp: float) -> int:
+        """Index of the first snapshot taken at or after timestamp"""
+        return bisect_left(self.timestamps, timestamp)
+
+    def between(self, start: Optional[float] = None, end: Optional[float] = None) -> Iterator[Snapshot]:
+        """Snapshots with start <= timestamp < end, in order"""
+        first = 0 if start is None else self.find(start)
+        last = len(self) if end is None else self.find(end)
+        for i in range(first, last):
+            yield decode(self.data, self.offsets[i], self.strings)
@@ -0,0 +1,316 @@
+"""
+Latest snapshot in shared memory (`nvsmi publish`).
+
+A resident publisher collects snapshots over one NVML session and
+writes each into a fixed-layout segment under /dev/shm; summary, watch
+and record read the segment instead of initializing NVML themselves
+while it is fresh, so any number of concurrent invocations cost one
+NVML reader.
+
+The segment is a HEADER followed by the payload: the snapshot encoded
+with the recording codec (S records for its strings, then its N record,
+see nvsmi.record). Writes are guarded by a sequence lock: the publisher
+makes `seq` odd, rewrites header and payload in place, then makes it
+even again. A reader decodes straight from the mapping and keeps the
+result only if `seq` was even and unchanged around the decode. When a
+snapshot outgrows the segment, the publisher replaces the file with a
+larger one and marks the old one stale; readers then map the new file.
+
+Segments are only trusted when owned by root or the reading user.
+"""
+
+# Kept light at import time: commands attach --no-shm while printing help,
+# so the codec and models are imported where they are used.
+import mmap
+import os
+import struct
+import time
+
+DEFAULT_PATH = "/dev/shm/nvsmi"
+MAGIC = b"NVSMISHM"
+VERSION = 2                     # follows the payload codec (record.VERSION)
+
+# magic, version, reserved, publisher pid, seq, published at, interval, payload length, capacity
+HEADER = struct.Struct("<8sHHIQddII")
+SEQ = struct.Struct("<Q")
+SEQ_OFFSET = 16
+PAYLOAD = 64                    # payload offset; header padded to a cache line
+CAPACITY = 1 << 20              # initial payload capacity, grown on demand
+READ_ATTEMPTS = 100
+
+
+def default_path():
+    """Segment path: $NVSMI_SHM, or /dev/shm/nvsmi"""
+    return os.environ.get("NVSMI_SHM", DEFAULT_PATH)
+
+
+def add_shm_arguments(parser):
+    """Attach the --no-shm option for commands that can read a published snapshot"""
+    parser.add_argument("--no-shm", action="store_true",
+                        help="always query NVML, even if `nvsmi publish` is running")
+
+
+class PublisherError(Exception):
+    """Another publisher owns the segment"""
+
+
+class Publisher:
+    """
+    Writes snapshots into the segment at `path`.
+
+    Only one publisher per path may run; a second one raises
+    PublisherError. Use as a context manager, or call close() to remove
+    the segment.
+    """
+
+    def __init__(self, path=None, interval=1.0, capacity=CAPACITY):
+        import fcntl
+        self.path = path or default_path()
+        self.interval = interval
+        self.lock = open(self.path + ".lock", "w")
+        try:
+            fcntl.flock(self.lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self.lock.close()
+            raise PublisherError(f"{self.path} is already being published")
+        self.seq = 0
+        self.data = None
+        self._create(capacity)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _create(self, capacity):
+        """Map a new segment of `capacity` payload bytes and move it into place"""
+        tmp = f"{self.path}.{os.getpid()}"
+        fd = os.open(tmp, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.fchmod(fd, 0o644)        # not narrowed by the umask: readers may be other users
+            os.ftruncate(fd, PAYLOAD + capacity)
+            data = mmap.mmap(fd, PAYLOAD + capacity)
+        finally:
+            os.close(fd)
+        self.seq += self.seq & 1
+        HEADER.pack_into(data, 0, MAGIC, VERSION, 0, os.getpid(), self.seq, 0.0,
+                         self.interval, 0, capacity)
+        os.rename(tmp, self.path)
+        self.inode = os.stat(self.path).st_ino
+        if self.data is not None:
+            self._retire()
+        self.data, self.capacity = data, capacity
+
+    def _retire(self):
+        """Mark the current segment stale for readers that still map it"""
+        self.seq += 1
+        SEQ.pack_into(self.data, SEQ_OFFSET, self.seq)
+        HEADER.pack_into(self.data, 0, MAGIC, VERSION, 0, os.getpid(), self.seq, 0.0,
+                         self.interval, 0, self.capacity)
+        self.seq += 1
+        SEQ.pack_into(self.data, SEQ_OFFSET, self.seq)
+        self.data.close()
+
+    def publish(self, snapshot: "Snapshot"):
+        """Replace the published snapshot"""
+        from nvsmi.record import STRING, encode
+        strings = {}
+
+        def intern(value, buf):
+            if value is None:
+                return 0
+            sid = strings.get(value)
+            if sid is None:
+                sid = strings[value] = len(strings) + 1
+                data = value.encode("utf-8", "replace")[:0xFFFF]
+                buf += STRING.pack(b"S", sid, len(data))
+                buf += data
+            return sid
+
+        buf = bytearray()
+        encode(snapshot, intern, buf)
+        if len(buf) > self.capacity:
+            self._create(1 << (2 * len(buf) - 1).bit_length())
+        data = self.data
+        self.seq += 1                   # odd: write in progress
+        SEQ.pack_into(data, SEQ_OFFSET, self.seq)
+        data[PAYLOAD:PAYLOAD + len(buf)] = buf
+        HEADER.pack_into(data, 0, MAGIC, VERSION, 0, os.getpid(), self.seq, time.time(),
+                         self.interval, len(buf), self.capacity)
+        self.seq += 1                   # even: consistent again
+        SEQ.pack_into(data, SEQ_OFFSET, self.seq)
+
+    def close(self):
+        if self.data is None:
+            return
+        try:
+            # Remove the segment unless a newer file has taken its place
+            if os.stat(self.path).st_ino == self.inode:
+                os.unlink(self.path)
+        except OSError:
+            pass
+        self._retire()
+        self.data = None
+        try:
+            # Still holding the flock: nobody else can be publishing to path
+            os.unlink(self.path + ".lock")
+        except OSError:
+            pass
+        self.lock.close()
+
+
+class Segment:
+    """
+    Read-only mapping of a published segment.
+
+    Attributes:
+        inode: Inode of the mapped file; the publisher replaces the file
+               when it needs a larger segment
+    """
+
+    def __init__(self, data, inode=None):
+        self.data = data
+        self.inode = inode
+
+    @classmethod
+    def open(cls, path=None) -> "Optional[Segment]":
+        """Map the segment at path, or None if there is no trusted segment"""
+        try:
+            with open(path or default_path(), "rb") as f:
+                st = os.fstat(f.fileno())
+                if st.st_uid not in (0, os.getuid()) or st.st_size < PAYLOAD:
+                    return None
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            return None
+        if data[:len(MAGIC)] != MAGIC or struct.unpack_from("<H", data, len(MAGIC))[0] != VERSION:
+            data.close()
+            return None
+        return cls(data, st.st_ino)
+
+    def close(self):
+        self.data.close()
+
+    @property
+    def interval(self) -> float:
+        """The publisher's sampling interval in seconds"""
+        return HEADER.unpack_from(self.data)[6]
+
+    def read(self, max_age=None) -> "Optional[Snapshot]":
+        """
+        The published snapshot, or None if it is older than max_age seconds
+        (default: two publishing intervals plus half a second) or no
+        consistent copy could be read.
+        """
+        from nvsmi.record import SNAPSHOT, decode, read_string
+        data = self.data
+        for _ in range(READ_ATTEMPTS):
+            seq = SEQ.unpack_from(data, SEQ_OFFSET)[0]
+            if seq & 1:
+                time.sleep(0)
+                continue
+            _, _, _, _, _, published, interval, length, capacity = HEADER.unpack_from(data)
+            if length == 0 or PAYLOAD + length > len(data):
+                return None
+            try:
+                strings, pos, end = {0: None}, PAYLOAD, PAYLOAD + length
+                while data[pos:pos + 1] == b"S":
+                    sid, value, pos = read_string(data, pos)
+                    strings[sid] = value
+                snapshot = decode(data, pos, strings) if pos + SNAPSHOT.size <= end else None
+            except (struct.error, KeyError, ValueError):
+                snapshot = None         # torn by a concurrent write
+            if SEQ.unpack_from(data, SEQ_OFFSET)[0] != seq or snapshot is None:
+                continue
+            if max_age is None:
+                max_age = 2 * interval + 0.5
+            return snapshot if time.time() - published <= max_age else None
+        return None
+
+
+class SharedCollector:
+    """
+    Collector stand-in that serves snapshots from a published segment.
+
+    When the segment goes stale because the publisher replaced it with a
+    larger one, the new segment at `path` is mapped instead. If there is no
+    fresh replacement (the publisher stopped), it opens a direct Collector
+    with `fallback()` and uses that for the rest of its life.
+    """
+
+    def __init__(self, segment: Segment, first: "Snapshot", fallback, path=None, interval=None):
+        self.segment = segment
+        self.fallback = fallback
+        self.path = path
+        self.interval = interval
+        self.collector = None
+        self.driver_version = first.driver_version
+        self.cuda_version = first.cuda_version
+        self.device_count = len(first.gpus)
+        self._next = first
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.collector is not None:
+            self.collector.close()
+        self.segment.close()
+
+    def _reopen(self):
+        """Map the segment at path if the publisher replaced it; True if it did"""
+        segment = Segment.open(self.path)
+        if segment is None:
+            return False
+        if segment.inode == self.segment.inode or (
+                self.interval is not None and segment.interval > self.interval):
+            segment.close()
+            return False
+        self.segment.close()
+        self.segment = segment
+        return True
+
+    def snapshot(self) -> "Snapshot":
+        if self.collector is None:
+            snapshot, self._next = self._next or self.segment.read(), None
+            if snapshot is None and self._reopen():
+                snapshot = self.segment.read()
+            if snapshot is not None:
+                return snapshot
+            self.collector = self.fallback()
+        return self.collector.snapshot()
+
+    def devices(self):
+        """Yield (GPUInfo, processes) for every device, like Collector.devices()"""
+        if self.collector is None:
+            snapshot = self.snapshot()
+            if self.collector is None:
+                by_gpu = {}
+                for p in snapshot.processes:
+                    by_gpu.setdefault(p.gpu, []).append(p)
+                for gpu in snapshot.gpus:
+                    yield gpu, by_gpu.get(gpu.index, [])
+                return
+        yield from self.collector.devices()
+
+
+def open_collector(workers=1, cache_path=None, interval=None, shared=True, path=None):
+    """
+    A SharedCollector if a fresh segment is published at least every
+    `interval` seconds (any rate for a single sample), else a Collector
+    """
+    def direct():
+        from nvsmi.collect import Collector
+        return Collector(workers=workers, cache_path=cache_path)
+
+    segment = Segment.open(path) if shared else None
+    if segment is not None:
+        first = segment.read()
+        if first is not None and (interval is None or segment.interval <= interval):
+            return SharedCollector(segment, first, direct, path, interval)
+        segment.close()
+    return direct()
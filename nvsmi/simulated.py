@@ -0,0 +1,687 @@
+"""
+Simulated NVML backend for running nvsmi without a GPU.
+
+SimulatedNVML exposes the subset of the pynvml interface that nvsmi.nvml
+uses (functions, constants, error classes and the field-value struct),
+backed by deterministic fake devices. Select it with
+NVSMI_BACKEND=simulated (NVSMI_SIM_GPUS sets the device count,
+NVSMI_SIM_PROCS the processes per device, NVSMI_SIM_MIG the MIG devices
+per GPU (MIG is disabled by default), NVSMI_SIM_LATENCY_US a delay per
+NVML call, and NVSMI_SIM_EVENTS=SECONDS generates a stream of events)
+or pass an instance to nvml.use_backend().
+"""
+
+import collections
+import ctypes
+import math
+import os
+import threading
+import time
+
+
+class NVMLError(Exception):
+    """Base class for simulated NVML errors; `value` is the NVML return code"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def __str__(self):
+        return _ERROR_STRINGS.get(self.value, f"Unknown Error ({self.value})")
+
+
+class NVMLError_InvalidArgument(NVMLError): pass
+class NVMLError_NotSupported(NVMLError): pass
+class NVMLError_NotFound(NVMLError): pass
+class NVMLError_Timeout(NVMLError): pass
+class NVMLError_FunctionNotFound(NVMLError): pass
+class NVMLError_GpuIsLost(NVMLError): pass
+class NVMLError_ResetRequired(NVMLError): pass
+
+
+_ERROR_CLASSES = {
+    2: NVMLError_InvalidArgument,
+    3: NVMLError_NotSupported,
+    6: NVMLError_NotFound,
+    10: NVMLError_Timeout,
+    13: NVMLError_FunctionNotFound,
+    15: NVMLError_GpuIsLost,
+    16: NVMLError_ResetRequired,
+}
+_ERROR_STRINGS = {
+    2: "Invalid Argument", 3: "Not Supported", 6: "Not Found", 10: "Timeout",
+    13: "Function Not Found", 15: "GPU is lost", 16: "GPU requires reset",
+}
+
+
+def _error(code):
+    return _ERROR_CLASSES.get(code, NVMLError)(code)
+
+
+class c_nvmlValue_t(ctypes.Union):
+    _fields_ = [("dVal", ctypes.c_double), ("uiVal", ctypes.c_uint),
+                ("ulVal", ctypes.c_ulong), ("ullVal", ctypes.c_ulonglong),
+                ("sllVal", ctypes.c_longlong), ("siVal", ctypes.c_int)]
+
+
+class c_nvmlFieldValue_t(ctypes.Structure):
+    _fields_ = [("fieldId", ctypes.c_uint32), ("scopeId", ctypes.c_uint32),
+                ("timestamp", ctypes.c_int64), ("latencyUsec", ctypes.c_int64),
+                ("valueType", ctypes.c_uint), ("nvmlReturn", ctypes.c_uint),
+                ("value", c_nvmlValue_t)]
+
+
+class _Struct:
+    """Attribute bag standing in for pynvml's ctypes result structures"""
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class SimulatedEventSet:
+    """Events delivered to one nvmlEventSet, with the masks registered per device"""
+
+    def __init__(self):
+        self.masks = {}                 # device index -> event type mask
+        self.queue = collections.deque()
+        self.ready = threading.Condition()
+
+
+class SimulatedDevice:
+    """One fake GPU; also serves as its NVML handle"""
+
+    destroyed = False
+
+    def __init__(self, index, name="NVIDIA H100 80GB HBM3", mem_total=80 * 1024 ** 3,
+                 power_limit=700000, has_fan=False, processes=2):
+        self.index = index
+        self.name = name
+        self.uuid = f"GPU-{0x5eed0000 + index:08x}-0000-4000-8000-{index:012x}"
+        self.serial = f"{1650000000000 + index}"
+        # 14 devices per PCI domain keeps bus IDs unique up to 64 devices
+        self.bus_id = f"{index // 14:08X}:{0x18 + index % 14 * 0x10:02X}:00.0"
+        self.mem_total = mem_total
+        self.power_limit = power_limit
+        self.has_fan = has_fan
+        self.lost = False
+        # (pid, used bytes) per process type; together the processes use
+        # at most ~60% of the memory however many there are
+        base = 100000 + index * max(1000, processes)
+        size = min(512 * 1024 ** 2, mem_total // (4 * max(processes, 1)))
+        self.compute = [(base + i, (i % 4 + 1) * size) for i in range(processes)]
+        self.graphics = []
+        # Peer device at the other end of each NVLink, by link number
+        self.nvlinks = []
+        # MIG devices by MIG device index; empty while MIG is disabled
+        self.mig = []
+
+    def wave(self, t, period, phase=0.0):
+        """Deterministic 0..1 signal, different per device"""
+        return 0.5 + 0.5 * math.sin(2 * math.pi * t / period + self.index + phase)
+
+    def instance_of(self, pid):
+        """The MIG device a process runs on (None while MIG is disabled)"""
+        return self.mig[pid % len(self.mig)] if self.mig else None
+
+
+class SimulatedMigDevice:
+    """
+    One 1g.10gb MIG device (GPU instance with a single compute instance)
+    of a SimulatedDevice; also serves as its NVML handle. The parent's
+    processes are spread over its MIG devices by PID.
+    """
+
+    PROFILE = "1g.10gb"
+    destroyed = False           # set once configure_mig() replaced it
+
+    def __init__(self, parent, index):
+        self.parent = parent
+        self.index = index
+        # GPU instance IDs of 1g profiles start at 7, as on A100 and H100
+        self.gpu_instance = 7 + index
+        self.compute_instance = 0
+        self.name = f"{parent.name} MIG {self.PROFILE}"
+        self.uuid = f"MIG-{0x5eed0000 + parent.index:08x}-{index:04x}-4000-8000-{parent.index:012x}"
+        self.mem_total = parent.mem_total // 8
+
+    @property
+    def lost(self):
+        return self.parent.lost
+
+    @property
+    def compute(self):
+        return [(pid, m) for pid, m in self.parent.compute if self.parent.instance_of(pid) is self]
+
+    @property
+    def graphics(self):
+        return []
+
+    def wave(self, t, period, phase=0.0):
+        return self.parent.wave(t, period, phase + 0.7 * self.index)
+
+
+class SimulatedNVML:
+    """
+    pynvml-compatible backend simulating `gpus` devices (1 to MAX_GPUS),
+    each running `processes` compute processes.
+
+    Dynamic readings are smooth functions of `clock()`, so they are
+    deterministic for a given clock; pass a constant clock for
+    reproducible runs. With `latency` (seconds) every NVML call sleeps
+    that long, like a driver round trip, releasing the GIL as ctypes
+    does. With `count_calls` every call is tallied by NVML function name
+    in `calls`.
+    """
+
+    MAX_GPUS = 64
+
+    NVML_SUCCESS = 0
+    NVML_ERROR_INVALID_ARGUMENT = 2
+    NVML_ERROR_NOT_SUPPORTED = 3
+    NVML_ERROR_NOT_FOUND = 6
+    NVML_ERROR_TIMEOUT = 10
+    NVML_ERROR_FUNCTION_NOT_FOUND = 13
+    NVML_ERROR_GPU_IS_LOST = 15
+    NVML_ERROR_RESET_REQUIRED = 16
+
+    NVML_VALUE_NOT_AVAILABLE_uint = 0xFFFFFFFF
+    NVML_DEVICE_MIG_DISABLE = 0
+    NVML_DEVICE_MIG_ENABLE = 1
+    MAX_MIG_DEVICES = 7
+
+    NVML_TEMPERATURE_GPU = 0
+    NVML_FEATURE_DISABLED = 0
+    NVML_FEATURE_ENABLED = 1
+    nvmlEventTypeSingleBitEccError = 0x1
+    nvmlEventTypeDoubleBitEccError = 0x2
+    nvmlEventTypePState = 0x4
+    nvmlEventTypeXidCriticalError = 0x8
+    nvmlEventTypeClock = 0x10
+    nvmlEventTypePowerSourceChange = 0x80
+    SUPPORTED_EVENTS = 0x9f     # all of the above
+    NVML_TOPOLOGY_INTERNAL = 0
+    NVML_TOPOLOGY_SINGLE = 10
+    NVML_TOPOLOGY_MULTIPLE = 20
+    NVML_TOPOLOGY_HOSTBRIDGE = 30
+    NVML_TOPOLOGY_NODE = 40
+    NVML_TOPOLOGY_SYSTEM = 50
+    NVML_P2P_CAPS_INDEX_READ = 0
+    NVML_P2P_CAPS_INDEX_WRITE = 1
+    NVML_P2P_CAPS_INDEX_NVLINK = 2
+    NVML_P2P_CAPS_INDEX_ATOMICS = 3
+    NVML_P2P_CAPS_INDEX_PCI = 4
+    NVML_P2P_STATUS_OK = 0
+    NVML_P2P_STATUS_NOT_SUPPORTED = 5
+    NVML_AFFINITY_SCOPE_NODE = 0
+    SOCKET_CPUS = 48
+
+    NVML_CLOCK_GRAPHICS = 0
+    NVML_CLOCK_SM = 1
+    NVML_CLOCK_MEM = 2
+    NVML_PERF_POLICY_POWER = 0
+    NVML_PERF_POLICY_THERMAL = 1
+    NVML_MEMORY_ERROR_TYPE_CORRECTED = 0
+    NVML_MEMORY_ERROR_TYPE_UNCORRECTED = 1
+    NVML_VOLATILE_ECC = 0
+    NVML_PCIE_UTIL_TX_BYTES = 0
+    NVML_PCIE_UTIL_RX_BYTES = 1
+
+    NVML_VALUE_TYPE_DOUBLE = 0
+    NVML_VALUE_TYPE_UNSIGNED_INT = 1
+    NVML_VALUE_TYPE_UNSIGNED_LONG_LONG = 3
+
+    NVML_FI_DEV_ECC_SBE_VOL_TOTAL = 3
+    NVML_FI_DEV_ECC_DBE_VOL_TOTAL = 4
+    NVML_FI_DEV_MEMORY_TEMP = 82
+    NVML_FI_DEV_TOTAL_ENERGY_CONSUMPTION = 83
+    NVML_FI_DEV_PCIE_REPLAY_COUNTER = 94
+    NVML_FI_DEV_PERF_POLICY_POWER = 132
+    NVML_FI_DEV_PERF_POLICY_THERMAL = 133
+    NVML_FI_DEV_POWER_INSTANT = 186
+    NVML_FI_DEV_NVLINK_SPEED_MBPS_COMMON = 90
+    NVML_FI_DEV_NVLINK_LINK_COUNT = 91
+    NVML_FI_DEV_NVLINK_THROUGHPUT_DATA_TX = 138
+    NVML_FI_DEV_NVLINK_THROUGHPUT_DATA_RX = 139
+    NVML_FI_DEV_NVLINK_THROUGHPUT_RAW_TX = 140
+    NVML_FI_DEV_NVLINK_THROUGHPUT_RAW_RX = 141
+    NVML_FI_DEV_NVLINK_GET_SPEED = 164
+    NVML_FI_DEV_NVLINK_GET_STATE = 165
+    NVML_FI_DEV_NVLINK_GET_VERSION = 166
+    NVML_NVLINK_MAX_LINKS = 18
+    NVLINK_SPEED = 26562        # MB/s, NVLink 4
+
+    NVMLError = NVMLError
+    NVMLError_InvalidArgument = NVMLError_InvalidArgument
+    NVMLError_NotSupported = NVMLError_NotSupported
+    NVMLError_NotFound = NVMLError_NotFound
+    NVMLError_Timeout = NVMLError_Timeout
+    NVMLError_FunctionNotFound = NVMLError_FunctionNotFound
+    NVMLError_GpuIsLost = NVMLError_GpuIsLost
+    NVMLError_ResetRequired = NVMLError_ResetRequired
+    c_nvmlFieldValue_t = c_nvmlFieldValue_t
+
+    def __init__(self, gpus=8, clock=time.monotonic, processes=2, latency=0.0, count_calls=False, mig=0):
+        if not 1 <= gpus <= self.MAX_GPUS:
+            raise ValueError(f"can simulate 1 to {self.MAX_GPUS} GPUs, not {gpus}")
+        if not 0 <= mig <= self.MAX_MIG_DEVICES:
+            raise ValueError(f"can simulate 0 to {self.MAX_MIG_DEVICES} MIG devices per GPU, not {mig}")
+        self.devices = [SimulatedDevice(i, processes=processes) for i in range(gpus)]
+        for dev in self.devices:
+            dev.mig = [SimulatedMigDevice(dev, i) for i in range(mig)]
+        if gpus > 1:
+            # Every device spreads its links over all of its peers
+            for dev in self.devices:
+                dev.nvlinks = [self.devices[(dev.index + 1 + link % (gpus - 1)) % gpus]
+                               for link in range(self.NVML_NVLINK_MAX_LINKS)]
+        self.clock = clock
+        self.initialized = 0
+        self.event_sets = []
+        self.latency = latency
+        self.calls = collections.Counter()
+        if latency or count_calls:
+            self._instrument()
+
+    # --- helpers ---
+
+    def _instrument(self):
+        """Shadow every NVML entry point with a counting, sleeping wrapper"""
+        def wrap(name, func):
+            def call(*args):
+                self.calls[name] += 1
+                if self.latency:
+                    time.sleep(self.latency)
+                return func(*args)
+            return call
+
+        for name in dir(type(self)):
+            if name.startswith("nvml") and callable(getattr(self, name)) \
+                    and not name.startswith("nvmlEventType"):
+                setattr(self, name, wrap(name, getattr(self, name)))
+        self._get_field_values = wrap("nvmlDeviceGetFieldValues", self._get_field_values)
+
+    def _device(self, handle):
+        if not self.initialized:
+            raise _error(1)
+        if handle.lost:
+            raise _error(self.NVML_ERROR_GPU_IS_LOST)
+        if handle.destroyed:
+            raise _error(self.NVML_ERROR_INVALID_ARGUMENT)
+        return handle
+
+    def _nvmlCheckReturn(self, ret):
+        if ret != self.NVML_SUCCESS:
+            raise _error(ret)
+        return ret
+
+    def _nvmlGetFunctionPointer(self, name):
+        # Raw entry points that nvsmi calls with its own ctypes buffers
+        if name == "nvmlDeviceGetFieldValues":
+            return self._get_field_values
+        raise _error(self.NVML_ERROR_FUNCTION_NOT_FOUND)
+
+    def _get_field_values(self, handle, count, values):
+        dev = self._device(handle)
+        t = self.clock()
+        for i in range(count.value):
+            v = values[i]
+            v.nvmlReturn = self.NVML_SUCCESS
+            if v.fieldId == self.NVML_FI_DEV_POWER_INSTANT:
+                v.valueType, v.value.uiVal = self.NVML_VALUE_TYPE_UNSIGNED_INT, self._power(dev, t)
+            elif v.fieldId == self.NVML_FI_DEV_MEMORY_TEMP:
+                v.valueType, v.value.uiVal = self.NVML_VALUE_TYPE_UNSIGNED_INT, self._temp(dev, t) + 8
+            elif v.fieldId == self.NVML_FI_DEV_TOTAL_ENERGY_CONSUMPTION:
+                v.valueType = self.NVML_VALUE_TYPE_UNSIGNED_LONG_LONG
+                v.value.ullVal = int(t * dev.power_limit * 0.6)
+            elif v.fieldId in (self.NVML_FI_DEV_PERF_POLICY_POWER, self.NVML_FI_DEV_PERF_POLICY_THERMAL):
+                policy = v.fieldId - self.NVML_FI_DEV_PERF_POLICY_POWER
+                v.valueType = self.NVML_VALUE_TYPE_UNSIGNED_LONG_LONG
+                v.value.ullVal = self._violation(dev, t, policy)
+            elif v.fieldId in (self.NVML_FI_DEV_ECC_SBE_VOL_TOTAL, self.NVML_FI_DEV_ECC_DBE_VOL_TOTAL,
+                               self.NVML_FI_DEV_PCIE_REPLAY_COUNTER):
+                v.valueType, v.value.ullVal = self.NVML_VALUE_TYPE_UNSIGNED_LONG_LONG, 0
+            elif v.fieldId in (self.NVML_FI_DEV_NVLINK_LINK_COUNT, self.NVML_FI_DEV_NVLINK_SPEED_MBPS_COMMON):
+                if not dev.nvlinks:
+                    v.nvmlReturn = self.NVML_ERROR_NOT_SUPPORTED
+                v.valueType = self.NVML_VALUE_TYPE_UNSIGNED_INT
+                v.value.uiVal = len(dev.nvlinks) if v.fieldId == self.NVML_FI_DEV_NVLINK_LINK_COUNT \
+                    else self.NVLINK_SPEED
+            elif self.NVML_FI_DEV_NVLINK_GET_SPEED <= v.fieldId <= self.NVML_FI_DEV_NVLINK_GET_VERSION:
+                if v.scopeId >= len(dev.nvlinks):
+                    v.nvmlReturn = self.NVML_ERROR_INVALID_ARGUMENT
+                v.valueType = self.NVML_VALUE_TYPE_UNSIGNED_INT
+                v.value.uiVal = {self.NVML_FI_DEV_NVLINK_GET_SPEED: self.NVLINK_SPEED,
+                                 self.NVML_FI_DEV_NVLINK_GET_STATE: 1,
+                                 self.NVML_FI_DEV_NVLINK_GET_VERSION: 4}[v.fieldId]
+            elif self.NVML_FI_DEV_NVLINK_THROUGHPUT_DATA_TX <= v.fieldId <= self.NVML_FI_DEV_NVLINK_THROUGHPUT_RAW_RX:
+                if v.scopeId >= len(dev.nvlinks):
+                    v.nvmlReturn = self.NVML_ERROR_INVALID_ARGUMENT
+                v.valueType = self.NVML_VALUE_TYPE_UNSIGNED_LONG_LONG
+                v.value.ullVal = self._nvlink_kib(dev, t, v.scopeId, v.fieldId)
+            else:
+                v.nvmlReturn = self.NVML_ERROR_NOT_SUPPORTED
+        return self.NVML_SUCCESS
+
+    def _util(self, dev, t):
+        return int(round(100 * dev.wave(t, 30)))
+
+    def _power(self, dev, t):
+        return int(dev.power_limit * (0.15 + 0.75 * dev.wave(t, 30)))
+
+    def _temp(self, dev, t):
+        return int(35 + 40 * dev.wave(t, 60, -0.5))
+
+    def _nvlink_kib(self, dev, t, link, field_id):
+        # Integral of a traffic rate of 0..20 GB/s following the device's
+        # utilization wave; raw counters add 10% protocol overhead
+        period, phase = 30.0, dev.index + (field_id - self.NVML_FI_DEV_NVLINK_THROUGHPUT_DATA_TX) % 2 * 0.3
+        rate = 20e9 / (1 + link % 3)
+        w = 2 * math.pi / period
+        data = rate * (0.5 * t + 0.5 * (1 - math.cos(w * t + phase)) / w)
+        if field_id >= self.NVML_FI_DEV_NVLINK_THROUGHPUT_RAW_TX:
+            data *= 1.1
+        return int(data / 1024)
+
+    def _nvlink(self, handle, link):
+        dev = self._device(handle)
+        if not dev.nvlinks:
+            raise _error(self.NVML_ERROR_NOT_SUPPORTED)
+        if not 0 <= link < len(dev.nvlinks):
+            raise _error(self.NVML_ERROR_INVALID_ARGUMENT)
+        return dev.nvlinks[link]
+
+    def _violation(self, dev, t, policy):
+        # Throttled (power: above 85% of the limit) for a share of the time
+        share = max(0.0, dev.wave(t, 30) - 0.85) if policy == self.NVML_PERF_POLICY_POWER else 0.0
+        return int(t * share * 1e9)
+
+    # --- event injection (tests and demos) ---
+
+    def inject_event(self, index, event_type, data=0):
+        """Deliver an event for device `index` to every set registered for it"""
+        dev = self.devices[index]
+        event = _Struct(device=dev, eventType=event_type, eventData=data,
+                        gpuInstanceId=0xFFFFFFFF, computeInstanceId=0xFFFFFFFF)
+        for event_set in self.event_sets:
+            if event_set.masks.get(index, 0) & event_type:
+                with event_set.ready:
+                    event_set.queue.append(event)
+                    event_set.ready.notify()
+
+    def configure_mig(self, index, count):
+        """Replace the MIG devices of device `index` with `count` new ones (0 disables MIG)"""
+        dev = self.devices[index]
+        for mig in dev.mig:
+            mig.destroyed = True
+        dev.mig = [SimulatedMigDevice(dev, i) for i in range(count)]
+
+    def start_process(self, index, pid, used=256 * 1024 ** 2):
+        self.devices[index].compute.append((pid, used))
+
+    def stop_process(self, index, pid):
+        dev = self.devices[index]
+        dev.compute = [(p, m) for p, m in dev.compute if p != pid]
+
+    def generate_events(self, interval):
+        """Inject a rotating Xid / clock / process start-exit sequence every `interval` seconds"""
+        def run():
+            step = 0
+            while True:
+                time.sleep(interval)
+                index = step % len(self.devices)
+                kind = step % 4
+                if kind == 0:
+                    self.inject_event(index, self.nvmlEventTypeXidCriticalError, 79)
+                elif kind == 1:
+                    self.inject_event(index, self.nvmlEventTypeClock)
+                elif kind == 2:
+                    self.start_process(index, 200000 + step)
+                else:
+                    self.stop_process((step - 1) % len(self.devices), 200000 + step - 1)
+                step += 1
+        threading.Thread(target=run, name="nvsmi-sim-events", daemon=True).start()
+
+    # --- pynvml interface ---
+
+    def nvmlInit(self):
+        self.initialized += 1
+
+    def nvmlShutdown(self):
+        if not self.initialized:
+            raise _error(1)
+        self.initialized -= 1
+
+    def nvmlSystemGetDriverVersion(self):
+        return "550.90.07"
+
+    def nvmlSystemGetNVMLVersion(self):
+        return "12.550.90.07"
+
+    def nvmlSystemGetCudaDriverVersion(self):
+        return 12040
+
+    def nvmlDeviceGetCount(self):
+        return len(self.devices)
+
+    def nvmlDeviceGetHandleByIndex(self, index):
+        if not 0 <= index < len(self.devices):
+            raise _error(self.NVML_ERROR_INVALID_ARGUMENT)
+        return self.devices[index]
+
+    def nvmlDeviceGetName(self, handle):
+        return self._device(handle).name
+
+    def nvmlDeviceGetUUID(self, handle):
+        return self._device(handle).uuid
+
+    def nvmlDeviceGetSerial(self, handle):
+        return self._device(handle).serial
+
+    def nvmlDeviceGetPciInfo(self, handle):
+        return _Struct(busId=self._device(handle).bus_id)
+
+    def nvmlDeviceGetMemoryInfo(self, handle):
+        dev = self._device(handle)
+        used = sum(m for _, m in dev.compute + dev.graphics) + 512 * 1024 ** 2
+        return _Struct(total=dev.mem_total, used=used, free=dev.mem_total - used)
+
+    def nvmlDeviceGetUtilizationRates(self, handle):
+        dev = self._device(handle)
+        if getattr(dev, "mig", None):
+            # Reported per MIG device only
+            raise _error(self.NVML_ERROR_NOT_SUPPORTED)
+        gpu = self._util(dev, self.clock())
+        return _Struct(gpu=gpu, memory=gpu // 2)
+
+    def nvmlDeviceGetTemperature(self, handle, sensor):
+        return self._temp(self._device(handle), self.clock())
+
+    def nvmlDeviceGetPowerUsage(self, handle):
+        return self._power(self._device(handle), self.clock())
+
+    def nvmlDeviceGetEnforcedPowerLimit(self, handle):
+        return self._device(handle).power_limit
+
+    def nvmlDeviceGetFanSpeed(self, handle):
+        dev = self._device(handle)
+        if not dev.has_fan:
+            raise _error(self.NVML_ERROR_NOT_SUPPORTED)
+        return int(30 + 50 * dev.wave(self.clock(), 60, -1.0))
+
+    def nvmlDeviceGetEncoderUtilization(self, handle):
+        self._device(handle)
+        return [0, 167000]
+
+    def nvmlDeviceGetDecoderUtilization(self, handle):
+        self._device(handle)
+        return [0, 167000]
+
+    def nvmlDeviceGetClockInfo(self, handle, clock_type):
+        dev = self._device(handle)
+        if clock_type == self.NVML_CLOCK_MEM:
+            return 2619
+        return int(1200 + 780 * dev.wave(self.clock(), 30))
+
+    def nvmlDeviceGetViolationStatus(self, handle, policy):
+        dev = self._device(handle)
+        t = self.clock()
+        return _Struct(referenceTime=int(t * 1e6), violationTime=self._violation(dev, t, policy))
+
+    def nvmlDeviceGetBAR1MemoryInfo(self, handle):
+        self._device(handle)
+        total = 128 * 1024 ** 3
+        used = 16 * 1024 ** 2
+        return _Struct(bar1Total=total, bar1Used=used, bar1Free=total - used)
+
+    def nvmlDeviceGetTotalEccErrors(self, handle, error_type, counter_type):
+        self._device(handle)
+        return 0
+
+    def nvmlDeviceGetPcieReplayCounter(self, handle):
+        self._device(handle)
+        return 0
+
+    def nvmlDeviceGetPcieThroughput(self, handle, counter):
+        dev = self._device(handle)
+        return int(2000000 * dev.wave(self.clock(), 10, counter))   # KB/s
+
+    def nvmlDeviceGetNvLinkState(self, handle, link):
+        self._nvlink(handle, link)
+        return self.NVML_FEATURE_ENABLED
+
+    def nvmlDeviceGetNvLinkVersion(self, handle, link):
+        self._nvlink(handle, link)
+        return 4
+
+    def nvmlDeviceGetNvLinkRemotePciInfo(self, handle, link):
+        return _Struct(busId=self._nvlink(handle, link).bus_id)
+
+    def _socket(self, dev):
+        # Devices are split evenly over two sockets / NUMA nodes
+        return 2 * dev.index // max(2, len(self.devices))
+
+    def nvmlDeviceGetIndex(self, handle):
+        return self._device(handle).index
+
+    def nvmlEventSetCreate(self):
+        event_set = SimulatedEventSet()
+        self.event_sets.append(event_set)
+        return event_set
+
+    def nvmlEventSetFree(self, event_set):
+        self.event_sets.remove(event_set)
+
+    def nvmlDeviceGetSupportedEventTypes(self, handle):
+        self._device(handle)
+        return self.SUPPORTED_EVENTS
+
+    def nvmlDeviceRegisterEvents(self, handle, event_types, event_set):
+        dev = self._device(handle)
+        if event_types & ~self.SUPPORTED_EVENTS:
+            raise _error(self.NVML_ERROR_NOT_SUPPORTED)
+        event_set.masks[dev.index] = event_set.masks.get(dev.index, 0) | event_types
+
+    def nvmlEventSetWait(self, event_set, timeout_ms):
+        with event_set.ready:
+            if not event_set.ready.wait_for(lambda: event_set.queue, timeout_ms / 1000):
+                raise _error(self.NVML_ERROR_TIMEOUT)
+            return event_set.queue.popleft()
+
+    def nvmlDeviceGetTopologyCommonAncestor(self, handle1, handle2):
+        dev1, dev2 = self._device(handle1), self._device(handle2)
+        if self._socket(dev1) != self._socket(dev2):
+            return self.NVML_TOPOLOGY_SYSTEM
+        if dev1.index // 2 == dev2.index // 2:
+            return self.NVML_TOPOLOGY_MULTIPLE
+        return self.NVML_TOPOLOGY_NODE
+
+    def nvmlDeviceGetP2PStatus(self, handle1, handle2, caps_index):
+        dev1, dev2 = self._device(handle1), self._device(handle2)
+        if caps_index == self.NVML_P2P_CAPS_INDEX_NVLINK and not (dev1.nvlinks and dev2.nvlinks):
+            return self.NVML_P2P_STATUS_NOT_SUPPORTED
+        return self.NVML_P2P_STATUS_OK
+
+    def nvmlDeviceGetCpuAffinity(self, handle, cpu_set_size):
+        first = self._socket(self._device(handle)) * self.SOCKET_CPUS
+        mask = ((1 << self.SOCKET_CPUS) - 1) << first
+        return [mask >> (64 * i) & (2 ** 64 - 1) for i in range(cpu_set_size)]
+
+    def nvmlDeviceGetMemoryAffinity(self, handle, node_set_size, scope):
+        mask = 1 << self._socket(self._device(handle))
+        return [mask >> (64 * i) & (2 ** 64 - 1) for i in range(node_set_size)]
+
+    def nvmlDeviceGetProcessUtilization(self, handle, last_seen_timestamp):
+        dev = self._device(handle)
+        t = self.clock()
+        # One sample per compute process every 1/6 s, like the driver's buffer
+        stamp = int(t * 6) * 1000000 // 6
+        if stamp <= last_seen_timestamp or not dev.compute:
+            raise _error(self.NVML_ERROR_NOT_FOUND)
+        util = self._util(dev, t)
+        return [_Struct(pid=pid, timeStamp=stamp, smUtil=util // (i + 1), memUtil=util // (2 * (i + 1)),
+                        encUtil=0, decUtil=0)
+                for i, (pid, _) in enumerate(dev.compute)]
+
+    def _processes(self, dev, processes):
+        result = []
+        for pid, mem in processes:
+            instance = dev.instance_of(pid) if isinstance(dev, SimulatedDevice) else dev
+            gi, ci = (self.NVML_VALUE_NOT_AVAILABLE_uint,) * 2 if instance is None else \
+                (instance.gpu_instance, instance.compute_instance)
+            result.append(_Struct(pid=pid, usedGpuMemory=mem, gpuInstanceId=gi, computeInstanceId=ci))
+        return result
+
+    def nvmlDeviceGetComputeRunningProcesses(self, handle):
+        dev = self._device(handle)
+        return self._processes(dev, dev.compute)
+
+    def nvmlDeviceGetGraphicsRunningProcesses(self, handle):
+        dev = self._device(handle)
+        return self._processes(dev, dev.graphics)
+
+    # --- MIG ---
+
+    def _parent(self, handle):
+        dev = self._device(handle)
+        if not isinstance(dev, SimulatedDevice):
+            raise _error(self.NVML_ERROR_INVALID_ARGUMENT)
+        return dev
+
+    def _mig_device(self, handle):
+        dev = self._device(handle)
+        if not isinstance(dev, SimulatedMigDevice):
+            raise _error(self.NVML_ERROR_INVALID_ARGUMENT)
+        return dev
+
+    def nvmlDeviceGetMigMode(self, handle):
+        mode = self.NVML_DEVICE_MIG_ENABLE if self._parent(handle).mig else self.NVML_DEVICE_MIG_DISABLE
+        return [mode, mode]
+
+    def nvmlDeviceGetMaxMigDeviceCount(self, handle):
+        self._parent(handle)
+        return self.MAX_MIG_DEVICES
+
+    def nvmlDeviceGetMigDeviceHandleByIndex(self, handle, index):
+        dev = self._parent(handle)
+        if not 0 <= index < self.MAX_MIG_DEVICES:
+            raise _error(self.NVML_ERROR_INVALID_ARGUMENT)
+        if index >= len(dev.mig):
+            raise _error(self.NVML_ERROR_NOT_FOUND)
+        return dev.mig[index]
+
+    def nvmlDeviceGetGpuInstanceId(self, handle):
+        return self._mig_device(handle).gpu_instance
+
+    def nvmlDeviceGetComputeInstanceId(self, handle):
+        return self._mig_device(handle).compute_instance
+
+
+def from_environment():
+    """Backend configured from NVSMI_SIM_* environment variables"""
+    backend = SimulatedNVML(gpus=int(os.environ.get("NVSMI_SIM_GPUS", "8")),
+                            processes=int(os.environ.get("NVSMI_SIM_PROCS", "2")),
+                            mig=int(os.environ.get("NVSMI_SIM_MIG", "0")),
+                            latency=float(os.environ.get("NVSMI_SIM_LATENCY_US", "0")) / 1e6)
+    events = os.environ.get("NVSMI_SIM_EVENTS")
+    if events:
+        # Seconds between generated events
+        backend.generate_events(float(events))
+    return backend
@@ -0,0 +1,215 @@
+"""
+GPU and NIC topology for `nvsmi topo`.
+
+GPU pairs are probed with nvmlDeviceGetTopologyCommonAncestor and
+nvmlDeviceGetP2PStatus, O(n^2) calls that are spread over a thread pool
+(ctypes releases the GIL while NVML works). NICs are placed from their
+PCI paths in sysfs. Topology cannot change while the driver is loaded,
+so results are plain JSON values meant to be kept with
+StaticCache.lookup() and probed once per boot and driver load.
+"""
+
+import os
+from typing import Dict, List, Optional
+import nvsmi.nvml as nvml
+
+SYSFS_PCI = "/sys/bus/pci/devices"
+SYSFS_INFINIBAND = "/sys/class/infiniband"
+
+# NVML_TOPOLOGY_* level -> matrix label
+LEVELS = {0: "PIX", 10: "PIX", 20: "PXB", 30: "PHB", 40: "NODE", 50: "SYS"}
+
+# NVML_P2P_STATUS_* -> matrix label
+P2P_STATUS = {0: "OK", 1: "CNS", 2: "GNS", 3: "TNS", 4: "NS", 5: "NS", 6: "U"}
+
+# -p2p choices -> NVML_P2P_CAPS_INDEX_* constant
+P2P_CAPS = {
+    "r": "NVML_P2P_CAPS_INDEX_READ",
+    "w": "NVML_P2P_CAPS_INDEX_WRITE",
+    "n": "NVML_P2P_CAPS_INDEX_NVLINK",
+    "a": "NVML_P2P_CAPS_INDEX_ATOMICS",
+    "p": "NVML_P2P_CAPS_INDEX_PCI",
+}
+
+
+def _parallel(func, items, workers):
+    """list(map(func, items)), on up to `workers` threads"""
+    items = list(items)
+    workers = min(workers, len(items))
+    if workers <= 1:
+        return [func(item) for item in items]
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(workers, thread_name_prefix="nvsmi-topo") as pool:
+        return list(pool.map(func, items))
+
+
+def _pairs(n):
+    return [(i, j) for i in range(n) for j in range(i + 1, n)]
+
+
+def _symmetric(n, pairs, labels):
+    matrix = [["X" if i == j else "" for j in range(n)] for i in range(n)]
+    for (i, j), label in zip(pairs, labels):
+        matrix[i][j] = matrix[j][i] = label
+    return matrix
+
+
+def _same_bus(a, b):
+    """Compare PCI bus IDs that may differ in domain width and case"""
+    return a.lower().lstrip("0") == b.lower().lstrip("0")
+
+
+def cache_name(infos) -> str:
+    """
+    StaticCache.lookup() name for the topology of these devices. It
+    changes with their bus IDs and NVLink peers, so a matrix computed
+    from outdated StaticInfo is not reused once the infos are re-read.
+    """
+    import hashlib
+    parts = [info.bus_id + "=" + ",".join(l.remote_bus_id or "" for l in info.nvlinks) for info in infos]
+    return "topology/" + hashlib.sha1(";".join(parts).encode()).hexdigest()[:16]
+
+
+def gpu_matrix(handles, infos, workers=8) -> List[List[str]]:
+    """
+    Connection label for every GPU pair: NV# for # NVLinks between them,
+    otherwise the PCIe level of their closest common ancestor
+    """
+    active = [sum(1 for l in info.nvlinks if l.remote_bus_id) for info in infos]
+
+    def probe(pair):
+        i, j = pair
+        direct = sum(1 for l in infos[i].nvlinks
+                     if l.remote_bus_id and _same_bus(l.remote_bus_id, infos[j].bus_id))
+        if direct:
+            return f"NV{direct}"
+        if active[i] and active[j]:
+            # Behind NVSwitches links end on the switch; a peer reachable
+            # over NVLink gets the full bandwidth of both devices' links
+            status = nvml.get_p2p_status(handles[i], handles[j], nvml.NVML_P2P_CAPS_INDEX_NVLINK)
+            if status == nvml.NVML_P2P_STATUS_OK:
+                return f"NV{min(active[i], active[j])}"
+        return LEVELS.get(nvml.get_topology_common_ancestor(handles[i], handles[j]), "SYS")
+
+    pairs = _pairs(len(handles))
+    return _symmetric(len(handles), pairs, _parallel(probe, pairs, workers))
+
+
+def p2p_matrix(handles, caps, workers=8) -> List[List[str]]:
+    """P2P status label for every GPU pair, for one of P2P_CAPS"""
+    index = getattr(nvml, P2P_CAPS[caps])
+
+    def probe(pair):
+        i, j = pair
+        return P2P_STATUS.get(nvml.get_p2p_status(handles[i], handles[j], index), "U")
+
+    pairs = _pairs(len(handles))
+    return _symmetric(len(handles), pairs, _parallel(probe, pairs, workers))
+
+
+def format_list(numbers: List[int]) -> str:
+    """[0, 1, 2, 5] -> '0-2,5'"""
+    ranges = []
+    for n in numbers:
+        if ranges and n == ranges[-1][1] + 1:
+            ranges[-1][1] = n
+        else:
+            ranges.append([n, n])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in ranges) or "N/A"
+
+
+def _sysfs_bdf(bus_id):
+    """NVML bus ID ('00000000:18:00.0') -> sysfs name ('0000:18:00.0')"""
+    domain, _, rest = bus_id.lower().partition(":")
+    return f"{domain[-4:]}:{rest}"
+
+
+def _read(path) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _pci_path(device_dir) -> Optional[List[str]]:
+    """Components of a PCI device's sysfs path below /sys/devices"""
+    if not os.path.exists(device_dir):
+        return None
+    path = os.path.realpath(device_dir).split(os.sep)
+    return path[path.index("devices") + 1:] if "devices" in path else None
+
+
+def _numa_node(device_dir) -> Optional[int]:
+    node = _read(os.path.join(device_dir, "numa_node"))
+    return None if node is None or int(node) < 0 else int(node)
+
+
+def pci_level(a, b, numa_a=None, numa_b=None) -> str:
+    """Matrix label for two devices from their sysfs PCI paths"""
+    if a is None or b is None:
+        return "N/A"
+    if a[0] != b[0]:
+        # Different host bridges
+        return "NODE" if numa_a is not None and numa_a == numa_b else "SYS"
+    common = 0
+    for x, y in zip(a[1:-1], b[1:-1]):
+        if x != y:
+            break
+        common += 1
+    if common == 0:
+        return "PHB"
+    # Bridges below the shared one on either side
+    below = (len(a) - 2 - common) + (len(b) - 2 - common)
+    return "PIX" if below <= 2 else "PXB"
+
+
+def nics(root=SYSFS_INFINIBAND) -> List[Dict]:
+    """RDMA NICs: name, sysfs PCI path, NUMA node and local CPUs"""
+    try:
+        names = sorted(os.listdir(root))
+    except OSError:
+        return []
+    result = []
+    for name in names:
+        device = os.path.join(root, name, "device")
+        cpus = _read(os.path.join(device, "local_cpulist"))
+        result.append({"name": name, "path": _pci_path(device), "numa": _numa_node(device),
+                       "cpus": cpus or "N/A"})
+    return result
+
+
+def probe(handles, infos, workers=8) -> Dict:
+    """
+    Everything `topo -m` shows, as a JSON-serializable dict: the GPU/NIC
+    matrix, device names, and the CPU and NUMA affinity of each row
+    """
+    gpus = gpu_matrix(handles, infos, workers)
+    nic_list = nics()
+    gpu_dirs = [os.path.join(SYSFS_PCI, _sysfs_bdf(info.bus_id)) for info in infos]
+    gpu_paths = [_pci_path(d) for d in gpu_dirs]
+    gpu_numa = [_numa_node(d) for d in gpu_dirs]
+
+    def affinity(handle):
+        try:
+            return (format_list(nvml.get_device_cpu_affinity(handle)),
+                    format_list(nvml.get_device_numa_affinity(handle)))
+        except nvml.pynvml.NVMLError:
+            return "N/A", "N/A"
+
+    rows = [row + [pci_level(gpu_paths[i], nic["path"], gpu_numa[i], nic["numa"]) for nic in nic_list]
+            for i, row in enumerate(gpus)]
+    for k, nic in enumerate(nic_list):
+        row = [pci_level(nic["path"], path, nic["numa"], numa) for path, numa in zip(gpu_paths, gpu_numa)]
+        row += ["X" if k == m else pci_level(nic["path"], other["path"], nic["numa"], other["numa"])
+                for m, other in enumerate(nic_list)]
+        rows.append(row)
+    cpus = _parallel(affinity, handles, workers)
+    cpus += [(nic["cpus"], "N/A" if nic["numa"] is None else str(nic["numa"])) for nic in nic_list]
+    return {
+        "names": [f"GPU{i}" for i in range(len(handles))] + [f"NIC{k}" for k in range(len(nic_list))],
+        "nics": [nic["name"] for nic in nic_list],
+        "matrix": rows,
+        "cpu_affinity": [c for c, _ in cpus],
+        "numa_affinity": [n for _, n in cpus],
+    }
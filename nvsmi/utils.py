@@ -1,30 +1,27 @@
-import datetime 
-import ctypes 
-import psutil
+# Heavier modules (datetime) are imported inside the
+# functions that need them so that CLI startup does not pay for them.
 
 def bytes_to_mib(bytes_val):
     """Convert bytes to MiB."""
     return bytes_val / 1024 / 1024
 
-def get_cuda_via_runtime():
-    # on Linux
-    libcudart = ctypes.CDLL("libcudart.so")
-    version = ctypes.c_int()
-    # cudaRuntimeGetVersion(&version)
-    libcudart.cudaRuntimeGetVersion(ctypes.byref(version))
-    raw = version.value
-    major = raw // 1000
-    minor = (raw % 1000) // 10
-    return f"{major}.{minor}"
+_cuda_versions = {}   # driver version -> CUDA version string
 
+def get_cuda_version(driver_version):
+    """
+    CUDA version supported by the loaded driver, e.g. "12.4".
 
-def get_process_name(pid):
-    try:
-        p = psutil.Process(pid)
-        cmd = p.cmdline()
-        return cmd[0] if cmd else "<unknown>"
-    except (psutil.NoSuchProcess, psutil.AccessDenied):
-        return "<unknown>"
-    
-def get_timestamp():
-    return datetime.datetime.now().strftime("%a %b %d %H:%M:%S %Y")
+    Read from NVML (no libcudart dlopen) and cached per driver version.
+    NVML must be initialized.
+    """
+    if driver_version not in _cuda_versions:
+        import nvsmi.nvml as nvml
+        raw = nvml.get_cuda_driver_version()
+        _cuda_versions[driver_version] = f"{raw // 1000}.{(raw % 1000) // 10}"
+    return _cuda_versions[driver_version]
+
+
+def get_timestamp(when=None):
+    import datetime
+    now = datetime.datetime.now() if when is None else datetime.datetime.fromtimestamp(when)
+    return now.strftime("%a %b %d %H:%M:%S %Y")
@@ -0,0 +1,16 @@
+import pytest
+import nvsmi.nvml as nvml
+from nvsmi.simulated import SimulatedNVML
+
+
+@pytest.fixture
+def simulated(monkeypatch, tmp_path):
+    """Install a SimulatedNVML(**options) as the NVML backend for one test"""
+    monkeypatch.setenv("NVSMI_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(nvml, "pynvml", None)   # restored after the test
+
+    def install(**options):
+        sim = SimulatedNVML(**options)
+        nvml.use_backend(sim)
+        return sim
+    return install
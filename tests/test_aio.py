@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+from nvsmi.aio import AsyncCollector
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_concurrent_opens_share_one_session(simulated):
+    sim = simulated(gpus=2, latency=0.001, count_calls=True)
+
+    async def main():
+        collector = AsyncCollector()
+        await asyncio.gather(*(collector.open() for _ in range(5)))
+        assert collector.collector is not None
+        assert sim.initialized == 1
+        await collector.close()
+        assert sim.initialized == 0
+    run(main())
+    assert sim.calls["nvmlInit"] == 1
+
+
+def test_failed_open_can_be_retried(simulated, monkeypatch):
+    sim = simulated(gpus=1)
+    real = sim.nvmlInit
+
+    def fail():
+        raise sim.NVMLError(1)
+    monkeypatch.setattr(sim, "nvmlInit", fail)
+
+    async def main():
+        collector = AsyncCollector()
+        with pytest.raises(sim.NVMLError):
+            await collector.open()
+        assert collector.collector is None
+        monkeypatch.setattr(sim, "nvmlInit", real)
+        async with collector:
+            assert collector.collector is not None
+    run(main())
+
+
+def test_concurrent_snapshots_are_coalesced(simulated):
+    sim = simulated(gpus=2, latency=0.001, count_calls=True)
+
+    async def main():
+        async with AsyncCollector() as collector:
+            first = await collector.snapshot()
+            calls = sim.calls["nvmlDeviceGetMemoryInfo"]
+            shared = await asyncio.gather(*(collector.snapshot() for _ in range(8)))
+            assert all(s is shared[0] for s in shared)
+            assert sim.calls["nvmlDeviceGetMemoryInfo"] - calls == 2   # once per GPU
+            assert shared[0] is not first
+    run(main())
+
+
+def test_snapshot_opens_on_demand(simulated):
+    simulated(gpus=3)
+
+    async def main():
+        collector = AsyncCollector()
+        snapshot = await collector.snapshot()
+        await collector.close()
+        return snapshot
+    assert len(run(main()).gpus) == 3
+
+
+def test_subscribers_share_a_sampler_and_get_the_latest(simulated):
+    simulated(gpus=1)
+
+    async def consume(collector, count, delay):
+        seen = []
+        async for snapshot in collector.stream(0.01):
+            seen.append(snapshot.timestamp)
+            if len(seen) == count:
+                return seen
+            await asyncio.sleep(delay)
+
+    async def main():
+        async with AsyncCollector() as collector:
+            fast, slow = await asyncio.gather(consume(collector, 6, 0), consume(collector, 2, 0.05))
+            assert collector._samplers == {}
+        return fast, slow
+    fast, slow = run(main())
+    assert fast == sorted(fast) and len(set(fast)) == 6
+    # The slow consumer skipped (several of) the samples taken while it slept
+    assert slow[1] - slow[0] > 0.025
+
+
+def test_stream_rejects_non_positive_interval(simulated):
+    simulated(gpus=1)
+
+    async def main():
+        async with AsyncCollector() as collector:
+            with pytest.raises(ValueError):
+                await collector.stream(0).__anext__()
+    run(main())
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import socket
+import threading
+import pytest
+from nvsmi.cli.main import main
+from nvsmi.cluster import Fleet, parse_hosts, split_host
+from nvsmi.collect import Collector
+from nvsmi.exporter import Sampler, serve
+
+
+@pytest.fixture
+def agent(simulated):
+    """Start `nvsmi serve`-style agents on loopback; returns start(gpus) -> 'host:port'"""
+    loops = []
+
+    def start(gpus=1):
+        simulated(gpus=gpus)
+        with Collector() as collector:
+            sampler = Sampler(collector, 1.0)
+            sampler.sample()
+        loop = asyncio.new_event_loop()
+        started = threading.Event()
+        ports = []
+
+        def ready(server):
+            ports.append(server.sockets[0].getsockname()[1])
+            started.set()
+        task = loop.create_task(serve(sampler, "127.0.0.1", 0, ready))
+        threading.Thread(target=loop.run_forever, daemon=True).start()
+        assert started.wait(5)
+        loops.append((loop, task))
+        return f"127.0.0.1:{ports[0]}"
+    yield start
+    for loop, task in loops:
+        loop.call_soon_threadsafe(task.cancel)
+        loop.call_soon_threadsafe(loop.stop)
+
+
+def closed_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_parse_hosts():
+    assert parse_hosts("a, b:9000\n# comment\n c  # trailing\n[::1]:1") == ["a", "b:9000", "c", "[::1]:1"]
+
+
+@pytest.mark.parametrize("host, expected", [
+    ("node1", ("node1", 9400)),
+    ("node1:9000", ("node1", 9000)),
+    ("::1", ("::1", 9400)),
+    ("[::1]:9000", ("::1", 9000)),
+    ("[fe80::1]", ("fe80::1", 9400)),
+])
+def test_split_host(host, expected):
+    assert split_host(host) == expected
+
+
+def test_query_agents(agent):
+    hosts = [agent(2), agent(3), f"127.0.0.1:{closed_port()}"]
+
+    async def main():
+        async with Fleet(hosts, timeout=5) as fleet:
+            first = await fleet.query()
+            writers = [client.writer for client in fleet.clients[:2]]
+            second = await fleet.query()
+            # Answered hosts keep their connection for the next query
+            assert [client.writer for client in fleet.clients[:2]] == writers
+            return first, second
+    first, second = asyncio.run(main())
+    for results in (first, second):
+        assert [r.host for r in results] == hosts
+        assert [len(r.snapshot.gpus) for r in results[:2]] == [2, 3]
+        assert results[2].snapshot is None and results[2].error
+
+
+async def fake_agent(response, hang=False):
+    async def handle(reader, writer):
+        await reader.readuntil(b"\r\n\r\n")
+        if hang:
+            await asyncio.sleep(60)
+        writer.write(response)
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, f"127.0.0.1:{server.sockets[0].getsockname()[1]}"
+
+
+@pytest.mark.parametrize("response, error", [
+    (b"HTTP/1.1 200 OK\r\nContent-Length: x\r\n\r\n{}", "bad Content-Length: 'x'"),
+    (b"HTTP/1.1 200 OK\r\nContent-Length: -1\r\n\r\n", "bad Content-Length: '-1'"),
+    (b"HTTP/1.1 200 OK\r\n\r\n", "response without Content-Length"),
+    (b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\n\r\n", "503 Service Unavailable"),
+    (b"HTTP/1.1 200 OK\r\nContent-Length: 4\r\n\r\nnope", "bad snapshot"),
+])
+def test_bad_responses_close_the_connection(response, error):
+    async def main():
+        server, host = await fake_agent(response)
+        async with server:
+            async with Fleet([host], timeout=5) as fleet:
+                [result] = await fleet.query()
+                assert fleet.clients[0].writer is None
+                return result
+    result = asyncio.run(main())
+    assert result.snapshot is None and result.error.startswith(error)
+
+
+def test_timeout():
+    async def main():
+        server, host = await fake_agent(b"", hang=True)
+        async with server:
+            async with Fleet([host], timeout=0.05) as fleet:
+                [result] = await fleet.query()
+                assert fleet.clients[0].writer is None
+                return result
+    assert asyncio.run(main()).error == "timed out after 0.05 s"
+
+
+def test_command_ndjson(agent, capsys):
+    hosts = [agent(1), agent(2)]
+    assert main(["cluster", "-H", ",".join(hosts), "--format", "ndjson"]) is None
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert sorted((line["host"], line["gpu"]) for line in lines) == \
+        sorted([(hosts[0], 0), (hosts[1], 0), (hosts[1], 1)])
+
+
+@pytest.mark.parametrize("argv, error", [
+    (["-H", " , "], "no hosts given"),
+    (["-H", "node1:http"], "bad host 'node1:http'"),
+    (["-f", "/nonexistent/hosts"], "No such file"),
+])
+def test_command_errors(capsys, argv, error):
+    assert main(["cluster", *argv]) == 1
+    assert error in capsys.readouterr().err
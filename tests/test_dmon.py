@@ -0,0 +1,34 @@
+import pytest
+from nvsmi.cli.main import main
+
+
+def run(simulated, capsys, *argv):
+    simulated(gpus=2)
+    code = main(["dmon", "-d", "0.001", *argv])
+    out, err = capsys.readouterr()
+    return code, out.splitlines(), err
+
+
+@pytest.mark.parametrize("every, headers", [("20", 1), ("3", 2), ("2", 4), ("0", 1)])
+def test_header_is_repeated_between_intervals(simulated, capsys, every, headers):
+    code, lines, _ = run(simulated, capsys, "-c", "4", "--header-every", every)
+    assert code is None
+    # Two header lines per header, two GPUs per interval
+    assert len(lines) == 2 * headers + 8
+    for i, line in enumerate(lines):
+        if line.startswith("# gpu"):
+            assert lines[i + 1].startswith("# Idx")
+            assert (len(lines) - i - 2) % 2 == 0   # never between an interval's rows
+
+
+def test_selected_groups(simulated, capsys):
+    _, lines, _ = run(simulated, capsys, "-c", "1", "-s", "um", "-o", "T")
+    assert lines[0].lstrip("#").split() == ["Time", "gpu", "sm", "mem", "enc", "dec", "fb", "bar1"]
+    assert len(lines) == 4
+
+
+@pytest.mark.parametrize("argv", [["-s", "pz"], ["--header-every", "-1"], ["-d", "0"]])
+def test_invalid_options(simulated, capsys, argv):
+    simulated(gpus=1)
+    assert main(["dmon", *argv]) == 1
+    assert capsys.readouterr().err.startswith("Error: ")
@@ -0,0 +1,89 @@
+import json
+import os
+import threading
+import pytest
+from nvsmi.cli.main import main
+from nvsmi.events import EventListener
+from nvsmi.proc import ProcessCache
+
+
+def drain(listener, timeout=0.2):
+    events = []
+    while (event := listener.wait(timeout)) is not None:
+        events.append(event)
+    return events
+
+
+def test_process_start_and_exit(simulated):
+    sim = simulated(gpus=2, processes=2)
+    with EventListener(["process"], process_interval=0.01) as listener:
+        sim.start_process(1, os.getpid())
+        sim.stop_process(0, 100000)
+        events = drain(listener)
+    assert [(e.gpu, e.type, e.data) for e in events] == [
+        (0, "process_exit", 100000),
+        (1, "process_start", os.getpid()),
+    ]
+    assert events[1].detail == ProcessCache().names([os.getpid()])[os.getpid()]
+
+
+def test_unchanged_processes_report_nothing(simulated):
+    simulated(gpus=2)
+    with EventListener(["process"], process_interval=0.01) as listener:
+        assert listener.wait(0.05) is None
+
+
+def test_process_lists_only_on_selected_gpus(simulated):
+    sim = simulated(gpus=3)
+    with EventListener(["process"], indices=[2], process_interval=0.01) as listener:
+        sim.start_process(0, 300000)
+        sim.start_process(2, 300001)
+        events = drain(listener)
+    assert [(e.gpu, e.data) for e in events] == [(2, 300001)]
+
+
+def test_unreadable_process_list_is_skipped_until_it_recovers(simulated):
+    sim = simulated(gpus=1)
+    with EventListener(["process"], process_interval=0.01) as listener:
+        sim.devices[0].lost = True
+        sim.start_process(0, 300000)
+        assert listener.wait(0.05) is None
+        sim.devices[0].lost = False
+        sim.stop_process(0, 100000)
+        # The first readable list only re-establishes the baseline
+        assert listener.wait(0.05) is None
+        sim.stop_process(0, 100001)
+        events = drain(listener)
+    assert [(e.type, e.data) for e in events] == [("process_exit", 100001)]
+
+
+def test_nvml_events(simulated):
+    sim = simulated(gpus=2)
+    with EventListener(["xid", "clock"]) as listener:
+        sim.inject_event(1, sim.nvmlEventTypeXidCriticalError, 79)
+        sim.inject_event(0, sim.nvmlEventTypePState)   # not registered
+        sim.inject_event(0, sim.nvmlEventTypeClock)
+        events = drain(listener, 0.05)
+    assert [(e.gpu, e.type) for e in events] == [(1, "xid"), (0, "clock")]
+    assert events[0].data == 79
+    assert events[0].gpu_instance is None
+    assert events[1].detail.startswith("graphics ")
+
+
+def test_unknown_kind(simulated):
+    simulated(gpus=1)
+    with pytest.raises(ValueError, match="bogus"):
+        EventListener(["xid", "bogus"])
+
+
+def test_command_stops_after_count(simulated, capsys):
+    sim = simulated(gpus=1)
+
+    def inject():
+        for _ in range(3):
+            sim.inject_event(0, sim.nvmlEventTypeXidCriticalError, 79)
+    threading.Timer(0.05, inject).start()
+    assert main(["events", "-e", "xid", "-c", "2", "--format", "ndjson"]) is None
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 2
+    assert [json.loads(line)["type"] for line in lines] == ["xid", "xid"]
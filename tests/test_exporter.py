@@ -0,0 +1,118 @@
+import asyncio
+import json
+from nvsmi.collect import Collector
+from nvsmi.exporter import Sampler, serve
+from nvsmi.formatter.openmetrics.summary import format_metrics
+from nvsmi.history import History
+from nvsmi.models.models import GPUInfo, Snapshot
+
+MIB = 1024 * 1024
+
+
+def samples(lines, name):
+    """{labels: value} of the samples of one metric"""
+    prefix = name + "{"
+    return {line[len(prefix):line.index("}")]: line.rpartition(" ")[2]
+            for line in lines if line.startswith(prefix)}
+
+
+def take(simulated, **options):
+    simulated(**options)
+    with Collector() as collector:
+        return collector.snapshot()
+
+
+def test_format_metrics(simulated):
+    snapshot = take(simulated, gpus=2, processes=2)
+    text = format_metrics(snapshot)
+    lines = text.splitlines()
+    assert text.endswith("# EOF\n")
+    assert samples(lines, "nvsmi_gpu_up") == {'gpu="0"': "1", 'gpu="1"': "1"}
+    memory = samples(lines, "nvsmi_gpu_memory_used_bytes")
+    assert memory['gpu="1"'] == str(snapshot.gpus[1].mem_used * MIB)
+    assert len(samples(lines, "nvsmi_process_memory_used_bytes")) == len(snapshot.processes)
+    # Every sample belongs to a family declared before it
+    declared = set()
+    for line in lines[:-1]:
+        if line.startswith("# TYPE "):
+            declared.add(line.split()[2])
+        elif not line.startswith("#"):
+            name = line.split("{")[0].split()[0]
+            assert name in declared or name.rpartition("_")[0] in declared
+
+
+def test_failed_gpu_is_down(simulated):
+    snapshot = take(simulated, gpus=2)
+    snapshot.gpus[1] = GPUInfo.unavailable(1, "GPU is lost")
+    lines = format_metrics(snapshot).splitlines()
+    assert samples(lines, "nvsmi_gpu_up") == {'gpu="0"': "1", 'gpu="1"': "0"}
+    assert list(samples(lines, "nvsmi_gpu_temperature_celsius")) == ['gpu="0"']
+
+
+def test_window_values_are_exact():
+    history = History(8)
+    gpu = lambda used: GPUInfo(0, "GPU", "00000000:01:00.0", 30, 50, 300, used, 81559, 75)
+    for t, used in enumerate((81234, 81235, 81236)):
+        snapshot = Snapshot(1000.0 + t, "550.90.07", "12.4", [gpu(used)])
+        history.record(snapshot)
+    lines = format_metrics(snapshot, history, 60).splitlines()
+    window = samples(lines, "nvsmi_gpu_memory_used_bytes_window")
+    # 85182119936 has more digits than {:g} keeps
+    assert window['gpu="0",stat="max"'] == str(81236 * MIB)
+    assert window['gpu="0",stat="min"'] == str(81234 * MIB)
+    assert float(window['gpu="0",stat="mean"']) == 81235 * MIB
+    assert samples(lines, "nvsmi_gpu_utilization_percent_window")['gpu="0",stat="p99"'] == "75"
+
+
+async def fetch(port, *requests):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    responses = []
+    for request in requests:
+        writer.write(request)
+        head = await reader.readuntil(b"\r\n\r\n")
+        status = head.split(b"\r\n", 1)[0].decode()
+        length = int(head.lower().split(b"content-length: ")[1].split(b"\r\n")[0])
+        responses.append((status, await reader.readexactly(length)))
+    writer.close()
+    return responses
+
+
+def test_server(simulated):
+    simulated(gpus=2)
+    with Collector() as collector:
+        sampler = Sampler(collector, 1.0)
+        sampler.sample()
+
+    async def main():
+        ready = asyncio.get_running_loop().create_future()
+        task = asyncio.ensure_future(serve(sampler, "127.0.0.1", 0, ready.set_result))
+        server = await ready
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await fetch(port,
+                               b"GET /metrics HTTP/1.1\r\nHost: x\r\n\r\n",
+                               b"GET /snapshot HTTP/1.1\r\n\r\n",
+                               b"GET /missing HTTP/1.1\r\n\r\n",
+                               b"POST /metrics HTTP/1.1\r\n\r\n")
+        finally:
+            task.cancel()
+
+    (metrics, snapshot, missing, bad) = asyncio.run(main())
+    assert metrics[0] == "HTTP/1.1 200 OK" and metrics[1].endswith(b"# EOF\n")
+    assert snapshot[0] == "HTTP/1.1 200 OK"
+    assert len(json.loads(snapshot[1])["gpus"]) == 2
+    assert missing[0] == "HTTP/1.1 404 Not Found"
+    assert bad[0] == "HTTP/1.1 400 Bad Request"
+
+
+def test_sampler_reports_first_failure():
+    class Failing:
+        def snapshot(self):
+            raise RuntimeError("boom")
+
+    sampler = Sampler(Failing(), 0.01)
+    sampler.start()
+    assert sampler.ready.wait(5)
+    sampler.stop()
+    sampler.join()
+    assert sampler.snapshot is None and str(sampler.error) == "boom"
@@ -0,0 +1,83 @@
+import pytest
+import nvsmi.nvml as nvml
+from nvsmi.simulated import NVMLError_FunctionNotFound, NVMLError_NotSupported
+
+
+@pytest.fixture
+def device(simulated):
+    """(simulator, handle of GPU 0) inside an NVML session"""
+    sim = simulated(gpus=1, count_calls=True)
+    nvml.initialize()
+    yield sim, nvml.get_device_handle_by_index(0)
+    nvml.shutdown()
+
+
+def metrics(calls):
+    """Power by field ID with a counted fallback, and temperature by its call only"""
+    def power(handle):
+        calls.append("power")
+        return nvml.get_device_power_usage(handle)
+
+    def temp(handle):
+        calls.append("temp")
+        return 42
+    return [("power", "NVML_FI_DEV_POWER_INSTANT", power), ("temp", None, temp)]
+
+
+def test_fields_are_batched(device):
+    sim, handle = device
+    calls = []
+    reader = nvml.FieldReader(handle, metrics(calls))
+    for _ in range(3):
+        values = reader.read()
+        assert values["power"] > 0 and values["temp"] == 42
+    assert calls == ["temp"] * 3
+    assert sim.calls["nvmlDeviceGetFieldValues"] == 3
+
+
+def test_unbatched(device):
+    sim, handle = device
+    calls = []
+    reader = nvml.FieldReader(handle, metrics(calls), batch=False)
+    assert reader.read()["power"] > 0
+    assert calls == ["power", "temp"]
+    assert sim.calls["nvmlDeviceGetFieldValues"] == 0
+
+
+def test_rejected_field_moves_to_its_fallback(device, monkeypatch):
+    sim, handle = device
+    monkeypatch.setattr(sim, "NVML_FI_DEV_UNKNOWN", 9999, raising=False)
+    calls = []
+    reader = nvml.FieldReader(handle, metrics(calls) + [("other", "NVML_FI_DEV_UNKNOWN",
+                                                         lambda h: calls.append("other") or 7)])
+    for _ in range(2):
+        assert reader.read()["other"] == 7
+    assert calls == ["temp", "other"] * 2
+    assert [key for key, _, _ in reader.batched] == ["power"]
+
+
+def test_driver_without_field_values(device, monkeypatch):
+    sim, handle = device
+
+    def missing(name):
+        raise NVMLError_FunctionNotFound(sim.NVML_ERROR_FUNCTION_NOT_FOUND)
+    monkeypatch.setattr(sim, "_nvmlGetFunctionPointer", missing)
+    calls = []
+    reader = nvml.FieldReader(handle, metrics(calls))
+    for _ in range(2):
+        assert reader.read()["power"] > 0
+    assert sorted(calls) == ["power", "power", "temp", "temp"]
+    assert reader.batched == []
+
+
+def test_not_supported_fallback_is_remembered(device):
+    _, handle = device
+    calls = []
+
+    def unsupported(handle):
+        calls.append("fan")
+        raise NVMLError_NotSupported(3)
+    reader = nvml.FieldReader(handle, [("fan", None, unsupported)])
+    assert reader.read() == {"fan": None}
+    assert reader.read() == {"fan": None}
+    assert calls == ["fan"]
@@ -0,0 +1,63 @@
+import pytest
+from nvsmi.history import DeviceHistory, History
+from nvsmi.models.models import GPUInfo, Snapshot
+
+
+def filled(values, capacity=None):
+    history = DeviceHistory(capacity or len(values), metrics=["util"])
+    for t, value in enumerate(values):
+        history.append(float(t), [value])
+    return history
+
+
+def test_percentiles_are_nearest_rank():
+    stats = filled(list(range(1, 101))).stats("util", 1000)
+    assert (stats.count, stats.min, stats.max, stats.mean) == (100, 1, 100, 50.5)
+    assert (stats.p50, stats.p95, stats.p99) == (50, 95, 99)
+
+
+def test_window_only_covers_recent_samples():
+    history = filled([10, 20, 30, 40, 50])
+    stats = history.stats("util", 2)          # t = 2, 3, 4
+    assert (stats.count, stats.min, stats.max, stats.mean) == (3, 30, 50, 40)
+    assert history.stats("util", 2, now=10.0) is None
+
+
+def test_ring_overwrites_oldest():
+    history = filled([1, 2, 3, 4, 5, 6, 7], capacity=3)
+    assert len(history) == 3
+    stats = history.stats("util", 1000)
+    assert (stats.count, stats.min, stats.max) == (3, 5, 7)
+
+
+def test_missing_values_are_gaps():
+    stats = filled([None, 4, None, 8]).stats("util", 1000)
+    assert (stats.count, stats.mean) == (2, 6)
+    assert filled([None, None]).stats("util", 1000) is None
+
+
+def test_time_going_backwards_keeps_order():
+    history = DeviceHistory(4, metrics=["util"])
+    for t, value in [(10.0, 1), (11.0, 2), (5.0, 3), (12.0, 4)]:
+        history.append(t, [value])
+    # The step back is stored at the previous timestamp
+    assert list(history.times) == [10.0, 11.0, 11.0, 12.0]
+    assert history.stats("util", 1).count == 3
+
+
+def test_invalid_capacity():
+    with pytest.raises(ValueError):
+        DeviceHistory(0)
+
+
+def test_history_from_snapshots():
+    history = History.for_window(10, 1.0)
+    assert history.capacity == 11
+    for t in range(20):
+        gpus = [GPUInfo(0, "GPU", "00000000:01:00.0", 30, 40 + t, 300, 1000, 2000, t),
+                GPUInfo.unavailable(1, "GPU is lost")]
+        history.record(Snapshot(100.0 + t, "550", "12.4", gpus))
+    stats = history.stats(0, "temp", 10)
+    assert (stats.count, stats.min, stats.max) == (11, 49, 59)
+    assert history.stats(1, "temp", 10) is None
+    assert history.stats(2, "temp", 10) is None
@@ -0,0 +1,69 @@
+import argparse
+import pytest
+import nvsmi.loop as loop
+
+
+class FakeClock:
+    """Clock that only advances when slept on or moved by the test"""
+
+    def __init__(self):
+        self.now = 100.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def test_ticker_does_not_drift():
+    clock = FakeClock()
+    ticker = loop.Ticker(1.0, clock=clock, sleep=clock.sleep)
+    for work in (0.2, 0.5, 0.9, 0.0):
+        clock.now += work
+        assert ticker.wait() == 0
+    # Deadlines stay on the grid however long each iteration took
+    assert clock.now == pytest.approx(104.0)
+    assert clock.slept == pytest.approx([0.8, 0.5, 0.1, 1.0])
+    assert ticker.missed == 0
+
+
+def test_ticker_skips_missed_ticks():
+    clock = FakeClock()
+    ticker = loop.Ticker(1.0, clock=clock, sleep=clock.sleep)
+    clock.now += 3.5                # overran the first tick and two more
+    assert ticker.wait() == 3
+    assert clock.now == pytest.approx(104.0)
+    clock.now += 0.1
+    assert ticker.wait() == 0
+    assert clock.now == pytest.approx(105.0)
+    assert ticker.missed == 3
+
+
+def test_run_every_stops_after_count():
+    calls = []
+    loop.run_every(0.001, lambda: calls.append(1), count=3)
+    assert len(calls) == 3
+
+
+def parse(argv):
+    parser = argparse.ArgumentParser()
+    loop.add_loop_arguments(parser)
+    return parser.parse_args(argv)
+
+
+@pytest.mark.parametrize("argv, interval", [([], None), (["-l", "2"], 2.0),
+                                            (["-lms", "250"], 0.25)])
+def test_interval_from_args(argv, interval):
+    assert loop.interval_from_args(parse(argv)) == interval
+
+
+@pytest.mark.parametrize("argv", [["-l", "0"], ["-l", "-1"], ["-l", "nan"], ["-lms", "0"],
+                                  ["-lms", "1.5"], ["-l", "1", "-lms", "100"]])
+def test_invalid_loop_arguments_are_usage_errors(argv, capsys):
+    with pytest.raises(SystemExit) as exit:
+        parse(argv)
+    assert exit.value.code == 2
+    assert "error:" in capsys.readouterr().err
@@ -0,0 +1,91 @@
+import pytest
+from nvsmi.collect import Collector
+from nvsmi.mig import NO_INSTANCE, instance_id
+from nvsmi.simulated import SimulatedMigDevice
+
+
+def test_instance_id():
+    assert instance_id(None) is None
+    assert instance_id(NO_INSTANCE) is None
+    assert instance_id(0) == 0
+
+
+def test_mig_disabled(simulated):
+    simulated(gpus=2)
+    with Collector() as collector:
+        snapshot = collector.snapshot()
+    assert [g.mig_mode for g in snapshot.gpus] == [False, False]
+    assert all(g.mig == [] for g in snapshot.gpus)
+    assert all(p.gpu_instance is None and p.compute_instance is None for p in snapshot.processes)
+
+
+@pytest.mark.parametrize("workers", [1, 8])
+def test_mig_devices(simulated, workers):
+    sim = simulated(gpus=2, processes=3, mig=3)
+    with Collector(workers=workers) as collector:
+        snapshot = collector.snapshot()
+    for gpu, dev in zip(snapshot.gpus, sim.devices):
+        assert gpu.mig_mode is True
+        assert [m.index for m in gpu.mig] == [0, 1, 2]
+        assert [m.uuid for m in gpu.mig] == [m.uuid for m in dev.mig]
+        assert [(m.gpu_instance, m.compute_instance) for m in gpu.mig] == [(7, 0), (8, 0), (9, 0)]
+        assert all(m.profile == "1g.10gb" for m in gpu.mig)
+
+
+def test_processes_attributed_to_instances(simulated):
+    sim = simulated(gpus=2, processes=3, mig=2)
+    with Collector() as collector:
+        snapshot = collector.snapshot()
+    assert snapshot.processes
+    for p in snapshot.processes:
+        instance = sim.devices[p.gpu].instance_of(p.pid)
+        assert (p.gpu_instance, p.compute_instance) == (instance.gpu_instance, instance.compute_instance)
+        mig = {(m.gpu_instance, m.compute_instance) for m in snapshot.gpus[p.gpu].mig}
+        assert (p.gpu_instance, p.compute_instance) in mig
+
+
+def test_reconfiguration_is_picked_up(simulated):
+    sim = simulated(gpus=2, processes=2, mig=2)
+    with Collector(workers=4) as collector:
+        assert [len(g.mig) for g in collector.snapshot().gpus] == [2, 2]
+        sim.configure_mig(0, 4)
+        # The next snapshot fails on the destroyed MIG devices and invalidates
+        # the GPU; the one after that sees the new layout
+        stale = collector.snapshot().gpus[0].mig
+        assert len(stale) == 2 and all(m.error for m in stale)
+        assert [len(g.mig) for g in collector.snapshot().gpus] == [4, 2]
+        sim.configure_mig(1, 0)
+        collector.snapshot()
+        snapshot = collector.snapshot()
+        assert [g.mig_mode for g in snapshot.gpus] == [True, False]
+        assert all(p.gpu_instance is None for p in snapshot.processes if p.gpu == 1)
+
+
+def test_walk_queries_each_gpu_once(simulated):
+    sim = simulated(gpus=2, mig=3, count_calls=True)
+    with Collector() as collector:
+        walked = sim.calls.get("nvmlDeviceGetMigDeviceHandleByIndex", 0)
+        for _ in range(3):
+            collector.snapshot()
+        assert sim.calls.get("nvmlDeviceGetMigDeviceHandleByIndex", 0) == walked
+
+
+def test_unreadable_mig_memory_is_recorded(simulated, monkeypatch):
+    sim = simulated(gpus=2, mig=2, count_calls=True)
+    memory_info = sim.nvmlDeviceGetMemoryInfo
+
+    def no_mig_memory(handle):
+        if isinstance(handle, SimulatedMigDevice):
+            raise sim.NVMLError_NotSupported(sim.NVML_ERROR_NOT_SUPPORTED)
+        return memory_info(handle)
+    monkeypatch.setattr(sim, "nvmlDeviceGetMemoryInfo", no_mig_memory)
+    with Collector() as collector:
+        walked = sim.calls.get("nvmlDeviceGetMigDeviceHandleByIndex", 0)
+        for _ in range(2):
+            snapshot = collector.snapshot()
+        # Not an NVML failure of the instance: the layout is not walked again
+        assert sim.calls.get("nvmlDeviceGetMigDeviceHandleByIndex", 0) == walked
+    for gpu in snapshot.gpus:
+        assert gpu.error is None and gpu.mem_total > 0
+        assert [m.index for m in gpu.mig] == [0, 1]
+        assert all(m.error and m.mem_total == 0 for m in gpu.mig)
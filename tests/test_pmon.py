@@ -0,0 +1,66 @@
+import pytest
+import nvsmi.nvml as nvml
+from nvsmi.cli.commands.pmon import DeviceSampler
+from nvsmi.cli.main import main
+from nvsmi.simulated import NVMLError_NotSupported
+
+
+class Clock:
+    def __init__(self):
+        self.now = 10.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def sampler(simulated):
+    clock = Clock()
+    sim = simulated(gpus=1, processes=2, clock=clock, count_calls=True)
+    nvml.initialize()
+    yield sim, clock, DeviceSampler(nvml.get_device_handle_by_index(0))
+    nvml.shutdown()
+
+
+def test_only_new_samples_are_requested(sampler):
+    sim, clock, device = sampler
+    first = device.utilization()
+    assert sorted(first) == [100000, 100001]
+    seen = device.last_seen
+    assert seen > 0
+    # No new sample within the same sixth of a second
+    assert device.utilization() == {}
+    clock.now += 1
+    assert sorted(device.utilization()) == [100000, 100001]
+    assert device.last_seen > seen
+
+
+def test_not_supported_is_no_samples(sampler, monkeypatch):
+    sim, _, device = sampler
+
+    def unsupported(handle, last_seen):
+        sim.calls["unsupported"] += 1
+        raise NVMLError_NotSupported(3)
+    monkeypatch.setattr(sim, "nvmlDeviceGetProcessUtilization", unsupported)
+    assert device.utilization() == {}
+    assert device.utilization() == {}
+    assert sim.calls["unsupported"] == 1
+    assert [pid for pid, _, _ in device.processes()] == [100000, 100001]
+
+
+def test_pmon_rows(simulated, capsys, monkeypatch):
+    sim = simulated(gpus=2, processes=2)
+    monkeypatch.setattr(sim, "nvmlDeviceGetProcessUtilization",
+                        lambda handle, last_seen: (_ for _ in ()).throw(NVMLError_NotSupported(3)))
+    assert main(["pmon", "-c", "1", "-d", "0.001", "-s", "um", "-i", "1"]) is None
+    lines = capsys.readouterr().out.splitlines()
+    rows = [line.split() for line in lines if not line.startswith("#")]
+    assert [(row[0], row[1], row[2]) for row in rows] == [("1", "101000", "C"), ("1", "101001", "C")]
+    assert all(row[3:7] == ["-"] * 4 for row in rows)
+
+
+@pytest.mark.parametrize("argv", [["-s", "ux"], ["-d", "0"], ["-d", "-1"]])
+def test_invalid_options(simulated, capsys, argv):
+    simulated(gpus=1)
+    assert main(["pmon", *argv]) == 1
+    assert capsys.readouterr().err.startswith("Error: ")
@@ -0,0 +1,60 @@
+import os
+import pytest
+from nvsmi.proc import UNKNOWN, ProcessCache
+
+
+class FakeProcesses:
+    """Stand-in for /proc: pid -> (start time, name), counting name reads"""
+
+    def __init__(self, **processes):
+        self.table = {int(pid[1:]): entry for pid, entry in processes.items()}
+        self.reads = []
+
+    def install(self, cache):
+        cache._start_time = lambda pid: self.table.get(pid, (None,))[0]
+        cache._name = self.read_name
+        return cache
+
+    def read_name(self, pid):
+        self.reads.append(pid)
+        return self.table[pid][1]
+
+
+def test_names_are_cached():
+    procs = FakeProcesses(p10=(1, "python"), p11=(2, "train"))
+    cache = procs.install(ProcessCache())
+    assert cache.names([10, 11]) == {10: "python", 11: "train"}
+    assert cache.names([10, 11, 10]) == {10: "python", 11: "train"}
+    assert sorted(procs.reads) == [10, 11]
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_reused_pid_is_looked_up_again():
+    procs = FakeProcesses(p10=(1, "python"))
+    cache = procs.install(ProcessCache())
+    assert cache.names([10]) == {10: "python"}
+    procs.table[10] = (5, "other")      # pid 10 exited and was handed out again
+    assert cache.names([10]) == {10: "other"}
+    assert procs.reads == [10, 10]
+    assert cache.entries == {10: (5, "other")}
+
+
+def test_exited_processes_are_evicted():
+    procs = FakeProcesses(p10=(1, "python"), p11=(2, "train"))
+    cache = procs.install(ProcessCache())
+    cache.names([10, 11])
+    del procs.table[11]
+    assert cache.names([10, 11]) == {10: "python", 11: UNKNOWN}
+    del procs.table[10]
+    cache.names([])
+    assert cache.entries == {}
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self"), reason="needs /proc")
+def test_reads_proc():
+    cache = ProcessCache()
+    pid = os.getpid()
+    name = cache.names([pid])[pid]
+    assert name == open(f"/proc/{pid}/cmdline", "rb").read().split(b"\0")[0].decode()
+    owner = cache.owners([pid])[pid]
+    assert owner.uid == os.getuid()
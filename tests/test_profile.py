@@ -0,0 +1,76 @@
+import pytest
+import nvsmi.nvml as nvml
+import nvsmi.profile as profile
+from nvsmi.cli.main import main
+from nvsmi.collect import Collector
+
+
+@pytest.fixture
+def profiling():
+    """Profile NVML calls for one test"""
+    yield profile.enable()
+    profile.disable()
+
+
+def test_call_stats():
+    stats = profile.CallStats()
+    for elapsed in (2e-5, 2e-5, 3e-4, 0.2):
+        stats.add(elapsed)
+    stats.add(4e-3, "NVMLError_Timeout")
+    assert stats.count == 5 and stats.error_count == 1
+    assert stats.mean == pytest.approx(0.20434 / 5)
+    assert stats.max == 0.2
+    assert sum(stats.histogram) == 5 and stats.histogram[-1] == 1
+    assert stats.percentile(40) == 2.5e-5     # bucket bound
+    assert stats.percentile(100) == 0.2       # capped at the largest call
+    assert profile.CallStats().percentile(50) == 0.0
+
+
+def test_counts_match_the_backend(simulated, profiling):
+    sim = simulated(gpus=2, count_calls=True)
+    assert isinstance(nvml.pynvml, profile.InstrumentedBackend)
+    with Collector() as collector:
+        collector.snapshot()
+        collector.snapshot()
+    assert {name: s.count for name, s in profiling.functions.items()} == dict(sim.calls)
+    assert profiling.calls == sum(sim.calls.values())
+    memory = {gpu: s.count for (name, gpu), s in profiling.devices.items() if name == "nvmlDeviceGetMemoryInfo"}
+    assert sorted(memory) == [0, 1] and memory[0] == memory[1]
+    assert sum(memory.values()) == sim.calls["nvmlDeviceGetMemoryInfo"]
+
+
+def test_errors_are_counted_per_device(simulated, profiling):
+    sim = simulated(gpus=2)
+    with Collector() as collector:
+        sim.devices[1].lost = True
+        collector.snapshot()
+    lost = {(name, gpu): s.errors["NVMLError_GpuIsLost"]
+            for (name, gpu), s in profiling.devices.items() if "NVMLError_GpuIsLost" in s.errors}
+    # The collector gives up on a lost GPU after its first failed call
+    [(name, gpu)] = lost
+    assert gpu == 1 and lost[name, gpu] == 1
+    assert profiling.functions[name].errors["NVMLError_GpuIsLost"] == 1
+    assert f"{name}: " in profiling.report()
+
+
+def test_disable_restores_the_backend(simulated):
+    sim = simulated(gpus=1)
+    first = profile.enable()
+    try:
+        assert profile.enable() is first
+        assert nvml.pynvml._backend is sim
+    finally:
+        assert profile.disable() is first
+    assert nvml.pynvml is sim
+    assert profile.disable() is None
+
+
+def test_profile_option(simulated, capsys):
+    simulated(gpus=2)
+    assert main(["usage", "--no-shm", "--profile"]) is None
+    err = capsys.readouterr().err.splitlines()
+    assert err[0].startswith("NVML calls: ") and err[0].endswith(" errors)")
+    assert err[1].split()[:3] == ["Function", "Calls", "Errors"]
+    assert any(line.startswith("Time per GPU (ms): 0: ") for line in err)
+    assert err[-1].startswith("Process cache: ")
+    assert profile.active is None and not isinstance(nvml.pynvml, profile.InstrumentedBackend)
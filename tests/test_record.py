@@ -0,0 +1,129 @@
+import os
+import pytest
+from nvsmi.cli.main import main
+from nvsmi.collect import Collector
+from nvsmi.record import (FILE_HEADER, MAGIC, VERSION, Recording, RecordingError, RecordWriter,
+                          decode, encode)
+
+
+def snapshots(simulated, count=3, **options):
+    simulated(**options)
+    with Collector() as collector:
+        return [collector.snapshot() for _ in range(count)]
+
+
+def round_trip(snapshot):
+    strings = {}
+
+    def intern(value, buf):
+        if value is None:
+            return 0
+        return strings.setdefault(value, len(strings) + 1)
+
+    buf = bytearray()
+    at = encode(snapshot, intern, buf)
+    return decode(buf, at, {0: None, **{sid: value for value, sid in strings.items()}})
+
+
+def write(path, taken, **options):
+    with RecordWriter(path, **options) as writer:
+        for snapshot in taken:
+            writer.write(snapshot)
+
+
+def test_encode_decode(simulated):
+    snapshot = snapshots(simulated, 1, gpus=4, processes=3)[0]
+    assert round_trip(snapshot) == snapshot
+
+
+def test_missing_values(simulated):
+    snapshot = snapshots(simulated, 1, gpus=2, processes=2)[0]
+    snapshot.gpus[0].fan = snapshot.gpus[1].power_limit = None
+    snapshot.processes[0].used_memory = None
+    decoded = round_trip(snapshot)
+    assert decoded.gpus[0].fan is None and decoded.gpus[1].power_limit is None
+    assert decoded.processes[0].used_memory is None
+    assert decoded == snapshot
+
+
+def test_encode_decode_mig(simulated):
+    snapshot = snapshots(simulated, 1, gpus=2, processes=3, mig=3)[0]
+    assert [len(g.mig) for g in snapshot.gpus] == [3, 3]
+    assert all(p.gpu_instance is not None for p in snapshot.processes)
+    decoded = round_trip(snapshot)
+    assert decoded == snapshot
+    assert decoded.gpus[1].mig[2].profile == snapshot.gpus[1].mig[2].profile
+
+
+def test_mixed_mig_and_missing_values(simulated):
+    sim = simulated(gpus=3, processes=2)
+    sim.configure_mig(1, 2)
+    with Collector() as collector:
+        snapshot = collector.snapshot()
+    snapshot.gpus[1].mig[0].util = None
+    snapshot.gpus[1].mig[1].error = "GPU is lost"
+    decoded = round_trip(snapshot)
+    assert [g.mig_mode for g in decoded.gpus] == [False, True, False]
+    assert [len(g.mig) for g in decoded.gpus] == [0, 2, 0]
+    assert decoded == snapshot
+
+
+def test_mig_recording(simulated, tmp_path):
+    taken = snapshots(simulated, 3, gpus=2, mig=2)
+    path = tmp_path / "r.nvr"
+    write(path, taken)
+    with Recording(path) as recording:
+        assert list(recording) == taken
+
+
+def test_recording(simulated, tmp_path):
+    taken = snapshots(simulated, 5, gpus=2)
+    path = tmp_path / "r.nvr"
+    write(path, taken, index_every=2)
+    with Recording(path) as recording:
+        assert not recording.recovered
+        assert len(recording) == 5 and recording[4] == taken[4]
+        assert list(recording) == taken
+        assert list(recording.between(taken[1].timestamp, taken[3].timestamp)) == taken[1:3]
+
+
+def test_truncated_recording_is_recovered(simulated, tmp_path):
+    taken = snapshots(simulated, 3, gpus=2)
+    path = tmp_path / "r.nvr"
+    write(path, taken)
+    with Recording(path) as recording:
+        last = recording.offsets[-1]
+    data = path.read_bytes()
+    path.write_bytes(data[:-3])             # into the trailer
+    with Recording(path) as recording:
+        assert recording.recovered
+        assert list(recording) == taken
+    path.write_bytes(data[:last + 10])      # into the last snapshot
+    with Recording(path) as recording:
+        assert recording.recovered
+        assert list(recording) == taken[:-1]
+
+
+def open_fds(path):
+    fds = "/proc/self/fd"
+    return sum(1 for fd in os.listdir(fds) if os.path.realpath(os.path.join(fds, fd)) == str(path))
+
+
+@pytest.mark.parametrize("data", [b"", MAGIC[:5], b"NOTNVSMI" + bytes(8),
+                                  FILE_HEADER.pack(MAGIC, VERSION - 1, 0)])
+def test_not_a_recording(tmp_path, data):
+    path = tmp_path / "r.nvr"
+    path.write_bytes(data)
+    with pytest.raises(RecordingError) as error:
+        Recording(path)
+    if os.path.isdir("/proc/self/fd"):
+        # Closed on the way out, not when the traceback is collected
+        assert error.value.__traceback__ is not None
+        assert open_fds(path) == 0
+
+
+def test_replay_rejects_empty_file(tmp_path, capsys):
+    path = tmp_path / "r.nvr"
+    path.write_bytes(b"")
+    assert main(["replay", str(path)]) == 1
+    assert "not a complete nvsmi recording" in capsys.readouterr().err
@@ -0,0 +1,96 @@
+import os
+import pytest
+import nvsmi.shm as shm
+from nvsmi.cli.main import main
+from nvsmi.collect import Collector
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "nvsmi")
+
+
+def take(simulated, **options):
+    simulated(**options)
+    with Collector() as collector:
+        return collector.snapshot()
+
+
+def test_publish_and_read(simulated, path):
+    snapshot = take(simulated, gpus=2, processes=2)
+    with shm.Publisher(path, interval=1.0) as publisher:
+        publisher.publish(snapshot)
+        segment = shm.Segment.open(path)
+        assert segment.interval == 1.0
+        assert segment.read() == snapshot
+        segment.close()
+    assert shm.Segment.open(path) is None
+    assert not os.path.exists(path + ".lock")
+
+
+def test_stale_segment(simulated, path):
+    snapshot = take(simulated, gpus=1)
+    with shm.Publisher(path, interval=0.1) as publisher:
+        publisher.publish(snapshot)
+        segment = shm.Segment.open(path)
+        assert segment.read(max_age=-1) is None
+        segment.close()
+
+
+def test_open_collector_reads_segment(simulated, path):
+    snapshot = take(simulated, gpus=2)
+    with shm.Publisher(path, interval=1.0) as publisher:
+        publisher.publish(snapshot)
+        with shm.open_collector(path=path, interval=1.0) as collector:
+            assert isinstance(collector, shm.SharedCollector)
+            assert [gpu for gpu, _ in collector.devices()] == snapshot.gpus
+        # Published less often than the caller loops: query NVML directly
+        with shm.open_collector(path=path, interval=0.5) as collector:
+            assert isinstance(collector, Collector)
+
+
+def test_reader_follows_regrown_segment(simulated, path):
+    small = take(simulated, gpus=1)
+    large = take(simulated, gpus=32, processes=4)
+    with shm.Publisher(path, interval=1.0, capacity=256) as publisher:
+        publisher.publish(small)
+        with shm.open_collector(path=path, interval=1.0) as collector:
+            collector.fallback = lambda: pytest.fail("fell back to NVML")
+            assert collector.snapshot() == small
+            publisher.publish(large)
+            assert publisher.capacity > 256
+            assert collector.snapshot() == large
+            assert collector.collector is None
+
+
+def test_reader_falls_back_when_publisher_stops(simulated, path):
+    snapshot = take(simulated, gpus=2)
+    publisher = shm.Publisher(path, interval=1.0)
+    publisher.publish(snapshot)
+    with shm.open_collector(path=path, interval=1.0) as collector:
+        assert collector.snapshot() == snapshot
+        publisher.close()
+        assert len(collector.snapshot().gpus) == 2
+        assert isinstance(collector.collector, Collector)
+
+
+def test_second_publisher_is_refused(path):
+    with shm.Publisher(path):
+        with pytest.raises(shm.PublisherError):
+            shm.Publisher(path)
+
+
+def test_publish_command_exits_1_when_already_published(simulated, capsys, path):
+    simulated(gpus=1)
+    with shm.Publisher(path):
+        assert main(["publish", "--path", path, "-lms", "100"]) == 1
+    assert "already being published" in capsys.readouterr().err
+
+
+def test_publish_mig_snapshot(simulated, path):
+    snapshot = take(simulated, gpus=2, processes=3, mig=3)
+    with shm.Publisher(path, interval=1.0) as publisher:
+        publisher.publish(snapshot)
+        segment = shm.Segment.open(path)
+        assert segment.read() == snapshot
+        segment.close()
@@ -0,0 +1,116 @@
+import json
+import pytest
+import nvsmi.nvml as nvml
+from nvsmi.models.models import NvLinkInfo, StaticInfo
+
+
+def filled_cache(simulated, path, gpus=2):
+    simulated(gpus=gpus)
+    nvml.initialize()
+    try:
+        cache = nvml.StaticCache(path)
+        cache.load(nvml.get_driver_version())
+        for idx in range(nvml.get_device_count()):
+            cache.device(idx, nvml.get_device_handle_by_index(idx))
+        cache.lookup("cuda_version", lambda: "12.4")
+        cache.save()
+        return cache
+    finally:
+        nvml.shutdown()
+
+
+def reload(path, driver_version=None):
+    cache = nvml.StaticCache(path)
+    cache.load(driver_version or nvml.pynvml.nvmlSystemGetDriverVersion())
+    return cache
+
+
+def test_round_trip(simulated, tmp_path):
+    path = tmp_path / "static.json"
+    cache = filled_cache(simulated, path)
+    loaded = reload(path)
+    assert loaded.devices == cache.devices
+    assert loaded.extra == {"cuda_version": "12.4"}
+    assert not loaded.dirty
+
+
+def test_other_driver_is_a_miss(simulated, tmp_path):
+    path = tmp_path / "static.json"
+    filled_cache(simulated, path)
+    assert reload(path, "1.2.3").devices == {}
+
+
+def test_swapped_gpu_is_queried_again(simulated, tmp_path):
+    path = tmp_path / "static.json"
+    cache = filled_cache(simulated, path)
+    data = json.loads(path.read_text())
+    data["devices"]["1"]["uuid"] = "GPU-swapped"
+    path.write_text(json.dumps(data))
+    nvml.initialize()
+    try:
+        loaded = reload(path)
+        for idx in range(2):
+            loaded.device(idx, nvml.get_device_handle_by_index(idx))
+    finally:
+        nvml.shutdown()
+    assert loaded.devices == cache.devices
+    assert loaded.dirty
+
+
+def test_corrupt_file_is_a_miss(simulated, tmp_path):
+    path = tmp_path / "static.json"
+    filled_cache(simulated, path)
+    path.write_text("{not json")
+    loaded = reload(path)
+    assert loaded.devices == {} and loaded.extra == {}
+
+
+def test_lookup_computes_once():
+    cache = nvml.StaticCache()
+    calls = []
+    for _ in range(2):
+        assert cache.lookup("answer", lambda: calls.append(1) or 42) == 42
+    assert calls == [1]
+
+
+def test_invalidate(simulated, tmp_path):
+    cache = filled_cache(simulated, tmp_path / "static.json")
+    cache.invalidate(0)
+    assert list(cache.devices) == [1] and cache.dirty
+
+
+def test_key_carries_version(simulated, tmp_path):
+    cache = filled_cache(simulated, tmp_path / "static.json")
+    assert cache.key.startswith(f"v{nvml.CACHE_VERSION}/")
+
+
+@pytest.mark.parametrize("key", [
+    lambda key: key.replace(f"v{nvml.CACHE_VERSION}/", f"v{nvml.CACHE_VERSION - 1}/"),
+    lambda key: key.split("/", 1)[1],           # written before the cache was versioned
+])
+def test_other_version_is_a_miss(simulated, tmp_path, key):
+    path = tmp_path / "static.json"
+    cache = filled_cache(simulated, path)
+    data = json.loads(path.read_text())
+    data["key"] = key(data["key"])
+    path.write_text(json.dumps(data))
+    loaded = reload(path)
+    assert loaded.devices == {} and loaded.extra == {}
+    assert loaded.key == cache.key
+
+
+def test_malformed_nvlinks_are_a_miss(simulated, tmp_path):
+    path = tmp_path / "static.json"
+    filled_cache(simulated, path)
+    data = json.loads(path.read_text())
+    data["devices"]["0"]["nvlinks"] = ["00000000:28:00.0"]     # version 1 layout
+    path.write_text(json.dumps(data))
+    assert reload(path).devices == {}
+
+
+def test_static_info_rejects_non_dict_nvlinks():
+    with pytest.raises(TypeError):
+        StaticInfo("GPU-0", "GPU", "00000000:01:00.0", None, 0, None, nvlinks=["00000000:28:00.0"])
+    info = StaticInfo("GPU-0", "GPU", "00000000:01:00.0", None, 0, None,
+                      nvlinks=[{"link": 0, "version": 4, "remote_bus_id": None, "speed": None}])
+    assert info.nvlinks == [NvLinkInfo(0, 4, None, None)]
@@ -0,0 +1,70 @@
+import dataclasses
+import json
+import pytest
+import nvsmi.nvml as nvml
+import nvsmi.topo as topo
+from nvsmi.cli.main import main
+
+
+@pytest.fixture
+def devices(simulated):
+    """(handles, infos) of four simulated GPUs, inside an NVML session"""
+    simulated(gpus=4)
+    nvml.initialize()
+    handles = [nvml.get_device_handle_by_index(i) for i in range(4)]
+    yield handles, [nvml.query_static_info(h) for h in handles]
+    nvml.shutdown()
+
+
+@pytest.mark.parametrize("workers", [1, 8])
+def test_gpu_matrix(devices, workers):
+    handles, infos = devices
+    matrix = topo.gpu_matrix(handles, infos, workers)
+    assert [matrix[i][i] for i in range(4)] == ["X"] * 4
+    assert all(matrix[i][j] == matrix[j][i] for i in range(4) for j in range(4))
+    assert all(matrix[i][j].startswith("NV") for i in range(4) for j in range(4) if i != j)
+
+
+def test_gpu_matrix_without_nvlink(devices):
+    handles, infos = devices
+    infos = [dataclasses.replace(info, nvlinks=[]) for info in infos]
+    matrix = topo.gpu_matrix(handles, infos)
+    assert all(matrix[i][j] in topo.LEVELS.values() for i in range(4) for j in range(4) if i != j)
+
+
+def test_cache_name_follows_devices(devices):
+    _, infos = devices
+    name = topo.cache_name(infos)
+    assert name.startswith("topology/")
+    assert topo.cache_name(list(infos)) == name
+    assert topo.cache_name(infos[::-1]) != name
+    assert topo.cache_name(infos[:3]) != name
+    relinked = [dataclasses.replace(infos[0], nvlinks=infos[0].nvlinks[1:])] + infos[1:]
+    assert topo.cache_name(relinked) != name
+
+
+def test_lookup_replaces_old_matrix():
+    cache = nvml.StaticCache()
+    cache.lookup("cuda_version", lambda: "12.4")
+    cache.lookup("topology/a", lambda: [["X"]])
+    assert cache.lookup("topology/b", lambda: [["X", "NV4"]], replaces="topology") == [["X", "NV4"]]
+    assert sorted(cache.extra) == ["cuda_version", "topology/b"]
+
+
+def test_format_list():
+    assert topo.format_list([0, 1, 2, 5, 7, 8]) == "0-2,5,7-8"
+    assert topo.format_list([]) == "N/A"
+
+
+def test_topo_command_caches_matrix(simulated, capsys):
+    simulated(gpus=3)
+    assert not main(["topo", "-m"])
+    first = capsys.readouterr().out
+    cache = json.load(open(nvml.default_cache_path()))
+    names = [name for name in cache["extra"] if name.startswith("topology/")]
+    assert len(names) == 1
+    cache["extra"][names[0]]["matrix"][0][1] = "CACHED"
+    json.dump(cache, open(nvml.default_cache_path(), "w"))
+    assert not main(["topo", "-m"])
+    second = capsys.readouterr().out
+    assert "CACHED" in second and "CACHED" not in first
@@ -0,0 +1,86 @@
+import json
+import pytest
+from nvsmi.accounting import aggregate, top
+from nvsmi.cli.main import main
+from nvsmi.models.models import MIB, ProcessInfo, ProcessOwner, Usage
+from nvsmi.proc import parse_cgroup
+
+CONTAINER = "3f4e5d6c7b8a" + "0" * 52
+POD = "0a1b2c3d-4e5f-6789-abcd-ef0123456789"
+
+
+@pytest.mark.parametrize("path, expected", [
+    (None, (None, None)),
+    ("/user.slice/user-1000.slice/session-3.scope", (None, None)),
+    (f"/system.slice/docker-{CONTAINER}.scope", (CONTAINER[:12], None)),
+    (f"/kubepods/burstable/pod{POD}/{CONTAINER}", (CONTAINER[:12], POD)),
+    (f"/kubepods.slice/kubepods-pod{POD.replace('-', '_')}.slice/cri-containerd-{CONTAINER}.scope",
+     (CONTAINER[:12], POD)),
+])
+def test_parse_cgroup(path, expected):
+    assert parse_cgroup(path) == expected
+
+
+def process(gpu, pid, used, name="python"):
+    return ProcessInfo(gpu, pid, "C", name, used)
+
+
+OWNERS = {1: ProcessOwner(1000, "alice"), 2: ProcessOwner(1000, "alice"), 3: ProcessOwner(1001, "bob")}
+PROCESSES = [process(2, 1, 100), process(0, 1, 200), process(1, 2, 50), process(0, 3, None),
+             process(3, 4, 10)]
+
+
+def test_aggregate_by_user():
+    usages = aggregate(PROCESSES, OWNERS, "user")
+    assert usages == [Usage("alice", 350, 2, [0, 1, 2]), Usage("bob", 0, 1, [0]), Usage(None, 10, 1, [3])]
+
+
+def test_aggregate_by_process():
+    usages = aggregate(PROCESSES, OWNERS, "process")
+    assert [(u.key, u.used_memory, u.gpus) for u in usages][:2] == [("1 python", 300, [0, 2]),
+                                                                    ("2 python", 50, [1])]
+
+
+def test_aggregate_rejects_unknown_grouping():
+    with pytest.raises(ValueError, match="unknown grouping"):
+        aggregate(PROCESSES, OWNERS, "host")
+
+
+@pytest.mark.parametrize("n", [None, 0, 1, 2, 10])
+def test_top_matches_a_full_sort(n):
+    usages = aggregate(PROCESSES, OWNERS, "process")
+    ranked = sorted(usages, key=lambda u: u.used_memory, reverse=True)
+    assert top(usages, n) == (ranked if n is None else ranked[:n])
+
+
+def test_command_text(simulated, capsys):
+    simulated(gpus=2, processes=3)
+    assert main(["usage", "--by", "process", "--top", "4", "--no-shm"]) is None
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].startswith("PID  Process name")
+    assert len(lines) == 1 + 4 + 1 + 1      # header, rows, "(2 more)", blank line
+    assert lines[5] == "(2 more)"
+    used = [int(line.split()[-1][:-len("MiB")]) for line in lines[1:5]]
+    assert used == sorted(used, reverse=True)
+
+
+def test_command_json(simulated, capsys):
+    sim = simulated(gpus=2, processes=3)
+    assert main(["usage", "--format", "json", "--top", "1", "--no-shm"]) is None
+    document = json.loads(capsys.readouterr().out)
+    assert document["by"] == "user" and document["total"] == 1
+    # The simulated PIDs do not exist here, so none of them has an owner
+    [group] = document["groups"]
+    assert group["key"] is None and group["processes"] == 6 and group["gpus"] == [0, 1]
+    assert group["used_memory"] == sum(used for dev in sim.devices for _, used in dev.compute)
+    assert group["used_memory"] % MIB == 0
+
+
+def test_command_exits_1_on_nvml_error(simulated, capsys, monkeypatch):
+    sim = simulated(gpus=1)
+
+    def fail():
+        raise sim.NVMLError_GpuIsLost(15)
+    monkeypatch.setattr(sim, "nvmlInit", fail)
+    assert main(["usage", "--no-shm"]) == 1
+    assert capsys.readouterr().err.startswith("Error: ")
@@ -0,0 +1,104 @@
+import io
+import re
+import pytest
+from nvsmi.cli.commands.watch import View
+from nvsmi.cli.main import main
+from nvsmi.collect import Collector
+from nvsmi.formatter.text.screen import Screen
+
+ESCAPE = re.compile(r"\x1b\[(?:(\d+);(\d+)H|H|2J|K)")
+
+
+class Terminal:
+    """Just enough of a VT100 to replay what Screen writes"""
+
+    def __init__(self, cols, rows):
+        self.cols, self.rows = cols, rows
+        self.cells = [[" "] * cols for _ in range(rows)]
+        self.row = self.col = 0
+
+    def feed(self, data):
+        pos = 0
+        for match in ESCAPE.finditer(data):
+            self.text(data[pos:match.start()])
+            pos = match.end()
+            code = match.group(0)
+            if match.group(1):
+                self.row, self.col = int(match.group(1)) - 1, int(match.group(2)) - 1
+            elif code.endswith("H"):
+                self.row = self.col = 0
+            elif code.endswith("2J"):
+                self.cells = [[" "] * self.cols for _ in range(self.rows)]
+            else:
+                self.cells[self.row][self.col:] = [" "] * (self.cols - self.col)
+        self.text(data[pos:])
+
+    def text(self, text):
+        for char in text:
+            self.cells[self.row][self.col] = char
+            self.col += 1
+
+    def lines(self):
+        return ["".join(row).rstrip() for row in self.cells]
+
+
+def frames():
+    yield ["+------+", "| a  1 |", "| b  2 |", "+------+"]
+    yield ["+------+", "| a  1 |", "| b 27 |", "+------+"]
+    yield ["+------+", "| a  1 |", "+------+"]
+    yield ["+------+", "| a  1 |", "| b  2 | and a long tail cut at the edge", "+------+"]
+
+
+def test_render_matches_frame():
+    out = io.StringIO()
+    screen, term = Screen(out, 20, 6), Terminal(20, 6)
+    for lines in frames():
+        start = out.tell()
+        screen.render(lines)
+        term.feed(out.getvalue()[start:])
+        assert term.lines() == [line[:20].rstrip() for line in lines] + [""] * (6 - len(lines))
+
+
+def test_only_changes_are_written():
+    out = io.StringIO()
+    screen = Screen(out, 80, 24)
+    lines = [f"row {i:02d} " + "x" * 60 for i in range(20)]
+    full = screen.render(lines)
+    assert screen.render(lines) == 0
+    lines[7] = lines[7][:30] + "y" + lines[7][31:]
+    assert 0 < screen.render(lines) < 12
+    assert screen.written == out.tell() > full
+
+
+def test_resize_redraws():
+    out = io.StringIO()
+    screen = Screen(out, 20, 4)
+    screen.render(["a", "b"])
+    screen.resize(30, 5)
+    assert out.getvalue()[out.tell():] == ""
+    start = out.tell()
+    screen.render(["a", "b"])
+    assert out.getvalue()[start:].startswith("\x1b[H\x1b[2J")
+
+
+def test_view_pages_and_keys(simulated):
+    simulated(gpus=2, processes=8)
+    with Collector() as collector:
+        snap = collector.snapshot()
+    view = View("gpu")
+    rows = 30
+    frame = view.frame(snap, rows)
+    assert len(frame) == rows and "page 1/" in frame[-1]
+    assert view.pages > 1
+    for _ in range(view.pages + 2):
+        assert view.handle("n")
+    assert view.page == view.pages - 1
+    assert view.handle("p") and view.page == view.pages - 2
+    assert view.handle("s") and view.sort == "pid"
+    assert view.handle("r") and view.reverse
+    assert not view.handle("q")
+
+
+def test_watch_needs_a_terminal(capsys):
+    assert main(["watch"]) == 1
+    assert "interactive terminal" in capsys.readouterr().err
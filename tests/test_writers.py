@@ -0,0 +1,88 @@
+import copy
+import io
+import json
+import xml.etree.ElementTree as ElementTree
+from nvsmi.cli.main import main
+from nvsmi.collect import Collector
+from nvsmi.formatter.json.summary import JsonWriter, NdjsonWriter, parse_snapshot
+from nvsmi.formatter.stream import write_collected, write_snapshot
+from nvsmi.formatter.text.query import QueryWriter
+from nvsmi.formatter.xml.summary import XmlWriter
+
+
+def take(simulated, count=1, **options):
+    simulated(**options)
+    with Collector() as collector:
+        return [collector.snapshot() for _ in range(count)]
+
+
+def render(writer_class, *snapshots, **options):
+    out = io.StringIO()
+    writer = writer_class(out, **options)
+    for snapshot in snapshots:
+        write_snapshot(writer, snapshot)
+    return out.getvalue()
+
+
+def test_json_round_trip(simulated):
+    snapshot, = take(simulated, gpus=3, processes=2)
+    doc = json.loads(render(JsonWriter, snapshot))
+    assert [g["index"] for g in doc["gpus"]] == [0, 1, 2]
+    assert len(doc["gpus"][0]["processes"]) == 2
+    assert parse_snapshot(doc) == snapshot
+
+
+def test_json_from_collector(simulated):
+    simulated(gpus=2)
+    out = io.StringIO()
+    with Collector() as collector:
+        write_collected(JsonWriter(out), collector)
+    assert len(json.loads(out.getvalue())["gpus"]) == 2
+
+
+def test_ndjson_line_per_gpu(simulated):
+    first, second = take(simulated, 2, gpus=2)
+    lines = render(NdjsonWriter, first, second, labels={"host": "node1"}).splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [(r["gpu"], r["host"]) for r in records] == [(0, "node1"), (1, "node1")] * 2
+    assert records[0]["timestamp"] == first.timestamp
+    assert records[0]["name"] == first.gpus[0].name
+
+
+def test_ndjson_changes_only(simulated):
+    first, = take(simulated, gpus=2)
+    second = copy.deepcopy(first)
+    second.timestamp += 1
+    second.gpus[1].temp += 5
+    lines = render(NdjsonWriter, first, second, changes=True).splitlines()
+    assert len(lines) == 3
+    assert json.loads(lines[2]) == {"timestamp": second.timestamp, "gpu": 1,
+                                    "temp": second.gpus[1].temp}
+
+
+def test_xml(simulated):
+    snapshot, = take(simulated, gpus=2, processes=1)
+    text = render(XmlWriter, snapshot)
+    root = ElementTree.fromstring(text.split("\n", 2)[2])     # past the prolog
+    assert root.tag == "nvidia_smi_log"
+    assert root.findtext("attached_gpus") == "2"
+    assert [gpu.get("id") for gpu in root.findall("gpu")] == [g.bus_id for g in snapshot.gpus]
+    assert root.find("gpu/product_name").text == snapshot.gpus[0].name
+
+
+def test_query_listing(simulated):
+    snapshot, = take(simulated, gpus=2)
+    lines = render(QueryWriter, snapshot).splitlines()
+    assert "==============NVSMI LOG==============" in lines
+    assert [line for line in lines if line.startswith("GPU ")] == \
+        [f"GPU {g.bus_id}" for g in snapshot.gpus]
+    attached = next(line for line in lines if line.startswith("Attached GPUs"))
+    assert attached.split(":")[1].strip() == "2"
+
+
+def test_summary_format_option(simulated, capsys):
+    simulated(gpus=2)
+    assert main(["summary", "--no-shm", "--no-cache", "--format", "json"]) is None
+    assert len(json.loads(capsys.readouterr().out)["gpus"]) == 2
+    assert main(["summary", "--no-shm", "--format", "yaml"]) == 1
+    assert "unsupported format" in capsys.readouterr().err